@@ -150,4 +150,55 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/ingesta/dashboard/' # A donde ir tras login exitoso
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# Ingesta de archivos
+# Cantidad de filas por bloque al leer archivos de carga (acota la memoria usada por archivo)
+INGESTA_TAMANO_BLOQUE_FILAS = int(os.environ.get('INGESTA_TAMANO_BLOQUE_FILAS', '10000'))
+
+# Validación en segundo plano: la vista solo guarda el archivo y el comando validar_cargas lo valida
+INGESTA_VALIDACION_ASINCRONA = os.environ.get('INGESTA_VALIDACION_ASINCRONA', '0') == '1'
+# Validaciones simultáneas de validar_cargas, cada una en su propio proceso (0 usa todos los núcleos)
+INGESTA_VALIDACION_PROCESOS = int(os.environ.get('INGESTA_VALIDACION_PROCESOS', '0'))
+# Directorio compartido entre la aplicación web y el proceso de validación
+INGESTA_DIRECTORIO_TEMPORAL = os.environ.get('INGESTA_DIRECTORIO_TEMPORAL', str(BASE_DIR / 'tmp' / 'ingesta'))
+# Dónde se guardan los reportes de errores de validación ('minio' o 'local', en el directorio temporal)
+INGESTA_REPORTES_ERRORES_ALMACENAMIENTO = os.environ.get('INGESTA_REPORTES_ERRORES_ALMACENAMIENTO', 'minio')
+# Horas que se conservan los reportes de errores antes de que limpiar_reportes_error los elimine
+INGESTA_REPORTES_ERRORES_HORAS = int(os.environ.get('INGESTA_REPORTES_ERRORES_HORAS', '24'))
+
+# Carga por lotes: máximo de archivos por lote y tamaño total máximo (sin comprimir) en MB
+INGESTA_LOTE_MAX_ARCHIVOS = int(os.environ.get('INGESTA_LOTE_MAX_ARCHIVOS', '50'))
+INGESTA_LOTE_MAX_MB = int(os.environ.get('INGESTA_LOTE_MAX_MB', '2048'))
+
+# Proceso de carga local (procesar_cargas): cargas simultáneas, intentos por registro
+# y segundos de espera antes del primer reintento (se duplica en cada intento)
+INGESTA_CARGA_HILOS = int(os.environ.get('INGESTA_CARGA_HILOS', '2'))
+INGESTA_CARGA_MAX_INTENTOS = int(os.environ.get('INGESTA_CARGA_MAX_INTENTOS', '3'))
+INGESTA_CARGA_ESPERA_REINTENTO = int(os.environ.get('INGESTA_CARGA_ESPERA_REINTENTO', '60'))
+
+# Filas de DisposicionFinal borradas por transacción al eliminar una carga
+INGESTA_PURGA_TAMANO_LOTE = int(os.environ.get('INGESTA_PURGA_TAMANO_LOTE', '10000'))
+
+# Actualizar la vista materializada disposicion_final_detallada después de cada carga y
+# purga (desactivar para cargas masivas y actualizarla al final con refrescar_vista_detallada)
+INGESTA_REFRESCAR_VISTA_DETALLADA = os.environ.get('INGESTA_REFRESCAR_VISTA_DETALLADA', '1') == '1'
+
+# Reportes
+# Caché de resultados: por defecto en la memoria de cada proceso; con varios procesos web
+# conviene una caché compartida (por ejemplo CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# con CACHE_LOCATION=/ruta/compartida)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+# Segundos que se conserva cada resultado de un reporte (se descarta antes si cambian los datos)
+REPORTES_CACHE_SEGUNDOS = int(os.environ.get('REPORTES_CACHE_SEGUNDOS', '3600'))
+# Directorio donde se guardan las exportaciones generadas, para reutilizarlas con los mismos filtros
+REPORTES_DIRECTORIO_EXPORTACIONES = os.environ.get('REPORTES_DIRECTORIO_EXPORTACIONES', str(BASE_DIR / 'tmp' / 'reportes'))
+# Exportaciones con más filas que este límite se generan en segundo plano (procesar_exportaciones)
+# y se descargan desde MinIO; las terminadas se eliminan después de REPORTES_EXPORTACIONES_HORAS
+REPORTES_EXPORTACION_FILAS_SEGUNDO_PLANO = int(os.environ.get('REPORTES_EXPORTACION_FILAS_SEGUNDO_PLANO', '100000'))
+REPORTES_EXPORTACIONES_HORAS = int(os.environ.get('REPORTES_EXPORTACIONES_HORAS', '24'))
@@ -0,0 +1,143 @@
+"""
+Sustituto de MinIO sobre el sistema de archivos local.
+
+Implementa las operaciones del cliente de ``minio`` que usa el proyecto, guardando cada
+bucket como un directorio. Se activa con ``MINIO_BACKEND=filesystem`` (ver
+``get_minio_client``) para ejecutar el flujo completo de carga en pruebas y en
+desarrollo sin servicios externos.
+"""
+import os
+import shutil
+from datetime import datetime, timezone
+
+from minio.datatypes import Object
+from minio.error import S3Error
+
+TAMANO_BLOQUE = 1024 * 1024
+
+
+class _RespuestaArchivo:
+    """
+    Respuesta de ``get_object`` con la misma interfaz que usa el proyecto del cliente real.
+    """
+
+    def __init__(self, path):
+        self._archivo = open(path, 'rb')
+
+    def read(self, amt=None):
+        return self._archivo.read(amt)
+
+    def stream(self, amt=TAMANO_BLOQUE):
+        yield from iter(lambda: self._archivo.read(amt), b'')
+
+    def close(self):
+        self._archivo.close()
+
+    def release_conn(self):
+        pass
+
+
+class MinioSistemaArchivos:
+    """
+    Cliente compatible con ``minio.Minio`` que guarda los objetos bajo ``raiz``.
+    """
+
+    def __init__(self, raiz):
+        self.raiz = os.path.abspath(raiz)
+        os.makedirs(self.raiz, exist_ok=True)
+
+    def _ruta_bucket(self, bucket_name):
+        return self._ruta_segura(self.raiz, bucket_name)
+
+    def _ruta_objeto(self, bucket_name, object_name):
+        return self._ruta_segura(self._ruta_bucket(bucket_name), object_name)
+
+    @staticmethod
+    def _ruta_segura(base, nombre):
+        ruta = os.path.abspath(os.path.join(base, nombre))
+        if os.path.commonpath([base, ruta]) != base or ruta == base:
+            raise ValueError(f'Nombre de objeto no válido: {nombre}')
+        return ruta
+
+    def _no_existe(self, bucket_name, object_name):
+        return S3Error(
+            response=None,
+            code='NoSuchKey',
+            message='The specified key does not exist.',
+            resource=f'/{bucket_name}/{object_name}',
+            request_id=None,
+            host_id=None,
+            bucket_name=bucket_name,
+            object_name=object_name,
+        )
+
+    def bucket_exists(self, bucket_name):
+        return os.path.isdir(self._ruta_bucket(bucket_name))
+
+    def make_bucket(self, bucket_name, *args, **kwargs):
+        os.makedirs(self._ruta_bucket(bucket_name), exist_ok=True)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None,
+                   metadata=None, part_size=0, **kwargs):
+        ruta = self._ruta_objeto(bucket_name, object_name)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Se escribe a un archivo temporal para que un lector nunca vea un objeto a medias
+        temporal = f'{ruta}.parcial'
+        with open(temporal, 'wb') as destino:
+            if length is None or length < 0:
+                shutil.copyfileobj(data, destino, TAMANO_BLOQUE)
+            else:
+                pendiente = length
+                while pendiente > 0:
+                    bloque = data.read(min(TAMANO_BLOQUE, pendiente))
+                    if not bloque:
+                        break
+                    destino.write(bloque)
+                    pendiente -= len(bloque)
+        os.replace(temporal, ruta)
+
+    def get_object(self, bucket_name, object_name, *args, **kwargs):
+        ruta = self._ruta_objeto(bucket_name, object_name)
+        if not os.path.isfile(ruta):
+            raise self._no_existe(bucket_name, object_name)
+        return _RespuestaArchivo(ruta)
+
+    def fget_object(self, bucket_name, object_name, file_path, *args, **kwargs):
+        ruta = self._ruta_objeto(bucket_name, object_name)
+        if not os.path.isfile(ruta):
+            raise self._no_existe(bucket_name, object_name)
+        shutil.copyfile(ruta, file_path)
+
+    def remove_object(self, bucket_name, object_name, *args, **kwargs):
+        # Como en MinIO, eliminar un objeto inexistente no es un error
+        ruta = self._ruta_objeto(bucket_name, object_name)
+        if os.path.isfile(ruta):
+            os.remove(ruta)
+
+    def remove_objects(self, bucket_name, delete_object_list, *args, **kwargs):
+        for objeto in delete_object_list:
+            self.remove_object(bucket_name, objeto.name)
+        return iter(())
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, *args, **kwargs):
+        base = self._ruta_bucket(bucket_name)
+        if not os.path.isdir(base):
+            return
+        prefix = prefix or ''
+        for directorio, subdirectorios, archivos in os.walk(base):
+            if not recursive:
+                subdirectorios.clear()
+            for nombre in sorted(archivos):
+                if nombre.endswith('.parcial'):
+                    continue
+                ruta = os.path.join(directorio, nombre)
+                object_name = os.path.relpath(ruta, base).replace(os.sep, '/')
+                if not object_name.startswith(prefix):
+                    continue
+                estado = os.stat(ruta)
+                yield Object(
+                    bucket_name,
+                    object_name,
+                    last_modified=datetime.fromtimestamp(estado.st_mtime, tz=timezone.utc),
+                    size=estado.st_size,
+                )
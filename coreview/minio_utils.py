@@ -1,8 +1,16 @@
 import os
+from django.conf import settings
 from minio import Minio
 from globalfunctions.string_manager import get_string
+from .minio_fs import MinioSistemaArchivos
 
 def get_minio_client():
+    # Sustituto sobre el sistema de archivos para pruebas y desarrollo sin MinIO
+    if os.environ.get('MINIO_BACKEND') == 'filesystem':
+        return MinioSistemaArchivos(
+            os.environ.get('MINIO_FILESYSTEM_ROOT', os.path.join(settings.BASE_DIR, 'tmp', 'minio'))
+        )
+
     try:
         MINIO_ENDPOINT = os.environ.get('MINIO_ENDPOINT_URL', 'minio:9000').split('//')[-1]
         MINIO_ACCESS_KEY = os.environ.get('MINIO_ACCESS_KEY', 'minioadmin')
@@ -0,0 +1,33 @@
+"""
+Utilidades para mover datos en bloque hacia PostgreSQL con COPY.
+"""
+import io
+
+# Marcador de nulos usado en los buffers CSV enviados con COPY
+COPY_NULL = '\\N'
+
+
+def copiar_dataframe(cursor, tabla, df, columnas=None):
+    """
+    Copia un DataFrame a una tabla usando ``COPY ... FROM STDIN`` en formato CSV.
+
+    Args:
+        cursor: Cursor de Django (o psycopg2) sobre una conexión PostgreSQL.
+        tabla (str): Nombre de la tabla destino (ya citado si es necesario).
+        df (DataFrame): Datos a copiar; los nulos se envían como ``\\N``.
+        columnas (list): Columnas del DataFrame a copiar, en el orden de la tabla destino.
+    """
+    columnas = list(columnas if columnas is not None else df.columns)
+    if df.empty:
+        return 0
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, columns=columnas, header=False, index=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+
+    lista_columnas = ', '.join(f'"{columna}"' for columna in columnas)
+    cursor.copy_expert(
+        f"COPY {tabla} ({lista_columnas}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer
+    )
+    return len(df)
@@ -0,0 +1,41 @@
+"""
+Utilidades para calcular el hash de contenido de archivos subidos.
+"""
+import hashlib
+
+# Tamaño de cada lectura al recorrer un archivo
+TAMANO_LECTURA = 1024 * 1024
+
+
+def _bloques(archivo):
+    if hasattr(archivo, 'chunks'):
+        # UploadedFile de Django (en memoria o en archivo temporal)
+        return archivo.chunks(TAMANO_LECTURA)
+    return iter(lambda: archivo.read(TAMANO_LECTURA), b'')
+
+
+def calcular_sha256(archivo):
+    """
+    Calcula el SHA-256 del contenido de un archivo en una sola lectura y lo deja
+    posicionado al inicio para el siguiente uso.
+    """
+    sha256 = hashlib.sha256()
+    archivo.seek(0)
+    for bloque in _bloques(archivo):
+        sha256.update(bloque)
+    archivo.seek(0)
+    return sha256.hexdigest()
+
+
+def copiar_con_sha256(origen, destino):
+    """
+    Copia ``origen`` en el archivo abierto ``destino`` y retorna el SHA-256 del contenido,
+    calculado en la misma pasada.
+    """
+    sha256 = hashlib.sha256()
+    origen.seek(0)
+    for bloque in _bloques(origen):
+        sha256.update(bloque)
+        destino.write(bloque)
+    origen.seek(0)
+    return sha256.hexdigest()
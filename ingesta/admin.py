@@ -0,0 +1,76 @@
+from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from globalfunctions.string_manager import get_string
+
+from .models import RegistroCarga
+
+
+def _por_segundo(filas, segundos):
+    if not filas or not segundos:
+        return None
+    return round(filas / segundos, 1)
+
+
+@admin.register(RegistroCarga)
+class RegistroCargaAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/ingesta/registrocarga/change_list.html'
+    list_display = (
+        'id', 'nombre_archivo_original', 'tipo_proceso', 'estado', 'fecha_hora_carga', 'tamano_bytes',
+        'filas_validadas', 'filas_rechazadas', 'duracion_validacion', 'duracion_almacenamiento', 'duracion_carga'
+    )
+    list_filter = ('estado', 'tipo_proceso', 'subsecretaria_origen')
+    search_fields = ('nombre_archivo_original', 'hash_sha256', 'user__username')
+    date_hierarchy = 'fecha_hora_carga'
+    readonly_fields = (
+        'fecha_hora_carga', 'fecha_validado', 'fecha_almacenado', 'fecha_cargado',
+        'duracion_validacion', 'duracion_almacenamiento', 'duracion_carga',
+        'fecha_creacion', 'fecha_actualizacion'
+    )
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {'TEMPLATE_TELEMETRY_LINK': get_string('templates.telemetry_link', 'ingesta'), **(extra_context or {})}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def get_urls(self):
+        urls = [
+            path(
+                'telemetria/',
+                self.admin_site.admin_view(self.telemetria_view),
+                name='ingesta_registrocarga_telemetria'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def telemetria_view(self, request):
+        """
+        Tiempos por etapa y volúmenes de las cargas agregados por tipo de proceso y mes.
+        """
+        filas = list(RegistroCarga.objects.telemetria())
+        for fila in filas:
+            fila['filas_por_segundo_validacion'] = _por_segundo(fila['filas_validacion_medida'], fila['segundos_validacion'])
+            fila['filas_por_segundo_carga'] = _por_segundo(fila['filas_carga_medida'], fila['segundos_carga'])
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': get_string('templates.telemetry_title', 'ingesta'),
+            'filas': filas,
+            'TEMPLATE_TELEMETRY_DESCRIPTION': get_string('templates.telemetry_description', 'ingesta'),
+            'TEMPLATE_TELEMETRY_PROCESS': get_string('templates.telemetry_process', 'ingesta'),
+            'TEMPLATE_TELEMETRY_MONTH': get_string('templates.telemetry_month', 'ingesta'),
+            'TEMPLATE_TELEMETRY_LOADS': get_string('templates.telemetry_loads', 'ingesta'),
+            'TEMPLATE_TELEMETRY_ERRORS': get_string('templates.telemetry_errors', 'ingesta'),
+            'TEMPLATE_TELEMETRY_BYTES': get_string('templates.telemetry_bytes', 'ingesta'),
+            'TEMPLATE_TELEMETRY_ROWS_READ': get_string('templates.telemetry_rows_read', 'ingesta'),
+            'TEMPLATE_TELEMETRY_ROWS_REJECTED': get_string('templates.telemetry_rows_rejected', 'ingesta'),
+            'TEMPLATE_TELEMETRY_ROWS_LOADED': get_string('templates.telemetry_rows_loaded', 'ingesta'),
+            'TEMPLATE_TELEMETRY_VALIDATION': get_string('templates.telemetry_validation', 'ingesta'),
+            'TEMPLATE_TELEMETRY_STORAGE': get_string('templates.telemetry_storage', 'ingesta'),
+            'TEMPLATE_TELEMETRY_LOAD': get_string('templates.telemetry_load', 'ingesta'),
+            'TEMPLATE_TELEMETRY_AVG_MAX': get_string('templates.telemetry_avg_max', 'ingesta'),
+            'TEMPLATE_TELEMETRY_ROWS_PER_SECOND': get_string('templates.telemetry_rows_per_second', 'ingesta'),
+            'TEMPLATE_TELEMETRY_EMPTY': get_string('templates.telemetry_empty', 'ingesta'),
+        }
+        return TemplateResponse(request, 'admin/ingesta/registrocarga/telemetria.html', context)
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.core.exceptions import ImproperlyConfigured
+
+
+class IngestaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'ingesta'
+
+    def ready(self):
+        from .schemas import EsquemaInvalido, registro_esquemas
+
+        # Verificar las estructuras de procesos al iniciar, antes de recibir cargas
+        try:
+            registro_esquemas.cargar()
+        except EsquemaInvalido as e:
+            raise ImproperlyConfigured(str(e)) from e
@@ -1,5 +1,5 @@
 from .catalogos import ConcesionForm, ASEForm, ServicioForm, ZonaDescargaForm
-from .upload import UploadFileForm, PROCESS_TO_SUBSECRETARIA
+from .upload import UploadFileForm, UploadBatchForm, PROCESS_TO_SUBSECRETARIA
 from .evidence import EvidenceUploadForm
 
 __all__ = [
@@ -8,6 +8,7 @@ __all__ = [
     'ServicioForm', 
     'ZonaDescargaForm',
     'UploadFileForm',
+    'UploadBatchForm',
     'PROCESS_TO_SUBSECRETARIA',
     'EvidenceUploadForm'
 ]
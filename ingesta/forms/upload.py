@@ -1,54 +1,55 @@
 # ingesta/forms/upload.py
-import json
-import os
+from collections.abc import Mapping
 from django import forms
 from globalfunctions.string_manager import get_string
+from ingesta.schemas import registro_esquemas
 
-# Cargar configuración desde archivos JSON
+# Configuración de procesos desde los archivos JSON, compilada por el registro de esquemas
 def load_process_config():
-    config = {}
-    base_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'file_structure')
-    
-    for subsecretaria in os.listdir(base_path):
-        subsecretaria_path = os.path.join(base_path, subsecretaria)
-        if os.path.isdir(subsecretaria_path):
-            config[subsecretaria] = {
-                'nombre': get_string(f'subsecretaria.{subsecretaria}', 'ingesta'),
-                'procesos': {}
-            }
-            
-            for file in os.listdir(subsecretaria_path):
-                if file.endswith('.json'):
-                    with open(os.path.join(subsecretaria_path, file), 'r') as f:
-                        process_config = json.load(f)
-                        config[subsecretaria]['procesos'].update(process_config)
-    
-    return config
-
-PROCESO_DATA = load_process_config()
+    return registro_esquemas.como_diccionario()
+
+
+class _VistaRegistro(Mapping):
+    """
+    Mapeo de solo lectura que consulta el registro de esquemas en cada acceso,
+    de modo que refleja los procesos agregados o modificados sin reiniciar.
+    """
+
+    def __init__(self, obtener):
+        self._obtener = obtener
+
+    def __getitem__(self, key):
+        return self._obtener()[key]
+
+    def __iter__(self):
+        return iter(self._obtener())
+
+    def __len__(self):
+        return len(self._obtener())
+
+
+PROCESO_DATA = _VistaRegistro(load_process_config)
 
 # Generar opciones agrupadas para Tipos de Proceso
 def get_grouped_choices(allowed_subsecretarias=None):
     choices = [('', get_string('forms.select_default', 'ingesta'))]
-    for sub_key, sub_data in PROCESO_DATA.items():
+    esquemas = registro_esquemas.esquemas()
+    for sub_key, subsecretaria_name in registro_esquemas.subsecretarias().items():
         if allowed_subsecretarias is not None and sub_key not in allowed_subsecretarias:
             continue
-        subsecretaria_name = sub_data['nombre']
-        process_choices = []
-        for proc_key, proc_data in sub_data.get('procesos', {}).items():
-            process_choices.append((proc_key, proc_data.get('nombre', proc_key)))
+        process_choices = [
+            (proc_key, esquema.nombre)
+            for proc_key, esquema in esquemas.items()
+            if esquema.subsecretaria == sub_key
+        ]
         if process_choices:
             choices.append((subsecretaria_name, process_choices))
     return choices
 
 def get_process_to_subsecretaria_map():
-    mapping = {}
-    for sub_key, sub_data in PROCESO_DATA.items():
-        for proc_key in sub_data.get('procesos', {}).keys():
-            mapping[proc_key] = sub_key
-    return mapping
+    return {proc_key: esquema.subsecretaria for proc_key, esquema in registro_esquemas.esquemas().items()}
 
-PROCESS_TO_SUBSECRETARIA = get_process_to_subsecretaria_map()
+PROCESS_TO_SUBSECRETARIA = _VistaRegistro(get_process_to_subsecretaria_map)
 
 class UploadFileForm(forms.Form):
     tipo_proceso = forms.ChoiceField(
@@ -67,3 +68,31 @@ class UploadFileForm(forms.Form):
         allowed_subsecretarias = kwargs.pop('allowed_subsecretarias', None)
         super().__init__(*args, **kwargs)
         self.fields['tipo_proceso'].choices = get_grouped_choices(allowed_subsecretarias)
+
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """
+    Campo de archivo que acepta varios archivos y retorna la lista.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)]
+
+
+class UploadBatchForm(UploadFileForm):
+    file = MultipleFileField(
+        label=get_string('forms.files_label', 'ingesta'),
+        required=True,
+        widget=MultipleFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx,.zip'})
+    )
@@ -0,0 +1,100 @@
+"""
+Carga local en la base de datos de los archivos ya guardados en MinIO.
+
+El comando ``procesar_cargas`` reclama registros en estado EN_MINIO con
+``SELECT ... FOR UPDATE SKIP LOCKED`` (varios procesos pueden trabajar a la vez sin
+tomar el mismo registro) y los carga con el cargador de la tabla destino del proceso.
+Los fallos de conexión con la base de datos o con MinIO se reintentan con espera
+creciente hasta ``INGESTA_CARGA_MAX_INTENTOS``; los demás dejan el registro en ERROR.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from minio.error import S3Error
+from urllib3.exceptions import HTTPError
+
+from globalfunctions.string_manager import get_string
+from ingesta.loaders import ErrorCarga, cargar_disposicion_final
+from ingesta.models import RegistroCarga
+from ingesta.schemas import registro_esquemas
+
+# Errores que pueden desaparecer al reintentar (conexión con la base de datos o con MinIO).
+# Los demás, como una clave duplicada o un archivo inválido, fallarían igual cada vez
+ERRORES_TRANSITORIOS = (OperationalError, InterfaceError, S3Error, HTTPError, ConnectionError)
+
+# Función de carga según la tabla destino (``table_name``) del esquema
+CARGADORES = {
+    'DisposicionFinal': cargar_disposicion_final,
+}
+
+
+def procesos_con_cargador():
+    """
+    Tipos de proceso cuya tabla destino tiene un cargador local.
+    """
+    return [clave for clave, esquema in registro_esquemas.esquemas().items() if esquema.table_name in CARGADORES]
+
+
+def reclamar_cargas(cantidad, tiempo_maximo):
+    """
+    Toma hasta ``cantidad`` registros EN_MINIO pendientes de carga, los más antiguos
+    primero, sin bloquear a otros procesos. Los reclamados hace más de ``tiempo_maximo``
+    vuelven a estar disponibles, y los que esperan un reintento solo se toman a su hora.
+    """
+    if cantidad <= 0:
+        return []
+    ahora = timezone.now()
+    with transaction.atomic():
+        registros = list(
+            RegistroCarga.objects
+            .filter(estado='EN_MINIO', tipo_proceso__in=procesos_con_cargador())
+            .filter(Q(reclamado_en__isnull=True) | Q(reclamado_en__lt=ahora - tiempo_maximo))
+            .filter(Q(proximo_intento__isnull=True) | Q(proximo_intento__lte=ahora))
+            .select_for_update(skip_locked=True)
+            .order_by('fecha_hora_carga')[:cantidad]
+        )
+        if registros:
+            RegistroCarga.objects.filter(pk__in=[registro.pk for registro in registros]).update(reclamado_en=ahora)
+            for registro in registros:
+                registro.reclamado_en = ahora
+    return registros
+
+
+def ejecutar_carga(registro_id, max_intentos=None, espera_reintento=None):
+    """
+    Carga el archivo de un registro reclamado. Pensada para ejecutarse en un hilo del
+    grupo de ``procesar_cargas``: usa su propia conexión y la cierra al terminar.
+    Retorna una tupla (registro, resultado, reintentar): ``resultado`` es el
+    ``ResultadoCarga`` o None si falló, y ``reintentar`` indica si se programó otro intento.
+    """
+    max_intentos = max_intentos or settings.INGESTA_CARGA_MAX_INTENTOS
+    espera_reintento = settings.INGESTA_CARGA_ESPERA_REINTENTO if espera_reintento is None else espera_reintento
+    try:
+        registro = RegistroCarga.objects.get(pk=registro_id)
+        esquema = registro_esquemas.obtener(registro.tipo_proceso, registro.subsecretaria_origen)
+        cargador = CARGADORES.get(esquema.table_name) if esquema else None
+        if cargador is None:
+            registro.marcar_como_error(
+                get_string('errors.no_process_structure', 'ingesta').format(process_type=registro.tipo_proceso)
+            )
+            return registro, None, False
+
+        registro.intentos_carga += 1
+        registro.proximo_intento = None
+        registro.save(update_fields=['intentos_carga', 'proximo_intento'])
+        try:
+            return registro, cargador(registro), False
+        except ErrorCarga as error:
+            if not isinstance(error.__cause__, ERRORES_TRANSITORIOS) or registro.intentos_carga >= max_intentos:
+                return registro, None, False
+            espera = espera_reintento * 2 ** (registro.intentos_carga - 1)
+            registro.estado = 'EN_MINIO'
+            registro.reclamado_en = None
+            registro.proximo_intento = timezone.now() + timedelta(seconds=espera)
+            registro.save(update_fields=['estado', 'reclamado_en', 'proximo_intento'])
+            return registro, None, True
+    finally:
+        connection.close()
@@ -0,0 +1,100 @@
+"""
+Carga por lotes de varios archivos de un mismo tipo de proceso.
+
+Los archivos (subidos uno a uno o dentro de un zip) se copian al directorio temporal con
+un ``RegistroCarga`` por archivo; ``validar_cargas`` los valida en segundo plano como
+cualquier otra carga, y la página del lote consulta el estado de cada uno.
+"""
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+from globalfunctions.string_manager import get_string
+from ingesta.models import RegistroCarga
+
+from .validacion import encolar_validacion
+
+EXTENSIONES_PERMITIDAS = ('.csv', '.xlsx')
+
+
+@dataclass
+class ResultadoArchivo:
+    """
+    Resultado de un archivo del lote: el registro creado, la carga existente si el
+    archivo ya había sido cargado, o el error que impidió registrarlo.
+    """
+    nombre: str
+    registro: Optional[RegistroCarga] = None
+    duplicado: Optional[RegistroCarga] = None
+    error: Optional[str] = None
+
+
+def _es_archivo_de_carga(nombre):
+    base = os.path.basename(nombre)
+    return bool(base) and not base.startswith('.') and base.lower().endswith(EXTENSIONES_PERMITIDAS)
+
+
+def expandir_archivos(uploaded_files):
+    """
+    Retorna una tupla (archivos, omitidos): la lista de (nombre, archivo) a cargar, con el
+    contenido de los zip expandido, y los nombres que no son archivos CSV o XLSX.
+    Los miembros del zip se leen directamente del archivo comprimido, sin extraerlos.
+    Lanza ``ValueError`` si el lote supera los límites configurados o un zip no es válido.
+    """
+    archivos = []
+    omitidos = []
+    tamano_total = 0
+    for uploaded_file in uploaded_files:
+        if not uploaded_file.name.lower().endswith('.zip'):
+            if _es_archivo_de_carga(uploaded_file.name):
+                archivos.append((uploaded_file.name, uploaded_file))
+                tamano_total += uploaded_file.size
+            else:
+                omitidos.append(uploaded_file.name)
+            continue
+
+        try:
+            comprimido = zipfile.ZipFile(uploaded_file)
+        except zipfile.BadZipFile:
+            raise ValueError(get_string('errors.batch_invalid_zip', 'ingesta').format(filename=uploaded_file.name))
+        for miembro in comprimido.infolist():
+            if miembro.is_dir() or miembro.filename.startswith('__MACOSX/'):
+                continue
+            if not _es_archivo_de_carga(miembro.filename):
+                omitidos.append(miembro.filename)
+                continue
+            archivos.append((os.path.basename(miembro.filename), comprimido.open(miembro)))
+            # Tamaño sin comprimir declarado en el zip
+            tamano_total += miembro.file_size
+
+    if len(archivos) > settings.INGESTA_LOTE_MAX_ARCHIVOS:
+        raise ValueError(get_string('errors.batch_too_many_files', 'ingesta').format(
+            count=len(archivos), max=settings.INGESTA_LOTE_MAX_ARCHIVOS
+        ))
+    if tamano_total > settings.INGESTA_LOTE_MAX_MB * 1024 * 1024:
+        raise ValueError(get_string('errors.batch_too_large', 'ingesta').format(max=settings.INGESTA_LOTE_MAX_MB))
+    return archivos, omitidos
+
+
+def encolar_lote(archivos, tipo_proceso, subsecretaria_origen, user):
+    """
+    Registra cada archivo de ``archivos`` (lista de (nombre, archivo)) en estado VALIDANDO
+    para que ``validar_cargas`` los valide en paralelo, igual que las cargas individuales.
+    Retorna una lista de ``ResultadoArchivo`` en el mismo orden de ``archivos``.
+    """
+    resultados = []
+    for nombre, archivo in archivos:
+        try:
+            # Los archivos repetidos dentro del mismo lote también se detectan como duplicados
+            registro, duplicado = encolar_validacion(archivo, nombre, tipo_proceso, subsecretaria_origen, user)
+            resultados.append(ResultadoArchivo(nombre=nombre, registro=registro, duplicado=duplicado))
+        except Exception as general_error:
+            print(get_string('messages.general_error', 'ingesta').format(error=general_error))
+            resultados.append(ResultadoArchivo(nombre=nombre, error=str(general_error)))
+        finally:
+            if isinstance(archivo, zipfile.ZipExtFile):
+                archivo.close()
+    return resultados
@@ -0,0 +1,275 @@
+"""
+Validación de archivos de carga en segundo plano.
+
+La vista de carga (o la de carga por lotes) guarda el archivo en el directorio temporal y
+crea un ``RegistroCarga`` en estado VALIDANDO; el comando ``validar_cargas`` toma esos
+registros, los valida en un grupo acotado de procesos reportando el avance y, si son
+válidos, los sube a MinIO.
+"""
+import os
+import time
+import uuid
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from minio.error import S3Error
+
+from coreview.minio_utils import get_minio_client, get_minio_bucket
+from globalfunctions.file_hash import copiar_con_sha256
+from globalfunctions.string_manager import get_string
+from ingesta.models import RegistroCarga
+from ingesta.validators import construir_reporte_errores, guardar_reporte_errores, validar_estructura_csv
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Tamaño de cada parte en las subidas multiparte a MinIO
+TAMANO_PARTE_MINIO = 10 * 1024 * 1024
+
+
+class _ValidacionReclamada(Exception):
+    """
+    Otro proceso volvió a reclamar el registro porque su reclamo dejó de renovarse.
+    """
+
+
+def content_type_archivo(filename):
+    return 'text/csv' if filename.lower().endswith('.csv') else CONTENT_TYPE_XLSX
+
+
+def directorio_temporal():
+    directorio = settings.INGESTA_DIRECTORIO_TEMPORAL
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def guardar_archivo_temporal(uploaded_file, original_filename):
+    """
+    Copia el archivo subido al directorio temporal compartido con el proceso de validación.
+    Retorna la ruta y el SHA-256 del contenido, calculado durante la misma copia.
+    """
+    path = os.path.join(directorio_temporal(), f"{uuid.uuid4().hex}_{original_filename}")
+    with open(path, 'wb') as destino:
+        hash_sha256 = copiar_con_sha256(uploaded_file, destino)
+    return path, hash_sha256
+
+
+def encolar_validacion(uploaded_file, original_filename, tipo_proceso, subsecretaria_origen, user, reclamar=False):
+    """
+    Guarda el archivo y crea el registro que el proceso de validación tomará después.
+    Retorna una tupla (registro, duplicado): si el mismo contenido ya fue cargado para el
+    proceso no se crea un registro nuevo y se retorna la carga existente como ``duplicado``.
+    Con ``reclamar`` el registro se crea ya reclamado, para validarlo en el mismo proceso
+    sin que ``validar_cargas`` lo tome.
+    """
+    path, hash_sha256 = guardar_archivo_temporal(uploaded_file, original_filename)
+    try:
+        duplicado = RegistroCarga.objects.duplicado(hash_sha256, tipo_proceso)
+        if duplicado is not None:
+            os.remove(path)
+            return None, duplicado
+
+        registro = RegistroCarga.objects.create(
+            nombre_archivo_original=original_filename,
+            path_temporal=path,
+            hash_sha256=hash_sha256,
+            estado='VALIDANDO',
+            tipo_proceso=tipo_proceso,
+            subsecretaria_origen=subsecretaria_origen,
+            reclamado_en=timezone.now() if reclamar else None,
+            tamano_bytes=os.path.getsize(path),
+            user=user
+        )
+        return registro, None
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def reclamar_validaciones(cantidad, tiempo_maximo):
+    """
+    Toma hasta ``cantidad`` registros pendientes, los más antiguos primero, sin bloquear a
+    otros procesos de validación. ``validar_carga`` renueva ``reclamado_en`` con cada
+    avance; los registros cuyo reclamo no se renovó en ``tiempo_maximo`` (por ejemplo,
+    porque el proceso que los tomó se detuvo) vuelven a estar disponibles.
+    """
+    if cantidad <= 0:
+        return []
+    ahora = timezone.now()
+    with transaction.atomic():
+        registros = list(
+            RegistroCarga.objects.pendientes_validacion()
+            .filter(Q(reclamado_en__isnull=True) | Q(reclamado_en__lt=ahora - tiempo_maximo))
+            .select_for_update(skip_locked=True)
+            .order_by('fecha_hora_carga')[:cantidad]
+        )
+        if registros:
+            RegistroCarga.objects.filter(pk__in=[registro.pk for registro in registros]).update(reclamado_en=ahora)
+            for registro in registros:
+                registro.reclamado_en = ahora
+    return registros
+
+
+def numero_procesos():
+    """
+    Validaciones simultáneas: ``INGESTA_VALIDACION_PROCESOS`` o, si es 0, los núcleos disponibles.
+    """
+    return max(1, settings.INGESTA_VALIDACION_PROCESOS or os.cpu_count() or 1)
+
+
+def inicializar_proceso():
+    # Con el método de inicio 'spawn' el proceso no hereda la configuración de Django
+    if not apps.ready:
+        django.setup()
+
+
+def ejecutar_validacion(registro_id):
+    """
+    Valida una carga reclamada. Pensada para ejecutarse en un proceso del grupo de
+    ``validar_cargas``: usa su propia conexión y la cierra al terminar.
+    Retorna una tupla (registro, es_valido).
+    """
+    try:
+        registro = RegistroCarga.objects.get(pk=registro_id)
+        return registro, validar_carga(registro)
+    finally:
+        connections.close_all()
+
+
+def descartar_validacion(registro_id, error):
+    """
+    Marca como ERROR una carga cuyo proceso de validación terminó sin registrar el
+    resultado (por ejemplo, porque el sistema lo detuvo por falta de memoria).
+    """
+    registro = RegistroCarga.objects.get(pk=registro_id)
+    if registro.estado != 'VALIDANDO':
+        return registro
+    if registro.path_temporal and os.path.exists(registro.path_temporal):
+        os.remove(registro.path_temporal)
+    registro.path_temporal = None
+    registro.marcar_como_error(get_string('errors.validation_worker_error', 'ingesta').format(
+        error=str(error) or type(error).__name__
+    ))
+    return registro
+
+
+def subir_archivo_minio(registro, archivo, length, minio_client=None, bucket=None):
+    """
+    Sube el archivo de un registro a MinIO y retorna el nombre del objeto.
+    Los archivos grandes se envían por partes, y el SHA-256 del registro se guarda
+    como metadato del objeto.
+    """
+    minio_client = minio_client or get_minio_client()
+    bucket = bucket or get_minio_bucket()
+    if not minio_client:
+        raise RuntimeError(get_string('errors.minio_not_configured', 'ingesta'))
+
+    object_name = f"{registro.subsecretaria_origen}/{registro.tipo_proceso}/{registro.id}/{registro.nombre_archivo_original}"
+
+    # Asegurar que el bucket exista
+    if not minio_client.bucket_exists(bucket):
+        minio_client.make_bucket(bucket)
+        print(get_string('messages.bucket_created', 'ingesta').format(bucket=bucket))
+
+    archivo.seek(0)
+    minio_client.put_object(
+        bucket_name=bucket,
+        object_name=object_name,
+        data=archivo,
+        length=length,
+        part_size=TAMANO_PARTE_MINIO,
+        content_type=content_type_archivo(registro.nombre_archivo_original),
+        metadata={'sha256': registro.hash_sha256} if registro.hash_sha256 else None
+    )
+    print(get_string('messages.upload_success', 'ingesta').format(object_name=object_name))
+    return object_name
+
+
+def validar_carga(registro):
+    """
+    Valida el archivo temporal de un registro en estado VALIDANDO.
+    Si es válido lo sube a MinIO y el registro pasa a EN_MINIO; si no, queda en ERROR
+    con el mensaje de validación y, cuando aplica, el reporte de errores por fila.
+    Si otro proceso lo reclamó mientras tanto, deja de validar sin modificar el registro
+    ni el archivo temporal.
+    """
+    def renovar_reclamo(**campos):
+        # Solo se renueva si el reclamo sigue siendo el de este proceso
+        ahora = timezone.now()
+        renovado = (
+            RegistroCarga.objects
+            .filter(pk=registro.pk, reclamado_en=registro.reclamado_en)
+            .update(reclamado_en=ahora, **campos)
+        )
+        if renovado:
+            registro.reclamado_en = ahora
+            for campo, valor in campos.items():
+                setattr(registro, campo, valor)
+        return bool(renovado)
+
+    def progreso(filas, errores):
+        # El validador captura las excepciones, así que un reclamo perdido se revisa al terminar
+        renovar_reclamo(filas_validadas=filas, errores_encontrados=errores)
+
+    path = registro.path_temporal
+    propio = True
+    try:
+        with open(path, 'rb') as archivo:
+            inicio = time.perf_counter()
+            resultado = validar_estructura_csv(
+                archivo,
+                registro.subsecretaria_origen,
+                registro.tipo_proceso,
+                progreso=progreso
+            )
+            registro.registrar_etapa('validacion', time.perf_counter() - inicio)
+            if not renovar_reclamo():
+                raise _ValidacionReclamada()
+            es_valido, error_validacion = resultado[0], resultado[1]
+            error_df = resultado[2] if len(resultado) == 3 else None
+
+            if es_valido:
+                print(get_string('messages.validation_success', 'ingesta'))
+                inicio = time.perf_counter()
+                registro.path_minio = subir_archivo_minio(registro, archivo, os.path.getsize(path))
+                registro.registrar_etapa('almacenamiento', time.perf_counter() - inicio)
+                registro.path_temporal = None
+                # Liberar el registro para que el proceso de carga lo pueda reclamar
+                registro.reclamado_en = None
+                registro.estado = 'EN_MINIO'
+                registro.save()
+                print(get_string('messages.db_save_print', 'ingesta').format(id=registro.id))
+                return True
+
+        if error_df is not None and not error_df.empty:
+            registro.path_reporte_errores = guardar_reporte_errores(
+                construir_reporte_errores(error_df, registro.nombre_archivo_original)
+            )
+            registro.errores_encontrados = int(error_df['Cantidad de Errores'].sum())
+            registro.filas_rechazadas = int(error_df['Fila'].nunique())
+        registro.path_temporal = None
+        registro.marcar_como_error(error_validacion)
+        return False
+    except _ValidacionReclamada:
+        propio = False
+        print(get_string('messages.validation_reclaimed', 'ingesta').format(id=registro.id))
+        return False
+    except S3Error as minio_error:
+        print(get_string('messages.minio_error', 'ingesta').format(error=minio_error))
+        registro.path_temporal = None
+        registro.marcar_como_error(get_string('errors.minio_upload', 'ingesta').format(error=str(minio_error)))
+        return False
+    except Exception as general_error:
+        print(get_string('messages.general_error', 'ingesta').format(error=general_error))
+        registro.path_temporal = None
+        registro.marcar_como_error(str(general_error))
+        return False
+    finally:
+        # El archivo original ya está en MinIO o fue rechazado (si otro proceso reclamó el
+        # registro, el archivo es suyo)
+        if propio and path and os.path.exists(path):
+            os.remove(path)
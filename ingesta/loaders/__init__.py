@@ -0,0 +1,26 @@
+from ingesta.models.disposicion.derivados import calcular_derivados, calcular_epoch
+
+from .disposicion_final import ErrorCarga, cargar_disposicion_final, recargar_mes
+from .mensual import periodos_de_carga, recalcular_mensual, todos_los_periodos
+from .purga import ErrorPurga, purgar_carga, vaciar_mes
+from .upsert import ResultadoCarga, TablaIntermedia
+from .vista_detallada import VISTA_DETALLADA, huella_datos_vista, refrescar_vista_detallada
+
+__all__ = [
+    'ErrorCarga',
+    'ErrorPurga',
+    'ResultadoCarga',
+    'TablaIntermedia',
+    'VISTA_DETALLADA',
+    'calcular_derivados',
+    'calcular_epoch',
+    'cargar_disposicion_final',
+    'huella_datos_vista',
+    'periodos_de_carga',
+    'purgar_carga',
+    'recalcular_mensual',
+    'recargar_mes',
+    'refrescar_vista_detallada',
+    'todos_los_periodos',
+    'vaciar_mes'
+]
@@ -0,0 +1,103 @@
+"""
+Resolución de los nombres de catálogo de ``DisposicionFinal`` a llaves de los catálogos.
+
+Los archivos traen la concesión, el ASE, el servicio y la zona de descarga como texto.
+Al cargar, cada nombre se busca en su catálogo con la misma normalización de la
+validación (``normalizar_nombre_catalogo``) y la llave se guarda en el campo ``*_ref``,
+para que los reportes unan y filtren por llave indexada.
+
+La base de datos aplica la misma regla (migración 0014): un disparador resuelve las
+llaves que falten en cada fila insertada o actualizada por cualquier vía (NiFi, SQL
+directo), y los disparadores de los catálogos vuelven a resolver las filas de un nombre
+cuando su entrada se crea, cambia o se elimina. ``actualizar_referencias`` resuelve las
+filas guardadas antes de esos disparadores (comando ``resolver_catalogos_disposicion``).
+"""
+from django.db import connection
+
+from ingesta.models import ASE, Concesion, DisposicionFinal, Servicio, ZonaDescarga
+from ingesta.signals import notificar_datos_disposicion
+from ingesta.validators.catalog_validators import normalizar_nombre_catalogo
+
+# Campo de texto del archivo -> (campo con la llave, catálogo)
+CAMPOS_CATALOGO = {
+    'concesion': ('concesion_ref', Concesion),
+    'ase': ('ase_ref', ASE),
+    'servicio': ('servicio_ref', Servicio),
+    'zona_descarga': ('zona_descarga_ref', ZonaDescarga),
+}
+
+
+def mapas_catalogos():
+    """
+    Retorna ``{campo: {nombre_normalizado: id}}`` para cada catálogo. Si un nombre se
+    repite se usa el registro activo y, entre ellos, el de menor ID (la misma regla de
+    ``actualizar_referencias``).
+    """
+    mapas = {}
+    for campo, (_, modelo) in CAMPOS_CATALOGO.items():
+        mapa = {}
+        for pk, nombre in modelo.objects.order_by('-activo', 'id').values_list('id', 'nombre'):
+            mapa.setdefault(normalizar_nombre_catalogo(nombre), pk)
+        mapas[campo] = mapa
+    return mapas
+
+
+def resolver_catalogos(df, mapas):
+    """
+    Agrega al bloque las columnas ``*_ref_id`` con la llave de cada nombre de catálogo
+    (``<NA>`` si el nombre falta o no está en el catálogo).
+    """
+    for campo, (campo_ref, _) in CAMPOS_CATALOGO.items():
+        if campo not in df.columns:
+            continue
+        llaves = df[campo].dropna().map(normalizar_nombre_catalogo).map(mapas[campo])
+        df[f'{campo_ref}_id'] = llaves.reindex(df.index).astype('Int64')
+    return df
+
+
+def _sentencia_actualizacion():
+    quote = connection.ops.quote_name
+    tabla = quote(DisposicionFinal._meta.db_table)
+    busquedas, uniones, nuevos, asignaciones, cambios = [], [], [], [], []
+    for campo, (campo_ref, modelo) in CAMPOS_CATALOGO.items():
+        columna_ref = DisposicionFinal._meta.get_field(campo_ref).column
+        alias = f'cat_{campo}'
+        busquedas.append(
+            f"""{alias} AS (
+                SELECT DISTINCT ON (UPPER(TRIM(nombre))) UPPER(TRIM(nombre)) AS clave, id
+                FROM {quote(modelo._meta.db_table)}
+                ORDER BY UPPER(TRIM(nombre)), activo DESC, id
+            )"""
+        )
+        uniones.append(f'LEFT JOIN {alias} ON {alias}.clave = UPPER(TRIM(d.{quote(campo)}))')
+        nuevos.append(f'{alias}.id AS {quote(columna_ref)}')
+        asignaciones.append(f'{quote(columna_ref)} = n.{quote(columna_ref)}')
+        cambios.append(f'{tabla}.{quote(columna_ref)} IS DISTINCT FROM n.{quote(columna_ref)}')
+
+    return f"""
+        WITH {', '.join(busquedas)},
+        nuevos AS (
+            SELECT d.id, {', '.join(nuevos)}
+            FROM {tabla} d
+            {' '.join(uniones)}
+            WHERE d.id >= %s AND d.id < %s
+        )
+        UPDATE {tabla}
+        SET {', '.join(asignaciones)}
+        FROM nuevos n
+        WHERE {tabla}.id = n.id AND {tabla}.id >= %s AND {tabla}.id < %s
+          AND ({' OR '.join(cambios)})
+    """
+
+
+def actualizar_referencias(id_desde, id_hasta):
+    """
+    Resuelve los campos ``*_ref`` de las filas con ``id_desde <= id < id_hasta``.
+    Solo escribe las filas cuyo valor cambia y retorna cuántas fueron.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sentencia_actualizacion(), [id_desde, id_hasta, id_desde, id_hasta])
+        filas = cursor.rowcount
+    if filas:
+        notificar_datos_disposicion()
+    return filas
@@ -0,0 +1,85 @@
+"""
+Conversión de las columnas de un archivo de carga a los campos del modelo destino.
+
+Cada columna se asigna a uno o más campos según ``columnas_modelo`` del esquema y se
+convierte por columna completa con las mismas transformaciones que usa la validación:
+la del campo de ``validation`` cuando existe y, en otro caso, la implícita del tipo del
+campo del modelo.
+"""
+import pandas as pd
+
+from ingesta.validators.transforms import compilar_transformacion
+
+# Tipo de ``validation`` equivalente a cada tipo de campo de Django
+TIPO_POR_CAMPO = {
+    'DateField': 'date',
+    'TimeField': 'time',
+    'DecimalField': 'decimal',
+    'IntegerField': 'integer',
+    'BigIntegerField': 'integer',
+    'SmallIntegerField': 'integer',
+    'PositiveIntegerField': 'integer',
+    'PositiveSmallIntegerField': 'integer',
+}
+
+# Fecha base para dar formato a las horas (``timedelta`` desde la medianoche)
+_MEDIANOCHE = pd.Timestamp('1970-01-01')
+
+
+def tipo_campo(modelo, model_field):
+    return TIPO_POR_CAMPO.get(modelo._meta.get_field(model_field).get_internal_type())
+
+
+def compilar_conversiones(esquema, modelo):
+    """
+    Retorna una lista de (columna, campo, función) con la conversión de cada columna del
+    archivo a cada campo del modelo en que se carga.
+    """
+    transformaciones_validacion = {(campo.field, campo.db_field): campo.transformar for campo in esquema.validacion}
+    conversiones = []
+    for column_name, model_fields in esquema.columnas_modelo.items():
+        for model_field in model_fields:
+            funcion = transformaciones_validacion.get((column_name, model_field))
+            if funcion is None:
+                funcion = compilar_transformacion({'type': tipo_campo(modelo, model_field)})
+            conversiones.append((column_name, model_field, funcion))
+    return conversiones
+
+
+def _texto(serie):
+    presentes = serie.notna()
+    resultado = pd.Series(None, index=serie.index, dtype=object)
+    resultado[presentes] = serie[presentes].astype(str).str.strip()
+    return resultado.where(resultado != '')
+
+
+def convertir_bloque(bloque, modelo, conversiones):
+    """
+    Convierte un bloque de filas del archivo en un DataFrame con una columna por campo
+    del modelo, con valores tipados (fechas, horas, decimales y enteros) o texto.
+    """
+    datos = {}
+    for column_name, model_field, funcion in conversiones:
+        serie = funcion(bloque[column_name])
+        if tipo_campo(modelo, model_field) is None:
+            serie = _texto(serie)
+        datos[model_field] = serie.values
+    return pd.DataFrame(datos, index=bloque.index)
+
+
+def formatear_para_copy(df, modelo):
+    """
+    Da a cada columna el formato de texto que espera ``COPY`` según el tipo del campo:
+    fechas ``yyyy-MM-dd``, horas ``HH:MM:SS`` y decimales redondeados a los decimales del campo.
+    """
+    resultado = df.copy()
+    for columna in df.columns:
+        campo = modelo._meta.get_field(columna)
+        tipo = TIPO_POR_CAMPO.get(campo.get_internal_type())
+        if tipo == 'date':
+            resultado[columna] = df[columna].dt.strftime('%Y-%m-%d')
+        elif tipo == 'time':
+            resultado[columna] = (_MEDIANOCHE + df[columna]).dt.strftime('%H:%M:%S')
+        elif tipo == 'decimal':
+            resultado[columna] = df[columna].round(campo.decimal_places)
+    return resultado
@@ -0,0 +1,296 @@
+"""
+Carga de archivos validados de disposición final en ``ingesta_disposicionfinal``.
+
+El archivo de un ``RegistroCarga`` en estado EN_MINIO se descarga de MinIO, se lee en
+bloques, cada bloque se convierte a los campos del modelo según el esquema del proceso
+y se envía a PostgreSQL con ``COPY FROM STDIN``, directo a la tabla (modo ``copy``) o
+a una tabla intermedia que se combina por la clave única (modo ``upsert``). Toda la carga
+ocurre en una sola transacción, junto con el recálculo de ``DisposicionFinalMensual`` para
+los meses cargados: si algo falla no queda ninguna fila y el registro pasa a ERROR.
+"""
+import os
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from coreview.minio_utils import get_minio_bucket, get_minio_client
+from globalfunctions.db_copy import copiar_dataframe
+from globalfunctions.string_manager import get_string
+from ingesta.jobs.validacion import directorio_temporal
+from ingesta.models import DisposicionFinal, RegistroCarga
+from ingesta.models.disposicion.derivados import calcular_derivados
+from ingesta.schemas import registro_esquemas
+from ingesta.schemas.esquema import MODOS_CARGA
+from ingesta.signals import notificar_datos_disposicion
+from ingesta.validators.file_readers import LectorBloquesXlsx
+
+from .catalogos import mapas_catalogos, resolver_catalogos
+from .columnas import compilar_conversiones, convertir_bloque, formatear_para_copy
+from .mensual import periodos_de_carga, recalcular_mensual
+from .particiones import COLUMNA_PARTICION, limites_mes, reemplazar_mes
+from .vista_detallada import refrescar_despues_de_cambios
+from .upsert import COLUMNA_ORDEN, ResultadoCarga, TablaIntermedia, columnas_clave
+
+
+class ErrorCarga(Exception):
+    """
+    Error que impide cargar el archivo de un registro.
+    """
+
+
+class _CargaConcurrente(ErrorCarga):
+    """
+    Otro proceso está cargando el registro o ya lo cargó (por ejemplo, porque lo volvió a
+    reclamar tras vencer su tiempo máximo); el registro queda como lo dejó ese proceso.
+    """
+
+
+def _bloques_archivo(path, esquema, tamano_bloque):
+    """
+    Lee el archivo en bloques de filas, verificando las cabeceras contra el esquema.
+    """
+    if esquema.file_type == 'xlsx':
+        with open(path, 'rb') as archivo, LectorBloquesXlsx(
+            archivo, tamano_bloque=tamano_bloque, **esquema.parametros_lectura
+        ) as lector:
+            if tuple(lector.encabezados) != esquema.header:
+                raise ErrorCarga(get_string('errors.load_headers_mismatch', 'ingesta'))
+            for bloque in lector.bloques():
+                yield bloque.dropna(how='all')
+    else:
+        for bloque in pd.read_csv(path, chunksize=tamano_bloque, **esquema.parametros_lectura):
+            if tuple(bloque.columns) != esquema.header:
+                raise ErrorCarga(get_string('errors.load_headers_mismatch', 'ingesta'))
+            yield bloque
+
+
+def descargar_archivo(registro, minio_client=None, bucket=None):
+    """
+    Descarga el archivo de un registro desde MinIO al directorio temporal y retorna la ruta.
+    """
+    minio_client = minio_client or get_minio_client()
+    bucket = bucket or get_minio_bucket()
+    if not minio_client:
+        raise ErrorCarga(get_string('errors.minio_not_configured', 'ingesta'))
+    path = os.path.join(directorio_temporal(), f"{uuid.uuid4().hex}_{os.path.basename(registro.path_minio)}")
+    minio_client.fget_object(bucket, registro.path_minio, path)
+    return path
+
+
+def _filas_copy(bloque, modelo, conversiones, catalogos, registro, marca_tiempo, periodo=None):
+    """
+    Convierte un bloque del archivo de ``registro`` en las filas que se envían con COPY.
+    Con ``periodo`` (año, mes) solo quedan las filas de ese mes.
+    """
+    df = calcular_derivados(convertir_bloque(bloque, modelo, conversiones))
+    if periodo is not None:
+        inicio, fin = limites_mes(*periodo)
+        fechas = df[COLUMNA_PARTICION]
+        df = df[(fechas >= pd.Timestamp(inicio)) & (fechas < pd.Timestamp(fin))]
+    df = resolver_catalogos(formatear_para_copy(df, modelo), catalogos)
+    df['registro_carga_id'] = registro.id
+    df['tipo_proceso'] = registro.tipo_proceso
+    df['fecha_creacion'] = marca_tiempo
+    df['fecha_actualizacion'] = marca_tiempo
+    return df
+
+
+def cargar_disposicion_final(registro, minio_client=None, bucket=None, modo=None):
+    """
+    Carga en ``DisposicionFinal`` el archivo validado de un registro en estado EN_MINIO.
+    Las filas quedan enlazadas al registro, que pasa a COMPLETADO. Si la carga falla no
+    se inserta ninguna fila, el registro pasa a ERROR (una recarga fallida lo deja en
+    COMPLETADO, solo con el mensaje) y se lanza ``ErrorCarga``. Si otro proceso lo está
+    cargando o ya lo cargó, se lanza ``ErrorCarga`` sin modificar el registro.
+
+    ``modo`` (por defecto el ``modo_carga`` del esquema) es ``copy`` para insertar todas
+    las filas o ``upsert`` para insertar o actualizar por la clave única; en modo upsert
+    también se puede recargar un registro COMPLETADO. Retorna un ``ResultadoCarga`` con
+    las filas insertadas, actualizadas y sin cambios, que también se guardan en el registro.
+    """
+    esquema = registro_esquemas.obtener(registro.tipo_proceso, registro.subsecretaria_origen)
+    if esquema is None or esquema.modelo is not DisposicionFinal:
+        raise ErrorCarga(get_string('errors.no_process_structure', 'ingesta').format(process_type=registro.tipo_proceso))
+
+    modo = modo or esquema.modo_carga
+    if modo not in MODOS_CARGA:
+        raise ErrorCarga(get_string('errors.schema_load_mode', 'ingesta').format(
+            value=modo, modes=', '.join(MODOS_CARGA)
+        ))
+
+    estados_cargables = ('EN_MINIO', 'COMPLETADO') if modo == 'upsert' else ('EN_MINIO',)
+    if registro.estado not in estados_cargables or not registro.path_minio:
+        raise ErrorCarga(get_string('errors.load_invalid_state', 'ingesta').format(
+            id=registro.id, estado=registro.get_estado_display()
+        ))
+
+    estado_inicial = registro.estado
+    modelo = DisposicionFinal
+    conversiones = compilar_conversiones(esquema, modelo)
+    tamano_bloque = settings.INGESTA_TAMANO_BLOQUE_FILAS
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    path = None
+    try:
+        inicio = time.perf_counter()
+        path = descargar_archivo(registro, minio_client, bucket)
+        marca_tiempo = int(datetime.now().timestamp())
+        catalogos = mapas_catalogos()
+        resultado = ResultadoCarga()
+        with transaction.atomic(), connection.cursor() as cursor:
+            # El bloqueo del registro dura toda la carga: otro proceso que lo haya reclamado
+            # no lo encuentra, o lo encuentra ya en otro estado al terminar esta
+            actual = (
+                RegistroCarga.objects.select_for_update(no_key=True, skip_locked=True)
+                .filter(pk=registro.pk).only('estado').first()
+            )
+            if actual is None:
+                raise _CargaConcurrente(get_string('errors.load_in_progress', 'ingesta').format(id=registro.id))
+            if actual.estado != estado_inicial:
+                raise _CargaConcurrente(get_string('errors.load_invalid_state', 'ingesta').format(
+                    id=registro.id, estado=actual.get_estado_display()
+                ))
+            intermedia = TablaIntermedia(cursor, modelo) if modo == 'upsert' else None
+            for bloque in _bloques_archivo(path, esquema, tamano_bloque):
+                df = _filas_copy(bloque, modelo, conversiones, catalogos, registro, marca_tiempo)
+                if intermedia:
+                    resultado.sumar(intermedia.combinar(df))
+                else:
+                    resultado.insertadas += copiar_dataframe(cursor, tabla, df)
+            if intermedia:
+                intermedia.eliminar()
+
+            # Resumen mensual del tablero: solo los meses que tocó esta carga
+            recalcular_mensual(periodos_de_carga(registro.id))
+            notificar_datos_disposicion()
+
+            registro.estado = 'COMPLETADO'
+            registro.mensaje_error = None
+            registro.filas_insertadas = resultado.insertadas
+            registro.filas_actualizadas = resultado.actualizadas
+            registro.filas_sin_cambios = resultado.sin_cambios
+            registro.registrar_etapa('carga', time.perf_counter() - inicio)
+            registro.save(update_fields=[
+                'estado', 'mensaje_error', 'filas_insertadas', 'filas_actualizadas', 'filas_sin_cambios',
+                'duracion_carga', 'fecha_cargado'
+            ])
+        # Fuera de la transacción: la vista debe ver las filas ya confirmadas
+        if resultado.insertadas or resultado.actualizadas:
+            refrescar_despues_de_cambios()
+        if modo == 'upsert':
+            print(get_string('messages.load_upsert_success', 'ingesta').format(
+                id=registro.id,
+                inserted=resultado.insertadas,
+                updated=resultado.actualizadas,
+                unchanged=resultado.sin_cambios
+            ))
+        else:
+            print(get_string('messages.load_success', 'ingesta').format(rows=resultado.insertadas, id=registro.id))
+        return resultado
+    except _CargaConcurrente:
+        raise
+    except Exception as error:
+        mensaje = str(error) if isinstance(error, ErrorCarga) else get_string('errors.load_error', 'ingesta').format(error=error)
+        if estado_inicial == 'COMPLETADO':
+            # La recarga se revirtió y las filas de la carga anterior siguen intactas
+            registro.refresh_from_db()
+            registro.mensaje_error = mensaje
+            registro.save(update_fields=['mensaje_error'])
+        else:
+            registro.marcar_como_error(mensaje)
+        if isinstance(error, ErrorCarga):
+            raise
+        raise ErrorCarga(mensaje) from error
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def recargar_mes(year, month, minio_client=None, bucket=None):
+    """
+    Vuelve a cargar un mes completo de la tabla particionada desde los archivos en MinIO
+    de las cargas COMPLETADO que lo alimentaron. Las filas se copian en una tabla nueva que
+    reemplaza a la partición del mes (``reemplazar_mes``), sin borrar fila por fila; las
+    filas del mes de cada archivo reciben ids nuevos. Si varias cargas traen la misma clave
+    única (una corrección cargada en modo upsert), queda la fila de la carga más reciente,
+    como después del upsert. Falla sin cambiar nada si alguna fila del mes no viene de una
+    de esas cargas (por ejemplo, filas cargadas sin registro).
+    Retorna la cantidad de filas cargadas.
+    """
+    inicio, fin = limites_mes(year, month)
+    modelo = DisposicionFinal
+    quote = connection.ops.quote_name
+    tabla = quote(modelo._meta.db_table)
+    marca_tiempo = int(datetime.now().timestamp())
+    total = 0
+
+    def llenar(cursor, nueva):
+        nonlocal total
+        cursor.execute(
+            f"""
+            SELECT DISTINCT registro_carga_id FROM {tabla}
+            WHERE {COLUMNA_PARTICION} >= %s AND {COLUMNA_PARTICION} < %s
+            """,
+            [inicio, fin]
+        )
+        ids = {fila[0] for fila in cursor.fetchall()}
+        registros = list(
+            RegistroCarga.objects
+            .filter(pk__in=ids - {None}, estado='COMPLETADO', path_minio__isnull=False)
+            .order_by('fecha_hora_carga')
+        )
+        if None in ids or len(registros) < len(ids):
+            raise ErrorCarga(get_string('errors.month_reload_unavailable', 'ingesta').format(
+                period=f'{year:04d}-{month:02d}'
+            ))
+
+        # Las filas de todos los archivos pasan por una tabla temporal con su orden de
+        # carga, y a la partición nueva solo llega la última fila de cada clave
+        intermedia = quote(f'stg_{modelo._meta.db_table}_{uuid.uuid4().hex[:12]}')
+        cursor.execute(f'CREATE TEMPORARY TABLE {intermedia} ON COMMIT DROP AS SELECT * FROM {nueva} WITH NO DATA')
+        cursor.execute(f'ALTER TABLE {intermedia} ADD COLUMN {quote(COLUMNA_ORDEN)} bigint')
+        orden = 0
+        catalogos = mapas_catalogos()
+        for registro in registros:
+            esquema = registro_esquemas.obtener(registro.tipo_proceso, registro.subsecretaria_origen)
+            if esquema is None or esquema.modelo is not modelo:
+                raise ErrorCarga(get_string('errors.no_process_structure', 'ingesta').format(
+                    process_type=registro.tipo_proceso
+                ))
+            conversiones = compilar_conversiones(esquema, modelo)
+            path = descargar_archivo(registro, minio_client, bucket)
+            try:
+                for bloque in _bloques_archivo(path, esquema, settings.INGESTA_TAMANO_BLOQUE_FILAS):
+                    df = _filas_copy(bloque, modelo, conversiones, catalogos, registro, marca_tiempo, (year, month))
+                    df[COLUMNA_ORDEN] = range(orden, orden + len(df))
+                    orden += copiar_dataframe(cursor, intermedia, df)
+            finally:
+                os.remove(path)
+
+        columnas = ', '.join(quote(campo.column) for campo in modelo._meta.concrete_fields if not campo.primary_key)
+        clave = ', '.join(quote(columna) for columna in columnas_clave(modelo))
+        # Las filas con alguna parte de la clave en NULL no chocan en el índice único, así
+        # que se conservan todas
+        completa = ' AND '.join(f'{quote(columna)} IS NOT NULL' for columna in columnas_clave(modelo))
+        cursor.execute(
+            f"""
+            INSERT INTO {nueva} ({columnas})
+            SELECT {columnas} FROM (
+                SELECT DISTINCT ON ({clave}) * FROM {intermedia}
+                WHERE {completa}
+                ORDER BY {clave}, {quote(COLUMNA_ORDEN)} DESC
+            ) ultimas
+            UNION ALL
+            SELECT {columnas} FROM {intermedia} WHERE NOT ({completa})
+            """
+        )
+        total = cursor.rowcount
+        cursor.execute(f'DROP TABLE {intermedia}')
+
+    reemplazar_mes(year, month, llenar)
+    recalcular_mensual({(year, month)})
+    refrescar_despues_de_cambios()
+    return total
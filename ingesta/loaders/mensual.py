@@ -0,0 +1,112 @@
+"""
+Mantenimiento incremental de ``DisposicionFinalMensual``.
+
+Después de cada carga solo se recalculan los periodos (año, mes) que tocó, con una sola
+sentencia que agrega ``DisposicionFinal`` por la clave de ``unique_together`` del modelo
+mensual, inserta o actualiza los grupos con ``ON CONFLICT`` y borra los grupos del
+periodo que ya no existen.
+"""
+from datetime import datetime
+
+from django.db import connection, transaction
+
+from ingesta.models import DisposicionFinal, DisposicionFinalMensual
+
+# Clave del candado de sesión que serializa los recálculos (los de cargas concurrentes
+# deben ver las filas ya confirmadas de la otra carga)
+CANDADO_MENSUAL = 7301001
+
+# Columnas de agrupación además de year y month, tomadas de la clave única del modelo
+COLUMNAS_GRUPO = [
+    DisposicionFinalMensual._meta.get_field(nombre).column
+    for nombre in DisposicionFinalMensual._meta.unique_together[0]
+    if nombre not in ('year', 'month')
+]
+
+
+def _sentencia_recalculo():
+    quote = connection.ops.quote_name
+    fuente = quote(DisposicionFinal._meta.db_table)
+    mensual = quote(DisposicionFinalMensual._meta.db_table)
+    grupo = [quote(columna) for columna in COLUMNAS_GRUPO]
+    clave = ', '.join([quote('year'), quote('month')] + grupo)
+    seleccion = ', '.join(f'd.{columna}' for columna in grupo)
+    coincide = ' AND '.join(f'a.{columna} = m.{columna}' for columna in [quote('year'), quote('month')] + grupo)
+
+    # Los grupos con alguna columna en NULL nunca coinciden (ni en ON CONFLICT ni en el
+    # NOT EXISTS), así que se borran y se vuelven a insertar en cada recálculo
+    return f"""
+        WITH periodos AS (
+            SELECT DISTINCT p.year, p.month, make_date(p.year, p.month, 1) AS inicio
+            FROM unnest(%s::int[], %s::int[]) AS p(year, month)
+        ),
+        agregado AS (
+            SELECT p.year, p.month, {seleccion}, SUM(d.peso_residuos) AS peso_residuos
+            FROM periodos p
+            JOIN {fuente} d
+              ON d.fecha_entrada >= p.inicio
+             AND d.fecha_entrada < p.inicio + INTERVAL '1 month'
+            GROUP BY p.year, p.month, {seleccion}
+        ),
+        obsoletas AS (
+            DELETE FROM {mensual} m
+            USING periodos p
+            WHERE m.year = p.year AND m.month = p.month
+              AND NOT EXISTS (SELECT 1 FROM agregado a WHERE {coincide})
+            RETURNING 1
+        )
+        INSERT INTO {mensual} ({clave}, peso_residuos, fecha_creacion, fecha_actualizacion)
+        SELECT {clave}, peso_residuos, %s, %s
+        FROM agregado
+        ON CONFLICT ({clave}) DO UPDATE
+            SET peso_residuos = EXCLUDED.peso_residuos,
+                fecha_actualizacion = EXCLUDED.fecha_actualizacion
+            WHERE {mensual}.peso_residuos IS DISTINCT FROM EXCLUDED.peso_residuos
+    """
+
+
+def periodos_de_carga(registro_id):
+    """
+    Periodos (año, mes) de las filas de ``DisposicionFinal`` enlazadas a un registro de carga.
+    """
+    filas = (
+        DisposicionFinal.objects
+        .filter(registro_carga_id=registro_id, fecha_entrada__isnull=False)
+        .values_list('fecha_entrada__year', 'fecha_entrada__month')
+        .distinct()
+    )
+    return set(filas)
+
+
+def todos_los_periodos():
+    """
+    Periodos con filas en ``DisposicionFinal`` o en ``DisposicionFinalMensual``.
+    """
+    periodos = set(
+        DisposicionFinal.objects
+        .filter(fecha_entrada__isnull=False)
+        .values_list('fecha_entrada__year', 'fecha_entrada__month')
+        .distinct()
+    )
+    periodos.update(DisposicionFinalMensual.objects.values_list('year', 'month').distinct())
+    return periodos
+
+
+def recalcular_mensual(periodos):
+    """
+    Recalcula en ``DisposicionFinalMensual`` los periodos (año, mes) indicados a partir de
+    ``DisposicionFinal``. Se debe llamar después de cualquier carga o borrado de filas, con
+    los periodos que tocó (para un borrado, calculados antes de borrar).
+    """
+    periodos = sorted(periodos)
+    if not periodos:
+        return
+    marca_tiempo = int(datetime.now().timestamp())
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CANDADO_MENSUAL])
+        cursor.execute(_sentencia_recalculo(), [
+            [year for year, _ in periodos],
+            [month for _, month in periodos],
+            marca_tiempo,
+            marca_tiempo,
+        ])
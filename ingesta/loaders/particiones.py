@@ -0,0 +1,389 @@
+"""
+Particionamiento opcional de ``ingesta_disposicionfinal`` por mes de ``fecha_entrada``.
+
+Con la tabla particionada por rango, las consultas que filtran por rangos de fechas solo
+leen las particiones de esos meses, y recargar o eliminar un mes completo es un
+``TRUNCATE`` o un intercambio de partición en lugar de borrar fila por fila.
+
+El paso desde la tabla actual (``migrar_a_particionada``) es explícito, mediante el
+comando ``particionar_disposicion_final``. En PostgreSQL las restricciones únicas de una
+tabla particionada deben incluir la columna de partición, así que la llave primaria
+``(id)`` se reemplaza por una restricción única ``(id, fecha_entrada)``; ``id`` sigue
+saliendo de una secuencia y Django lo sigue usando como llave.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from globalfunctions.string_manager import get_string
+from ingesta.models import DisposicionFinal, RegistroCarga
+from ingesta.signals import notificar_datos_disposicion
+
+TABLA = DisposicionFinal._meta.db_table
+COLUMNA_PARTICION = 'fecha_entrada'
+PARTICION_DEFECTO = f'{TABLA}_pdefecto'
+
+
+class ErrorParticion(Exception):
+    """
+    Error que impide particionar la tabla o modificar una partición.
+    """
+
+
+def _q(nombre):
+    return connection.ops.quote_name(nombre)
+
+
+def limites_mes(year, month):
+    inicio = date(year, month, 1)
+    fin = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return inicio, fin
+
+
+def nombre_particion(year, month):
+    return f'{TABLA}_p{year:04d}_{month:02d}'
+
+
+def esta_particionada(cursor=None):
+    """
+    Indica si ``ingesta_disposicionfinal`` es una tabla particionada.
+    """
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return esta_particionada(cursor)
+    cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLA])
+    return cursor.fetchone() is not None
+
+
+def particiones(cursor):
+    """
+    Nombres de las particiones adjuntas a la tabla.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+        """,
+        [TABLA]
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def _adjuntar(cursor, nombre, year, month):
+    inicio, fin = limites_mes(year, month)
+    cursor.execute(
+        f'ALTER TABLE {_q(TABLA)} ATTACH PARTITION {_q(nombre)} FOR VALUES FROM (%s) TO (%s)',
+        [inicio, fin]
+    )
+
+
+def _tabla_para_mes(cursor, nombre, year, month):
+    """
+    Crea una tabla suelta con la estructura de la tabla principal y una restricción con
+    el rango del mes, que evita revisar sus filas al adjuntarla como partición.
+    """
+    inicio, fin = limites_mes(year, month)
+    cursor.execute(f'CREATE TABLE {_q(nombre)} (LIKE {_q(TABLA)} INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'ALTER TABLE {_q(nombre)} ADD CONSTRAINT {_q(nombre + "_rango")} '
+        f'CHECK ({COLUMNA_PARTICION} IS NOT NULL AND {COLUMNA_PARTICION} >= %s AND {COLUMNA_PARTICION} < %s)',
+        [inicio, fin]
+    )
+
+
+def _estructura_del_padre(cursor, tabla):
+    """
+    Crea en ``tabla`` (aún sin adjuntar) los índices, restricciones únicas y llaves
+    foráneas de la tabla principal, con nombres ``<tabla>_<n>``. Al adjuntarla,
+    ``ATTACH PARTITION`` enlaza los que encuentra en lugar de crearlos y validarlos con
+    la tabla principal bloqueada. Retorna ``(es_restriccion, nombre)`` de cada uno, para
+    renombrarlos con la tabla.
+    """
+    cursor.execute(
+        """
+        SELECT c.contype, pg_get_constraintdef(c.oid), pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid AND c.conrelid = i.indrelid
+        WHERE i.indrelid = to_regclass(%s)
+        UNION ALL
+        SELECT contype, pg_get_constraintdef(oid), NULL
+        FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        """,
+        [TABLA, TABLA]
+    )
+    creados = []
+    for numero, (tipo, restriccion, indice) in enumerate(cursor.fetchall(), start=1):
+        nombre = f'{tabla}_{numero}'
+        if tipo:
+            cursor.execute(f'ALTER TABLE {_q(tabla)} ADD CONSTRAINT {_q(nombre)} {restriccion}')
+        else:
+            indice = re.sub(
+                r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ',
+                lambda coincidencia: f'CREATE {coincidencia.group(1) or ""}INDEX {_q(nombre)} ON {_q(tabla)} ',
+                indice
+            )
+            cursor.execute(indice)
+        creados.append((bool(tipo), nombre))
+    return creados
+
+
+def crear_particion(cursor, year, month):
+    """
+    Crea y adjunta la partición de un mes si no existe. Las filas de ese mes que estén en
+    la partición por defecto se mueven a la nueva antes de adjuntarla.
+    Retorna True si la partición se creó.
+    """
+    nombre = nombre_particion(year, month)
+    if nombre in particiones(cursor):
+        return False
+
+    _tabla_para_mes(cursor, nombre, year, month)
+    if PARTICION_DEFECTO in particiones(cursor):
+        inicio, fin = limites_mes(year, month)
+        cursor.execute(
+            f"""
+            WITH movidas AS (
+                DELETE FROM {_q(PARTICION_DEFECTO)}
+                WHERE {COLUMNA_PARTICION} >= %s AND {COLUMNA_PARTICION} < %s
+                RETURNING *
+            )
+            INSERT INTO {_q(nombre)} SELECT * FROM movidas
+            """,
+            [inicio, fin]
+        )
+    _adjuntar(cursor, nombre, year, month)
+    return True
+
+
+def asegurar_particiones(periodos):
+    """
+    Crea las particiones que falten para los periodos (año, mes) indicados.
+    Retorna los nombres de las particiones creadas.
+    """
+    creadas = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not esta_particionada(cursor):
+            raise ErrorParticion(f'{TABLA} no está particionada')
+        for year, month in sorted(set(periodos)):
+            if crear_particion(cursor, year, month):
+                creadas.append(nombre_particion(year, month))
+    return creadas
+
+
+def periodos_en_defecto():
+    """
+    Periodos (año, mes) con filas en la partición por defecto, que deberían tener la suya.
+    """
+    with connection.cursor() as cursor:
+        if PARTICION_DEFECTO not in particiones(cursor):
+            return set()
+        cursor.execute(
+            f"""
+            SELECT DISTINCT EXTRACT(YEAR FROM {COLUMNA_PARTICION})::int, EXTRACT(MONTH FROM {COLUMNA_PARTICION})::int
+            FROM {_q(PARTICION_DEFECTO)}
+            WHERE {COLUMNA_PARTICION} IS NOT NULL
+            """
+        )
+        return set(cursor.fetchall())
+
+
+def truncar_mes(year, month):
+    """
+    Elimina todas las filas de un mes vaciando su partición. Las cargas que tenían filas
+    en el mes pasan a ERROR (sus datos ya no están completos, y así el mismo archivo se
+    puede volver a subir). Retorna los ids de esas cargas, o None si el mes no tiene
+    partición propia (sus filas, si las hay, se deben borrar con DELETE).
+    """
+    nombre = nombre_particion(year, month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if nombre not in particiones(cursor):
+            return None
+        cursor.execute(f'LOCK TABLE {_q(nombre)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT DISTINCT registro_carga_id FROM {_q(nombre)} WHERE registro_carga_id IS NOT NULL')
+        registros = {fila[0] for fila in cursor.fetchall()}
+        cursor.execute(f'TRUNCATE {_q(nombre)}')
+        RegistroCarga.objects.filter(pk__in=registros).update(
+            estado='ERROR',
+            mensaje_error=get_string('messages.month_truncated', 'ingesta').format(period=f'{year:04d}-{month:02d}')
+        )
+        notificar_datos_disposicion()
+    return registros
+
+
+def reemplazar_mes(year, month, llenar):
+    """
+    Recarga un mes completo sin borrar fila por fila: ``llenar(cursor, tabla)`` copia las
+    filas nuevas en una tabla aparte (``tabla`` ya va citada), se le crean los índices y
+    llaves de la tabla principal y, en la misma transacción, esa tabla reemplaza a la
+    partición actual del mes. Mientras se llena y se indexa, las lecturas siguen viendo el
+    mes anterior y las escrituras en el mes esperan. El intercambio (``DETACH`` y
+    ``ATTACH``) bloquea toda la tabla principal hasta el final de la transacción, pero
+    solo cambia el catálogo. Si el mes estaba en la partición por defecto, además se
+    borran allí sus filas y ``ATTACH`` revisa esa partición con el bloqueo tomado.
+    """
+    nombre = nombre_particion(year, month)
+    nueva = f'{nombre}_nueva'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not esta_particionada(cursor):
+            raise ErrorParticion(f'{TABLA} no está particionada')
+        actual = nombre if nombre in particiones(cursor) else PARTICION_DEFECTO
+        if actual in particiones(cursor):
+            # Ninguna fila del mes puede cambiar entre la lectura de ``llenar`` y el reemplazo
+            cursor.execute(f'LOCK TABLE {_q(actual)} IN SHARE MODE')
+        _tabla_para_mes(cursor, nueva, year, month)
+        llenar(cursor, _q(nueva))
+        estructura = _estructura_del_padre(cursor, nueva)
+
+        if nombre in particiones(cursor):
+            cursor.execute(f'ALTER TABLE {_q(TABLA)} DETACH PARTITION {_q(nombre)}')
+            cursor.execute(f'DROP TABLE {_q(nombre)}')
+        elif PARTICION_DEFECTO in particiones(cursor):
+            # Las filas del mes que estaban en la partición por defecto quedan reemplazadas
+            inicio, fin = limites_mes(year, month)
+            cursor.execute(
+                f'DELETE FROM {_q(PARTICION_DEFECTO)} WHERE {COLUMNA_PARTICION} >= %s AND {COLUMNA_PARTICION} < %s',
+                [inicio, fin]
+            )
+        cursor.execute(f'ALTER TABLE {_q(nueva)} RENAME TO {_q(nombre)}')
+        cursor.execute(f'ALTER TABLE {_q(nombre)} RENAME CONSTRAINT {_q(nueva + "_rango")} TO {_q(nombre + "_rango")}')
+        for es_restriccion, anterior in estructura:
+            definitivo = _q(nombre + anterior[len(nueva):])
+            if es_restriccion:
+                cursor.execute(f'ALTER TABLE {_q(nombre)} RENAME CONSTRAINT {_q(anterior)} TO {definitivo}')
+            else:
+                cursor.execute(f'ALTER INDEX {_q(anterior)} RENAME TO {definitivo}')
+        _adjuntar(cursor, nombre, year, month)
+        notificar_datos_disposicion()
+
+
+def _vistas_dependientes(cursor):
+    """
+    Vistas y vistas materializadas que leen la tabla, con su definición y sus índices.
+    """
+    cursor.execute(
+        """
+        SELECT DISTINCT v.oid, v.relname, v.relkind, pg_get_viewdef(v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = to_regclass(%s) AND v.oid <> to_regclass(%s)
+        """,
+        [TABLA, TABLA]
+    )
+    vistas = []
+    for oid, nombre, tipo, definicion in cursor.fetchall():
+        cursor.execute('SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s', [oid])
+        vistas.append((nombre, tipo, definicion, [fila[0] for fila in cursor.fetchall()]))
+    return vistas
+
+
+def migrar_a_particionada(meses_adelante=3):
+    """
+    Convierte ``ingesta_disposicionfinal`` en una tabla particionada por mes, en una sola
+    transacción: crea la tabla nueva con una partición por cada mes con datos (más
+    ``meses_adelante`` meses futuros) y una partición por defecto para fechas nulas o sin
+    partición, copia las filas, elimina la tabla anterior y vuelve a crear índices,
+    restricciones, disparadores y vistas dependientes. Retorna la cantidad de particiones creadas.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if esta_particionada(cursor):
+            raise ErrorParticion(f'{TABLA} ya está particionada')
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [TABLA]
+        )
+        referencias = [fila[0] for fila in cursor.fetchall()]
+        if referencias:
+            raise ErrorParticion(
+                f"Las tablas {', '.join(referencias)} tienen llaves foráneas hacia {TABLA}; "
+                'una tabla particionada no puede tener una llave única solo sobre id'
+            )
+
+        cursor.execute(f'LOCK TABLE {_q(TABLA)} IN ACCESS EXCLUSIVE MODE')
+
+        # Índices y restricciones de la tabla actual, para recrearlos en la nueva
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f', 'c')
+            """,
+            [TABLA]
+        )
+        restricciones = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = to_regclass(%s)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            """,
+            [TABLA]
+        )
+        indices = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute(
+            'SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal',
+            [TABLA]
+        )
+        disparadores = [fila[0] for fila in cursor.fetchall()]
+        vistas = _vistas_dependientes(cursor)
+        for nombre, tipo, _, _ in vistas:
+            clase = 'MATERIALIZED VIEW' if tipo == 'm' else 'VIEW'
+            cursor.execute(f'DROP {clase} {_q(nombre)}')
+
+        cursor.execute(
+            f"""
+            SELECT DISTINCT EXTRACT(YEAR FROM {COLUMNA_PARTICION})::int, EXTRACT(MONTH FROM {COLUMNA_PARTICION})::int
+            FROM {_q(TABLA)} WHERE {COLUMNA_PARTICION} IS NOT NULL
+            """
+        )
+        periodos = set(cursor.fetchall())
+        hoy = date.today()
+        for adelante in range(meses_adelante + 1):
+            indice = hoy.month - 1 + adelante
+            periodos.add((hoy.year + indice // 12, indice % 12 + 1))
+
+        anterior = f'{TABLA}_sin_particionar'
+        cursor.execute(f'ALTER TABLE {_q(TABLA)} RENAME TO {_q(anterior)}')
+        cursor.execute(
+            f'CREATE TABLE {_q(TABLA)} (LIKE {_q(anterior)} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ({COLUMNA_PARTICION})'
+        )
+        for year, month in sorted(periodos):
+            inicio, fin = limites_mes(year, month)
+            cursor.execute(
+                f'CREATE TABLE {_q(nombre_particion(year, month))} PARTITION OF {_q(TABLA)} '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [inicio, fin]
+            )
+        cursor.execute(f'CREATE TABLE {_q(PARTICION_DEFECTO)} PARTITION OF {_q(TABLA)} DEFAULT')
+
+        # id deja de ser identidad (no se admite en tablas particionadas) y pasa a una secuencia propia
+        secuencia = f'{TABLA}_id_seq'
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {_q(anterior)}')
+        siguiente = cursor.fetchone()[0]
+        cursor.execute(f'INSERT INTO {_q(TABLA)} SELECT * FROM {_q(anterior)}')
+        cursor.execute(f'DROP TABLE {_q(anterior)}')
+        cursor.execute(f'CREATE SEQUENCE {_q(secuencia)} START WITH {int(siguiente)} OWNED BY {_q(TABLA)}.id')
+        cursor.execute(f"ALTER TABLE {_q(TABLA)} ALTER COLUMN id SET DEFAULT nextval('{secuencia}')")
+
+        for nombre, tipo, definicion in restricciones:
+            if tipo == 'p':
+                definicion = f'UNIQUE (id, {COLUMNA_PARTICION})'
+            cursor.execute(f'ALTER TABLE {_q(TABLA)} ADD CONSTRAINT {_q(nombre)} {definicion}')
+        for definicion in indices + disparadores:
+            cursor.execute(definicion)
+
+        for nombre, tipo, definicion, indices_vista in vistas:
+            clase = 'MATERIALIZED VIEW' if tipo == 'm' else 'VIEW'
+            cursor.execute(f'CREATE {clase} {_q(nombre)} AS {definicion}')
+            for indice in indices_vista:
+                cursor.execute(indice)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {_q(TABLA)}')
+    return len(periodos) + 1
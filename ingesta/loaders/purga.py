@@ -0,0 +1,163 @@
+"""
+Eliminación de una carga junto con los datos que produjo.
+
+``DisposicionFinal.registro_carga`` usa ``SET_NULL``, así que borrar solo el
+``RegistroCarga`` dejaría sus filas huérfanas en los reportes (y actualizaría cada una).
+``purgar_carga`` borra primero las filas en lotes de ``INGESTA_PURGA_TAMANO_LOTE``, cada
+lote en su propia transacción (o vacía la partición del mes cuando la tabla está
+particionada y el mes solo tiene filas de la carga), recalcula los periodos afectados de
+``DisposicionFinalMensual``, elimina los objetos de MinIO y al final el registro. Si se
+interrumpe, se puede volver a ejecutar y continúa con las filas que queden; si ya no
+quedaban filas, los meses afectados se corrigen con ``rebuild_mensual``.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from coreview.minio_utils import get_minio_bucket, get_minio_client
+from globalfunctions.string_manager import get_string
+from ingesta.models import DisposicionFinal, RegistroCarga
+from ingesta.signals import notificar_datos_disposicion
+from ingesta.validators.error_report import eliminar_reporte_errores
+
+from .mensual import periodos_de_carga, recalcular_mensual
+from .particiones import esta_particionada, nombre_particion, particiones, truncar_mes
+from .vista_detallada import refrescar_despues_de_cambios
+
+TABLA = DisposicionFinal._meta.db_table
+
+
+class ErrorPurga(Exception):
+    """
+    Error que impide eliminar una carga.
+    """
+
+
+def _q(nombre):
+    return connection.ops.quote_name(nombre)
+
+
+def _marcar_en_purga(registro_id):
+    """
+    Pasa el registro a PURGANDO mientras se eliminan sus datos: sale de las colas de
+    validación y de carga, y sigue contando como duplicado del mismo archivo. Falla si un
+    proceso lo está validando o cargando, porque al terminar guardaría de nuevo el registro.
+    """
+    with transaction.atomic():
+        registro = RegistroCarga.objects.select_for_update().get(pk=registro_id)
+        if registro.estado == 'VALIDANDO' or (registro.estado == 'RECIBIDO' and registro.reclamado_en is not None):
+            raise ErrorPurga(get_string('errors.purge_validation_running', 'ingesta').format(id=registro.id))
+        if registro.estado == 'EN_MINIO' and registro.reclamado_en is not None:
+            raise ErrorPurga(get_string('errors.purge_load_running', 'ingesta').format(id=registro.id))
+        registro.estado = 'PURGANDO'
+        registro.mensaje_error = get_string('messages.purge_progress', 'ingesta').format(deleted=0, total='?')
+        registro.save(update_fields=['estado', 'mensaje_error'])
+    return registro
+
+
+def _vaciar_particiones_exclusivas(registro_id, periodos):
+    """
+    Vacía con ``TRUNCATE`` las particiones mensuales que solo tienen filas de la carga.
+    Retorna la cantidad de filas eliminadas.
+    """
+    eliminadas = 0
+    with connection.cursor() as cursor:
+        existentes = set(particiones(cursor))
+    for year, month in sorted(periodos):
+        nombre = nombre_particion(year, month)
+        if nombre not in existentes:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            # El bloqueo evita que entren filas de otra carga entre la revisión y el TRUNCATE
+            cursor.execute(f'LOCK TABLE {_q(nombre)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {_q(nombre)} WHERE registro_carga_id IS DISTINCT FROM %s)',
+                [registro_id]
+            )
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'SELECT count(*) FROM {_q(nombre)}')
+            eliminadas += cursor.fetchone()[0]
+            cursor.execute(f'TRUNCATE {_q(nombre)}')
+    return eliminadas
+
+
+def _borrar_lote(registro_id, tamano_lote):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {_q(TABLA)}
+            WHERE registro_carga_id = %s AND id IN (
+                SELECT id FROM {_q(TABLA)} WHERE registro_carga_id = %s LIMIT %s
+            )
+            """,
+            [registro_id, registro_id, tamano_lote]
+        )
+        return cursor.rowcount
+
+
+def _eliminar_objetos(registro, minio_client, bucket):
+    for evidencia in registro.evidencias.all():
+        if evidencia.path_minio:
+            minio_client.remove_object(bucket, evidencia.path_minio)
+    if registro.path_minio:
+        minio_client.remove_object(bucket, registro.path_minio)
+    if registro.path_reporte_errores:
+        eliminar_reporte_errores(registro.path_reporte_errores)
+
+
+def purgar_carga(registro, minio_client=None, bucket=None, tamano_lote=None, progreso=None):
+    """
+    Elimina un registro de carga, sus filas en ``DisposicionFinal`` y sus archivos.
+    Si se indica ``progreso``, se llama como ``progreso(filas_eliminadas, total)`` después
+    de cada lote; el avance también queda en ``mensaje_error`` del registro.
+    Retorna la cantidad de filas eliminadas.
+    """
+    tamano_lote = tamano_lote or settings.INGESTA_PURGA_TAMANO_LOTE
+    minio_client = minio_client or get_minio_client()
+    bucket = bucket or get_minio_bucket()
+
+    registro = _marcar_en_purga(registro.pk)
+    # Los periodos se calculan antes de borrar: después ya no hay filas que los indiquen
+    periodos = periodos_de_carga(registro.id)
+    total = DisposicionFinal.objects.filter(registro_carga_id=registro.id).count()
+
+    def avance(eliminadas):
+        RegistroCarga.objects.filter(pk=registro.pk).update(
+            mensaje_error=get_string('messages.purge_progress', 'ingesta').format(deleted=eliminadas, total=total)
+        )
+        if progreso:
+            progreso(eliminadas, total)
+
+    eliminadas = 0
+    if periodos and esta_particionada():
+        eliminadas = _vaciar_particiones_exclusivas(registro.id, periodos)
+        if eliminadas:
+            avance(eliminadas)
+    while True:
+        filas = _borrar_lote(registro.id, tamano_lote)
+        if not filas:
+            break
+        eliminadas += filas
+        avance(eliminadas)
+
+    recalcular_mensual(periodos)
+    notificar_datos_disposicion()
+    refrescar_despues_de_cambios()
+    _eliminar_objetos(registro, minio_client, bucket)
+    registro.delete()
+    return eliminadas
+
+
+def vaciar_mes(year, month):
+    """
+    Elimina todas las filas de un mes de la tabla particionada con ``truncar_mes`` (que deja
+    en ERROR las cargas afectadas), recalcula el mes en ``DisposicionFinalMensual`` y
+    actualiza la vista detallada. Retorna los ids de las cargas afectadas, o None si el mes
+    no tiene partición propia.
+    """
+    registros = truncar_mes(year, month)
+    if registros is None:
+        return None
+    recalcular_mensual({(year, month)})
+    refrescar_despues_de_cambios()
+    return registros
@@ -0,0 +1,148 @@
+"""
+Carga idempotente por la clave única del modelo (``unique_together``).
+
+Cada bloque se copia con ``COPY`` a una tabla intermedia UNLOGGED y se combina con la
+tabla destino en una sola sentencia ``INSERT ... ON CONFLICT DO UPDATE``. Las filas cuya
+clave ya existe solo se actualizan si algún valor cambió, de modo que recargar el mismo
+archivo no modifica nada.
+"""
+import uuid
+from dataclasses import dataclass
+
+from django.db import connection
+
+from globalfunctions.db_copy import copiar_dataframe
+
+# Columnas de control que no cuentan como cambio de la fila
+COLUMNAS_CONTROL = ('registro_carga_id', 'tipo_proceso', 'fecha_creacion', 'fecha_actualizacion')
+
+# Columnas de control que sí se reemplazan cuando la fila cambia
+COLUMNAS_CONTROL_ACTUALIZABLES = ('registro_carga_id', 'fecha_actualizacion')
+
+# Columna de la tabla intermedia con el orden de las filas en el archivo
+COLUMNA_ORDEN = '_orden'
+
+
+@dataclass
+class ResultadoCarga:
+    """
+    Filas insertadas, actualizadas y sin cambios de una carga.
+    """
+    insertadas: int = 0
+    actualizadas: int = 0
+    sin_cambios: int = 0
+
+    @property
+    def total(self):
+        return self.insertadas + self.actualizadas + self.sin_cambios
+
+    def sumar(self, otro):
+        self.insertadas += otro.insertadas
+        self.actualizadas += otro.actualizadas
+        self.sin_cambios += otro.sin_cambios
+
+
+def columnas_clave(modelo):
+    """
+    Columnas de la primera restricción ``unique_together`` del modelo.
+    """
+    if not modelo._meta.unique_together:
+        raise ValueError(f'{modelo.__name__} no define unique_together')
+    return [modelo._meta.get_field(nombre).column for nombre in modelo._meta.unique_together[0]]
+
+
+class TablaIntermedia:
+    """
+    Tabla UNLOGGED temporal con las columnas cargadas del modelo, donde cada bloque se
+    copia antes de combinarse con la tabla destino. Se crea con el primer bloque (cuando
+    se conocen las columnas) y se elimina con ``eliminar()``; al ser parte de la
+    transacción de la carga, un rollback también la descarta.
+
+    Las filas con alguna parte de la clave en NULL nunca coinciden en ``ON CONFLICT``
+    (PostgreSQL trata los NULL como distintos), así que siempre se insertan.
+    """
+
+    def __init__(self, cursor, modelo):
+        self.cursor = cursor
+        self.modelo = modelo
+        self.tabla = connection.ops.quote_name(modelo._meta.db_table)
+        self.nombre = connection.ops.quote_name(f'stg_{modelo._meta.db_table}_{uuid.uuid4().hex[:12]}')
+        self.clave = columnas_clave(modelo)
+        self.columnas = None
+        self.sentencia = None
+
+    def _crear(self, columnas):
+        quote = connection.ops.quote_name
+        self.columnas = list(columnas)
+        faltantes = [columna for columna in self.clave if columna not in self.columnas]
+        if faltantes:
+            raise ValueError(f"Faltan columnas de la clave única: {', '.join(faltantes)}")
+
+        lista = ', '.join(quote(columna) for columna in self.columnas)
+        self.cursor.execute(f'CREATE UNLOGGED TABLE {self.nombre} AS SELECT {lista} FROM {self.tabla} WITH NO DATA')
+        self.cursor.execute(f'ALTER TABLE {self.nombre} ADD COLUMN {quote(COLUMNA_ORDEN)} bigint')
+        self.sentencia = self._sentencia_combinar()
+
+    def _sentencia_combinar(self):
+        quote = connection.ops.quote_name
+        lista = ', '.join(quote(columna) for columna in self.columnas)
+        clave = ', '.join(quote(columna) for columna in self.clave)
+        comparables = [
+            columna for columna in self.columnas
+            if columna not in self.clave and columna not in COLUMNAS_CONTROL
+        ]
+        actualizables = comparables + [columna for columna in COLUMNAS_CONTROL_ACTUALIZABLES if columna in self.columnas]
+        asignaciones = ', '.join(f'{quote(columna)} = EXCLUDED.{quote(columna)}' for columna in actualizables)
+        if comparables:
+            actuales = ', '.join(f'd.{quote(columna)}' for columna in comparables)
+            nuevos = ', '.join(f'EXCLUDED.{quote(columna)}' for columna in comparables)
+            conflicto = f'DO UPDATE SET {asignaciones} WHERE ROW({actuales}) IS DISTINCT FROM ROW({nuevos})'
+        else:
+            conflicto = 'DO NOTHING'
+
+        # Si el archivo repite una clave, la última fila es la que vale (como en una carga fila a fila).
+        # Las insertadas son las claves que no existían antes de la sentencia (todas las partes
+        # de la sentencia leen la tabla como estaba al empezar); ``xmax`` no sirve para
+        # distinguirlas porque no se puede leer en RETURNING de una tabla particionada
+        igualdad = ' AND '.join(f'd.{quote(columna)} = n.{quote(columna)}' for columna in self.clave)
+        return f"""
+            WITH nuevas AS (
+                SELECT DISTINCT ON ({clave}) {lista}
+                FROM {self.nombre}
+                ORDER BY {clave}, {quote(COLUMNA_ORDEN)} DESC
+            ),
+            existentes AS (
+                SELECT COUNT(*) AS total FROM nuevas n WHERE EXISTS (SELECT 1 FROM {self.tabla} d WHERE {igualdad})
+            ),
+            filas AS (
+                INSERT INTO {self.tabla} AS d ({lista})
+                SELECT {lista} FROM nuevas
+                ON CONFLICT ({clave}) {conflicto}
+                RETURNING 1
+            )
+            SELECT
+                (SELECT COUNT(*) FROM nuevas) - existentes.total,
+                (SELECT COUNT(*) FROM filas) - ((SELECT COUNT(*) FROM nuevas) - existentes.total)
+            FROM existentes
+        """
+
+    def combinar(self, df):
+        """
+        Copia un bloque ya formateado para ``COPY`` a la tabla intermedia y lo combina con
+        la tabla destino. Retorna el ``ResultadoCarga`` del bloque.
+        """
+        if df.empty:
+            return ResultadoCarga()
+        if self.columnas is None:
+            self._crear(df.columns)
+
+        df = df[self.columnas].assign(**{COLUMNA_ORDEN: range(len(df))})
+        copiar_dataframe(self.cursor, self.nombre, df)
+        self.cursor.execute(self.sentencia)
+        insertadas, actualizadas = self.cursor.fetchone()
+        self.cursor.execute(f'TRUNCATE {self.nombre}')
+        return ResultadoCarga(insertadas, actualizadas, len(df) - insertadas - actualizadas)
+
+    def eliminar(self):
+        if self.columnas is not None:
+            self.cursor.execute(f'DROP TABLE IF EXISTS {self.nombre}')
@@ -0,0 +1,79 @@
+"""
+Vista materializada ``disposicion_final_detallada``.
+
+La vista (creada por la migración 0012) guarda ``DisposicionFinal`` ya unida con sus
+catálogos, para que las herramientas de BI lean filas calculadas en lugar de repetir las
+uniones. Se actualiza con ``REFRESH MATERIALIZED VIEW CONCURRENTLY`` (posible por el
+índice único de "ID") después de cada carga completada y de cada purga: mientras se
+recalcula, los lectores siguen viendo las filas anteriores sin bloquearse.
+
+Las filas que no pasan por el cargador de Django (NiFi, SQL directo) no la actualizan;
+para ellas el comando ``refrescar_vista_detallada --intervalo`` revisa periódicamente
+``huella_datos_vista`` y la recalcula solo cuando cambió.
+"""
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from globalfunctions.string_manager import get_string
+
+VISTA_DETALLADA = 'disposicion_final_detallada'
+
+# Tablas de las que lee la vista
+TABLAS_ORIGEN = ('ingesta_disposicionfinal', 'ingesta_concesion', 'ingesta_servicio', 'ingesta_zonadescarga')
+
+
+def refrescar_vista_detallada(concurrente=True):
+    """
+    Recalcula la vista. Sin ``concurrente`` es más rápido, pero bloquea las lecturas
+    mientras tanto. Retorna los segundos que tomó.
+    """
+    inicio = time.perf_counter()
+    modo = 'CONCURRENTLY ' if concurrente else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f'REFRESH MATERIALIZED VIEW {modo}{connection.ops.quote_name(VISTA_DETALLADA)}')
+    return time.perf_counter() - inicio
+
+
+def huella_datos_vista():
+    """
+    Total de filas insertadas, actualizadas y eliminadas en las tablas de origen de la
+    vista (con las particiones de ``ingesta_disposicionfinal``), según las estadísticas de
+    PostgreSQL. Si cambia entre dos lecturas, la vista puede estar desactualizada. Las
+    estadísticas llegan con hasta unos segundos de retraso y no cuentan los ``TRUNCATE``,
+    pero los caminos que vacían particiones ya actualizan la vista.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+            FROM pg_stat_user_tables
+            WHERE relid IN (
+                SELECT c.oid FROM pg_class c
+                WHERE c.relname = ANY(%s) AND c.relnamespace = current_schema()::regnamespace
+                UNION
+                SELECT i.inhrelid FROM pg_inherits i
+                WHERE i.inhparent = to_regclass(%s)
+            )
+            """,
+            [list(TABLAS_ORIGEN), TABLAS_ORIGEN[0]]
+        )
+        return cursor.fetchone()[0]
+
+
+def refrescar_despues_de_cambios():
+    """
+    Actualiza la vista después de cambiar ``DisposicionFinal``, si
+    ``INGESTA_REFRESCAR_VISTA_DETALLADA`` está activo. Los datos ya quedaron confirmados,
+    así que un fallo solo se informa: la vista se puede actualizar luego con el comando
+    ``refrescar_vista_detallada``.
+    """
+    if not settings.INGESTA_REFRESCAR_VISTA_DETALLADA:
+        return
+    try:
+        segundos = refrescar_vista_detallada()
+    except DatabaseError as error:
+        print(get_string('messages.detailed_view_refresh_error', 'ingesta').format(error=error))
+        return
+    print(get_string('messages.detailed_view_refreshed', 'ingesta').format(seconds=segundos))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from ingesta.models import DisposicionFinal
+from ingesta.signals import notificar_datos_disposicion
+
+
+class Command(BaseCommand):
+    help = ('Recalcula epoch_entrada, epoch_salida y peso_residuos de las filas de '
+            'DisposicionFinal desactualizadas, por rangos de ID')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=50000,
+            help='Cantidad de IDs por actualización (por defecto 50000)'
+        )
+
+    def handle(self, *args, **options):
+        tamano_lote = options['tamano_lote']
+        rango = DisposicionFinal.objects.aggregate(minimo=Min('id'), maximo=Max('id'))
+        if rango['minimo'] is None:
+            self.stdout.write('No hay filas en DisposicionFinal')
+            return
+
+        # Cada rango se actualiza en su propia transacción para no bloquear la tabla completa
+        actualizadas = 0
+        for inicio in range(rango['minimo'], rango['maximo'] + 1, tamano_lote):
+            lote = DisposicionFinal.objects.filter(id__gte=inicio, id__lt=inicio + tamano_lote)
+            filas = lote.actualizar_derivados()
+            actualizadas += filas
+            fin = min(inicio + tamano_lote - 1, rango['maximo'])
+            self.stdout.write(f'IDs {inicio} a {fin}: {filas} filas actualizadas')
+
+        if actualizadas:
+            notificar_datos_disposicion()
+        self.stdout.write(self.style.SUCCESS(f'Filas actualizadas: {actualizadas}'))
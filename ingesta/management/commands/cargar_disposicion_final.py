@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ingesta.loaders import ErrorCarga, cargar_disposicion_final
+from ingesta.models import RegistroCarga
+from ingesta.schemas import registro_esquemas
+from ingesta.schemas.esquema import MODOS_CARGA
+
+
+class Command(BaseCommand):
+    help = 'Carga en DisposicionFinal los archivos validados (EN_MINIO) usando COPY de PostgreSQL (directo o con upsert)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'registros',
+            nargs='*',
+            type=int,
+            help='IDs de los registros de carga a cargar'
+        )
+        parser.add_argument(
+            '--pendientes',
+            action='store_true',
+            help='Carga todos los registros en EN_MINIO de procesos de disposición final'
+        )
+        parser.add_argument(
+            '--modo',
+            choices=MODOS_CARGA,
+            help='Modo de carga; por defecto el modo_carga del esquema del proceso'
+        )
+
+    def handle(self, *args, **options):
+        if options['registros']:
+            registros = list(RegistroCarga.objects.filter(id__in=options['registros']).order_by('fecha_hora_carga'))
+            faltantes = set(options['registros']) - {registro.id for registro in registros}
+            if faltantes:
+                raise CommandError(f"No existen registros de carga con ID: {', '.join(map(str, sorted(faltantes)))}")
+        elif options['pendientes']:
+            procesos = [
+                clave for clave, esquema in registro_esquemas.esquemas().items()
+                if esquema.table_name == 'DisposicionFinal'
+            ]
+            registros = list(
+                RegistroCarga.objects.filter(estado='EN_MINIO', tipo_proceso__in=procesos).order_by('fecha_hora_carga')
+            )
+        else:
+            raise CommandError('Indique los IDs de los registros o use --pendientes')
+
+        errores = 0
+        for registro in registros:
+            self.stdout.write(f'Cargando {registro.nombre_archivo_original} (ID: {registro.id})...')
+            try:
+                resultado = cargar_disposicion_final(registro, modo=options['modo'])
+            except ErrorCarga as e:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f'Registro {registro.id}: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Registro {registro.id}: {resultado.insertadas} insertadas, '
+                f'{resultado.actualizadas} actualizadas, {resultado.sin_cambios} sin cambios'
+            ))
+
+        if errores:
+            raise CommandError(f'{errores} de {len(registros)} registros no se pudieron cargar')
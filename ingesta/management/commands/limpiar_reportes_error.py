@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ingesta.models import RegistroCarga
+from ingesta.validators.error_report import limpiar_reportes_vencidos
+
+
+class Command(BaseCommand):
+    help = 'Elimina los reportes de errores de validación que superan el tiempo de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=settings.INGESTA_REPORTES_ERRORES_HORAS,
+            help='Antigüedad en horas a partir de la cual se elimina un reporte '
+                 f'(por defecto {settings.INGESTA_REPORTES_ERRORES_HORAS})'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Sigue en ejecución y repite la limpieza cada tantos segundos'
+        )
+
+    def handle(self, *args, **options):
+        if options['intervalo'] is None:
+            self._limpiar(options['horas'])
+            return
+
+        self.stdout.write(f'Limpiando reportes de errores cada {options["intervalo"]:g} s...')
+        while True:
+            close_old_connections()
+            try:
+                self._limpiar(options['horas'])
+            except Exception as error:
+                # Un fallo de MinIO o de la base de datos no detiene el proceso
+                self.stdout.write(self.style.WARNING(f'No se pudieron limpiar los reportes de errores: {error}'))
+            time.sleep(options['intervalo'])
+
+    def _limpiar(self, horas):
+        eliminadas = limpiar_reportes_vencidos(timedelta(hours=horas))
+
+        # Las cargas rechazadas dejan de apuntar a reportes que ya no existen
+        if eliminadas:
+            RegistroCarga.objects.filter(path_reporte_errores__in=eliminadas).update(path_reporte_errores=None)
+
+        self.stdout.write(self.style.SUCCESS(f'Reportes de errores eliminados: {len(eliminadas)}'))
@@ -0,0 +1,117 @@
+import re
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from ingesta.loaders import ErrorCarga, recargar_mes, vaciar_mes
+from ingesta.loaders.particiones import (
+    ErrorParticion,
+    asegurar_particiones,
+    esta_particionada,
+    migrar_a_particionada,
+    periodos_en_defecto,
+)
+
+
+def _periodo(valor):
+    coincidencia = re.fullmatch(r'(\d{4})-(\d{1,2})', valor)
+    if not coincidencia or not 1 <= int(coincidencia.group(2)) <= 12:
+        raise CommandError(f'Periodo no válido: {valor} (use AAAA-MM)')
+    return int(coincidencia.group(1)), int(coincidencia.group(2))
+
+
+class Command(BaseCommand):
+    help = ('Particiona ingesta_disposicionfinal por mes de fecha_entrada y crea las particiones '
+            'de los meses siguientes (ejecútelo periódicamente o con --intervalo)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--migrar',
+            action='store_true',
+            help='Convierte la tabla actual en una tabla particionada (bloquea la tabla mientras copia las filas)'
+        )
+        parser.add_argument(
+            '--meses-adelante',
+            type=int,
+            default=3,
+            help='Meses futuros para los que se crean particiones (por defecto 3)'
+        )
+        parser.add_argument(
+            '--truncar',
+            metavar='AAAA-MM',
+            help='Elimina todas las filas de un mes vaciando su partición; sus cargas quedan en ERROR'
+        )
+        parser.add_argument(
+            '--recargar',
+            metavar='AAAA-MM',
+            help='Vuelve a cargar un mes desde los archivos en MinIO de sus cargas, reemplazando su partición'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Sigue en ejecución y cada tantos segundos crea las particiones que falten'
+        )
+
+    def handle(self, *args, **options):
+        if options['intervalo'] is not None:
+            if options['migrar'] or options['truncar'] or options['recargar']:
+                raise CommandError('--intervalo solo se usa para crear las particiones de los meses siguientes')
+            self._crear_periodicamente(options['meses_adelante'], options['intervalo'])
+            return
+
+        try:
+            if options['migrar']:
+                creadas = migrar_a_particionada(options['meses_adelante'])
+                self.stdout.write(self.style.SUCCESS(f'Tabla particionada con {creadas} particiones'))
+                return
+
+            if not esta_particionada():
+                raise CommandError('ingesta_disposicionfinal no está particionada; use --migrar primero')
+
+            if options['truncar']:
+                year, month = _periodo(options['truncar'])
+                registros = vaciar_mes(year, month)
+                if registros is None:
+                    raise CommandError(f'El mes {options["truncar"]} no tiene partición propia')
+                if registros:
+                    self.stdout.write(f"Cargas marcadas en ERROR: {', '.join(map(str, sorted(registros)))}")
+                self.stdout.write(self.style.SUCCESS(f'Mes {options["truncar"]} vaciado'))
+                return
+
+            if options['recargar']:
+                year, month = _periodo(options['recargar'])
+                filas = recargar_mes(year, month)
+                self.stdout.write(self.style.SUCCESS(f'Mes {options["recargar"]} recargado con {filas} filas'))
+                return
+
+            self._crear_particiones(options['meses_adelante'])
+        except (ErrorParticion, ErrorCarga) as error:
+            raise CommandError(str(error))
+
+    def _crear_particiones(self, meses_adelante):
+        hoy = date.today()
+        periodos = periodos_en_defecto()
+        for adelante in range(meses_adelante + 1):
+            indice = hoy.month - 1 + adelante
+            periodos.add((hoy.year + indice // 12, indice % 12 + 1))
+        creadas = asegurar_particiones(periodos)
+
+        for nombre in creadas:
+            self.stdout.write(f'Partición creada: {nombre}')
+        self.stdout.write(self.style.SUCCESS(f'Particiones creadas: {len(creadas)}'))
+
+    def _crear_periodicamente(self, meses_adelante, intervalo):
+        self.stdout.write(f'Revisando las particiones cada {intervalo:g} s...')
+        while True:
+            close_old_connections()
+            try:
+                # Mientras la tabla no se migre con --migrar no hay particiones que crear
+                if esta_particionada():
+                    self._crear_particiones(meses_adelante)
+                else:
+                    self.stdout.write(self.style.WARNING('ingesta_disposicionfinal no está particionada'))
+            except (ErrorParticion, DatabaseError) as error:
+                self.stdout.write(self.style.WARNING(f'No se pudieron crear las particiones: {error}'))
+            time.sleep(intervalo)
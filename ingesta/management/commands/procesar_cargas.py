@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ingesta.jobs.carga import ejecutar_carga, reclamar_cargas
+
+
+class Command(BaseCommand):
+    help = ('Carga en la base de datos los archivos en estado EN_MINIO, con un grupo acotado '
+            'de cargas simultáneas y reintentos ante fallos inesperados')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa los registros pendientes y termina, en lugar de esperar nuevos'
+        )
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=settings.INGESTA_CARGA_HILOS,
+            help=f'Cargas simultáneas (por defecto {settings.INGESTA_CARGA_HILOS})'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay registros pendientes (por defecto 2)'
+        )
+        parser.add_argument(
+            '--tiempo-maximo',
+            type=int,
+            default=60,
+            help='Minutos tras los cuales un registro reclamado sin terminar se vuelve a tomar (por defecto 60)'
+        )
+
+    def handle(self, *args, **options):
+        hilos = max(options['hilos'], 1)
+        tiempo_maximo = timedelta(minutes=options['tiempo_maximo'])
+        self.stdout.write(f'Esperando archivos para cargar ({hilos} cargas simultáneas)...')
+
+        with ThreadPoolExecutor(max_workers=hilos) as grupo:
+            en_curso = {}
+            while True:
+                close_old_connections()
+                for registro in reclamar_cargas(hilos - len(en_curso), tiempo_maximo):
+                    self.stdout.write(f'Cargando {registro.nombre_archivo_original} (ID: {registro.id})...')
+                    en_curso[grupo.submit(ejecutar_carga, registro.id)] = registro
+
+                if not en_curso:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                terminadas, _ = wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    self._reportar(en_curso.pop(futuro), futuro)
+
+    def _reportar(self, registro, futuro):
+        try:
+            registro, resultado, reintentar = futuro.result()
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f'Registro {registro.id}: {error}'))
+            return
+        if resultado is not None:
+            self.stdout.write(self.style.SUCCESS(
+                f'Registro {registro.id}: {resultado.insertadas} insertadas, '
+                f'{resultado.actualizadas} actualizadas, {resultado.sin_cambios} sin cambios'
+            ))
+        elif reintentar:
+            self.stdout.write(self.style.WARNING(
+                f'Registro {registro.id}: intento {registro.intentos_carga} fallido ({registro.mensaje_error}); '
+                f'se reintentará a partir de {registro.proximo_intento:%Y-%m-%d %H:%M:%S}'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f'Registro {registro.id}: {registro.mensaje_error}'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ingesta.loaders import ErrorPurga, purgar_carga
+from ingesta.models import RegistroCarga
+
+
+class Command(BaseCommand):
+    help = ('Elimina registros de carga junto con sus filas en DisposicionFinal (en lotes), '
+            'sus totales mensuales y sus archivos en MinIO')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'registros',
+            nargs='+',
+            type=int,
+            help='IDs de los registros de carga a eliminar'
+        )
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            help='Filas borradas por transacción; por defecto INGESTA_PURGA_TAMANO_LOTE'
+        )
+
+    def handle(self, *args, **options):
+        registros = list(RegistroCarga.objects.filter(id__in=options['registros']).order_by('id'))
+        faltantes = set(options['registros']) - {registro.id for registro in registros}
+        if faltantes:
+            raise CommandError(f"No existen registros de carga con ID: {', '.join(map(str, sorted(faltantes)))}")
+
+        errores = 0
+        for registro in registros:
+            self.stdout.write(f'Eliminando {registro.nombre_archivo_original} (ID: {registro.id})...')
+
+            def progreso(eliminadas, total, registro_id=registro.id):
+                self.stdout.write(f'Registro {registro_id}: {eliminadas} de {total} filas eliminadas')
+
+            try:
+                filas = purgar_carga(registro, tamano_lote=options['tamano_lote'], progreso=progreso)
+            except ErrorPurga as e:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f'Registro {registro.id}: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Registro {registro.id} eliminado con {filas} filas'))
+
+        if errores:
+            raise CommandError(f'{errores} de {len(registros)} registros no se pudieron eliminar')
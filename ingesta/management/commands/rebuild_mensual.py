@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ingesta.loaders import recalcular_mensual, todos_los_periodos
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye DisposicionFinalMensual a partir de DisposicionFinal'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--anio',
+            type=int,
+            help='Reconstruye solo los meses de este año'
+        )
+
+    def handle(self, *args, **options):
+        periodos = todos_los_periodos()
+        if options['anio']:
+            periodos = {(year, month) for year, month in periodos if year == options['anio']}
+
+        recalcular_mensual(periodos)
+        self.stdout.write(self.style.SUCCESS(f'Periodos recalculados: {len(periodos)}'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from ingesta.loaders import VISTA_DETALLADA, huella_datos_vista, refrescar_vista_detallada
+
+
+class Command(BaseCommand):
+    help = f'Actualiza la vista materializada {VISTA_DETALLADA}'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bloqueante',
+            action='store_true',
+            help='Actualiza sin CONCURRENTLY: más rápido, pero bloquea las lecturas mientras tanto'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help=('Sigue en ejecución y cada tantos segundos actualiza la vista si cambiaron sus '
+                  'tablas de origen (por ejemplo, por cargas de NiFi)')
+        )
+
+    def handle(self, *args, **options):
+        concurrente = not options['bloqueante']
+        if options['intervalo'] is None:
+            segundos = refrescar_vista_detallada(concurrente=concurrente)
+            self.stdout.write(self.style.SUCCESS(f'{VISTA_DETALLADA} actualizada en {segundos:.1f} s'))
+            return
+
+        self.stdout.write(f'Revisando cambios para {VISTA_DETALLADA} cada {options["intervalo"]:g} s...')
+        anterior = None
+        while True:
+            close_old_connections()
+            try:
+                # La huella se lee antes de actualizar: lo que cambie mientras tanto se
+                # detecta en la siguiente vuelta
+                huella = huella_datos_vista()
+                if huella != anterior:
+                    segundos = refrescar_vista_detallada(concurrente=concurrente)
+                    anterior = huella
+                    self.stdout.write(self.style.SUCCESS(f'{VISTA_DETALLADA} actualizada en {segundos:.1f} s'))
+            except DatabaseError as error:
+                self.stdout.write(self.style.WARNING(f'No se pudo actualizar {VISTA_DETALLADA}: {error}'))
+            time.sleep(options['intervalo'])
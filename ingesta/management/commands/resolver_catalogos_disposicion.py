@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from ingesta.loaders.catalogos import actualizar_referencias
+from ingesta.models import DisposicionFinal
+
+
+class Command(BaseCommand):
+    help = ('Resuelve concesion_ref, ase_ref, servicio_ref y zona_descarga_ref de DisposicionFinal '
+            'a partir de los nombres de catálogo, por rangos de ID')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=50000,
+            help='Cantidad de IDs por actualización (por defecto 50000)'
+        )
+
+    def handle(self, *args, **options):
+        tamano_lote = options['tamano_lote']
+        rango = DisposicionFinal.objects.aggregate(minimo=Min('id'), maximo=Max('id'))
+        if rango['minimo'] is None:
+            self.stdout.write('No hay filas en DisposicionFinal')
+            return
+
+        # Cada rango se actualiza en su propia transacción para no bloquear la tabla completa
+        actualizadas = 0
+        for inicio in range(rango['minimo'], rango['maximo'] + 1, tamano_lote):
+            filas = actualizar_referencias(inicio, inicio + tamano_lote)
+            actualizadas += filas
+            fin = min(inicio + tamano_lote - 1, rango['maximo'])
+            self.stdout.write(f'IDs {inicio} a {fin}: {filas} filas actualizadas')
+
+        self.stdout.write(self.style.SUCCESS(f'Filas actualizadas: {actualizadas}'))
@@ -0,0 +1,118 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from ingesta.jobs.validacion import (
+    descartar_validacion, ejecutar_validacion, inicializar_proceso, numero_procesos, reclamar_validaciones,
+    validar_carga
+)
+
+
+class Command(BaseCommand):
+    help = ('Valida en segundo plano los archivos cargados que están en estado VALIDANDO, '
+            'con un grupo acotado de validaciones simultáneas')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa los registros pendientes y termina, en lugar de esperar nuevos'
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=None,
+            help='Validaciones simultáneas, cada una en su propio proceso (por defecto INGESTA_VALIDACION_PROCESOS)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay registros pendientes (por defecto 2)'
+        )
+        parser.add_argument(
+            '--tiempo-maximo',
+            type=int,
+            default=30,
+            help='Minutos sin avance tras los cuales un registro reclamado se vuelve a tomar (por defecto 30)'
+        )
+
+    def handle(self, *args, **options):
+        procesos = max(options['procesos'] or numero_procesos(), 1)
+        tiempo_maximo = timedelta(minutes=options['tiempo_maximo'])
+        self.stdout.write(f'Esperando archivos para validar ({procesos} validaciones simultáneas)...')
+
+        if procesos == 1:
+            self._validar_en_serie(options, tiempo_maximo)
+            return
+
+        grupo = None
+        en_curso = {}
+        try:
+            while True:
+                close_old_connections()
+                registros = reclamar_validaciones(procesos - len(en_curso), tiempo_maximo)
+                if registros:
+                    # Los procesos nuevos del grupo no deben heredar la conexión abierta
+                    connections.close_all()
+                    grupo = grupo or ProcessPoolExecutor(max_workers=procesos, initializer=inicializar_proceso)
+                for registro in registros:
+                    self.stdout.write(f'Validando {registro.nombre_archivo_original} (ID: {registro.id})...')
+                    en_curso[grupo.submit(ejecutar_validacion, registro.id)] = registro
+
+                if not en_curso:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                terminadas, _ = wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                roto = False
+                for futuro in terminadas:
+                    roto = self._reportar(en_curso.pop(futuro), futuro) or roto
+                if roto:
+                    # Un proceso terminó de forma abrupta: el grupo queda inutilizable y
+                    # las validaciones restantes fallan también
+                    grupo.shutdown(wait=False, cancel_futures=True)
+                    grupo = None
+        finally:
+            if grupo is not None:
+                grupo.shutdown()
+
+    def _validar_en_serie(self, options, tiempo_maximo):
+        while True:
+            close_old_connections()
+            registros = reclamar_validaciones(1, tiempo_maximo)
+            if not registros:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            registro = registros[0]
+            self.stdout.write(f'Validando {registro.nombre_archivo_original} (ID: {registro.id})...')
+            self._reportar_resultado(registro, validar_carga(registro))
+
+    def _reportar(self, registro, futuro):
+        """
+        Muestra el resultado de una validación del grupo. Retorna True si el grupo de
+        procesos quedó inutilizable.
+        """
+        try:
+            registro, es_valido = futuro.result()
+        except Exception as error:
+            registro = descartar_validacion(registro.id, error)
+            self.stdout.write(self.style.ERROR(f'Archivo {registro.id} rechazado: {registro.mensaje_error}'))
+            return isinstance(error, BrokenProcessPool)
+        self._reportar_resultado(registro, es_valido)
+        return False
+
+    def _reportar_resultado(self, registro, es_valido):
+        if es_valido:
+            self.stdout.write(self.style.SUCCESS(f'Archivo {registro.id} validado y guardado en MinIO'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Archivo {registro.id} rechazado: {registro.mensaje_error}'))
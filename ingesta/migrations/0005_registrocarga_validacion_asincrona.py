@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0004_add_categoria_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registrocarga',
+            name='estado',
+            field=models.CharField(
+                choices=[
+                    ('RECIBIDO', 'Recibido en Django'),
+                    ('VALIDANDO', 'Validando archivo'),
+                    ('EN_MINIO', 'Subido a MinIO'),
+                    ('PROCESANDO_NIFI', 'Procesando por NiFi'),
+                    ('ERROR', 'Error'),
+                    ('COMPLETADO', 'Completado'),
+                ],
+                default='RECIBIDO',
+                max_length=20
+            ),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='path_temporal',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='path_reporte_errores',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='filas_validadas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='errores_encontrados',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='reclamado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
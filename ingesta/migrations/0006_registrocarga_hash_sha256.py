@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0005_registrocarga_validacion_asincrona'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrocarga',
+            name='hash_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='registrocarga',
+            index=models.Index(fields=['hash_sha256', 'tipo_proceso'], name='ingesta_reg_hash_sh_817c9a_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0006_registrocarga_hash_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrocarga',
+            name='filas_insertadas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='filas_actualizadas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='filas_sin_cambios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
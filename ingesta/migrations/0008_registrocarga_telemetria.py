@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0007_registrocarga_resultado_carga'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrocarga',
+            name='tamano_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='filas_rechazadas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='fecha_validado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='fecha_almacenado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='fecha_cargado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='duracion_validacion',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='duracion_almacenamiento',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='duracion_carga',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0008_registrocarga_telemetria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrocarga',
+            name='intentos_carga',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='registrocarga',
+            name='proximo_intento',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
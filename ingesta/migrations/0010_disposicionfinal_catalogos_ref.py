@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0009_registrocarga_reintentos_carga'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disposicionfinal',
+            name='concesion_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ingesta.concesion'),
+        ),
+        migrations.AddField(
+            model_name='disposicionfinal',
+            name='ase_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ingesta.ase'),
+        ),
+        migrations.AddField(
+            model_name='disposicionfinal',
+            name='servicio_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ingesta.servicio'),
+        ),
+        migrations.AddField(
+            model_name='disposicionfinal',
+            name='zona_descarga_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ingesta.zonadescarga'),
+        ),
+    ]
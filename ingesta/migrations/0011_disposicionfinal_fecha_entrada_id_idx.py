@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0010_disposicionfinal_catalogos_ref'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='disposicionfinal',
+            name='ingesta_dis_fecha_e_81bdf3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='disposicionfinal',
+            index=models.Index(fields=['fecha_entrada', 'id'], name='ingesta_dis_fecha_e_ae2e39_idx'),
+        ),
+    ]
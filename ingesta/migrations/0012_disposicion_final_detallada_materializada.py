@@ -0,0 +1,110 @@
+from django.db import migrations
+
+# Reemplaza la vista simple de vista_tablero.sql por una vista materializada con las mismas
+# columnas más "ID", que permite el índice único que necesita REFRESH ... CONCURRENTLY
+CREAR_VISTA_MATERIALIZADA = """
+DROP VIEW IF EXISTS disposicion_final_detallada;
+
+CREATE MATERIALIZED VIEW disposicion_final_detallada AS
+SELECT
+    df.id AS "ID",
+    EXTRACT(YEAR FROM df.fecha_entrada) AS "AÑO",
+    EXTRACT(MONTH FROM df.fecha_entrada) AS "MES",
+    EXTRACT(DAY FROM df.fecha_entrada) AS "DÍA",
+    ROUND(df.peso_residuos / 1000.0, 2) AS "PESO RESIDUOS TON",
+    df.fecha_entrada AS "FECHA ENTRADA",
+    df.fecha_salida AS "FECHA SALIDA",
+    df.consecutivo_entrada AS "CONSECUTIVO ENTRADA",
+    df.consecutivo_salida AS "CONSECUTIVO SALIDA",
+    df.placa AS "PLACA",
+    df.numero_vehiculo AS "NUMERO VEHICULO",
+    UPPER(TRIM(df.concesion)) AS "CONCESION",
+    df.macroruta AS "MACRORUTA",
+    df.microruta AS "MICRORUTA",
+    UPPER(TRIM(df.ase)) AS "ASE",
+    UPPER(TRIM(df.servicio)) AS "SERVICIO",
+    UPPER(TRIM(df.zona_descarga)) AS "ZONA DESCARGA",
+    df.peso_entrada AS "PESO ENTRADA",
+    df.peso_salida AS "PESO SALIDA",
+    df.peso_residuos AS "PESO RESIDUOS",
+    s.categoria AS "CATEGORIA DEL SERVICIO",
+    c.categoria AS "ORIGEN DEL RESIDUO",
+    CASE
+        WHEN zd.categoria = 'PIDJ' THEN 'PIDJ'
+        ELSE NULL
+    END AS "DISPUESTOS PIDJ"
+FROM
+    ingesta_disposicionfinal df
+LEFT JOIN
+    ingesta_concesion c ON c.id = df.concesion_ref_id
+LEFT JOIN
+    ingesta_servicio s ON s.id = df.servicio_ref_id
+LEFT JOIN
+    ingesta_zonadescarga zd ON zd.id = df.zona_descarga_ref_id
+WHERE
+    df.fecha_entrada IS NOT NULL
+ORDER BY
+    df.fecha_entrada DESC;
+
+CREATE UNIQUE INDEX disposicion_final_detallada_id ON disposicion_final_detallada ("ID");
+CREATE INDEX disposicion_final_detallada_fecha ON disposicion_final_detallada ("FECHA ENTRADA");
+CREATE INDEX disposicion_final_detallada_periodo ON disposicion_final_detallada ("AÑO", "MES");
+CREATE INDEX disposicion_final_detallada_concesion ON disposicion_final_detallada ("CONCESION");
+CREATE INDEX disposicion_final_detallada_servicio ON disposicion_final_detallada ("SERVICIO");
+CREATE INDEX disposicion_final_detallada_zona ON disposicion_final_detallada ("ZONA DESCARGA");
+"""
+
+CREAR_VISTA_SIMPLE = """
+DROP MATERIALIZED VIEW IF EXISTS disposicion_final_detallada;
+
+CREATE VIEW disposicion_final_detallada AS
+SELECT
+    EXTRACT(YEAR FROM df.fecha_entrada) AS "AÑO",
+    EXTRACT(MONTH FROM df.fecha_entrada) AS "MES",
+    EXTRACT(DAY FROM df.fecha_entrada) AS "DÍA",
+    ROUND(df.peso_residuos / 1000.0, 2) AS "PESO RESIDUOS TON",
+    df.fecha_entrada AS "FECHA ENTRADA",
+    df.fecha_salida AS "FECHA SALIDA",
+    df.consecutivo_entrada AS "CONSECUTIVO ENTRADA",
+    df.consecutivo_salida AS "CONSECUTIVO SALIDA",
+    df.placa AS "PLACA",
+    df.numero_vehiculo AS "NUMERO VEHICULO",
+    UPPER(TRIM(df.concesion)) AS "CONCESION",
+    df.macroruta AS "MACRORUTA",
+    df.microruta AS "MICRORUTA",
+    UPPER(TRIM(df.ase)) AS "ASE",
+    UPPER(TRIM(df.servicio)) AS "SERVICIO",
+    UPPER(TRIM(df.zona_descarga)) AS "ZONA DESCARGA",
+    df.peso_entrada AS "PESO ENTRADA",
+    df.peso_salida AS "PESO SALIDA",
+    df.peso_residuos AS "PESO RESIDUOS",
+    s.categoria AS "CATEGORIA DEL SERVICIO",
+    c.categoria AS "ORIGEN DEL RESIDUO",
+    CASE
+        WHEN zd.categoria = 'PIDJ' THEN 'PIDJ'
+        ELSE NULL
+    END AS "DISPUESTOS PIDJ"
+FROM
+    ingesta_disposicionfinal df
+LEFT JOIN
+    ingesta_concesion c ON c.id = df.concesion_ref_id
+LEFT JOIN
+    ingesta_servicio s ON s.id = df.servicio_ref_id
+LEFT JOIN
+    ingesta_zonadescarga zd ON zd.id = df.zona_descarga_ref_id
+WHERE
+    df.fecha_entrada IS NOT NULL
+ORDER BY
+    df.fecha_entrada DESC;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0011_disposicionfinal_fecha_entrada_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR_VISTA_MATERIALIZADA, CREAR_VISTA_SIMPLE),
+    ]
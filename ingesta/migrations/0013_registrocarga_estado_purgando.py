@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0012_disposicion_final_detallada_materializada'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registrocarga',
+            name='estado',
+            field=models.CharField(
+                choices=[
+                    ('RECIBIDO', 'Recibido en Django'),
+                    ('VALIDANDO', 'Validando archivo'),
+                    ('EN_MINIO', 'Subido a MinIO'),
+                    ('PROCESANDO_NIFI', 'Procesando por NiFi'),
+                    ('PURGANDO', 'Eliminando datos'),
+                    ('ERROR', 'Error'),
+                    ('COMPLETADO', 'Completado'),
+                ],
+                default='RECIBIDO',
+                max_length=20
+            ),
+        ),
+    ]
@@ -0,0 +1,127 @@
+from django.db import migrations
+
+# Resuelve en la base de datos los campos *_ref de DisposicionFinal, también para las
+# filas que no pasan por el cargador de Django (NiFi, SQL directo). Usa la misma regla de
+# ``mapas_catalogos``: nombre con UPPER(TRIM()), el registro activo primero y luego el de
+# menor ID. Solo busca cuando la llave falta o cambia el nombre sin cambiar la llave, así
+# que las filas que el cargador ya resolvió no hacen consultas adicionales
+RESOLVER_FILA = """
+CREATE OR REPLACE FUNCTION ingesta_disposicionfinal_resolver_catalogos() RETURNS trigger AS $$
+BEGIN
+    IF NEW.concesion IS NOT NULL AND (NEW.concesion_ref_id IS NULL OR (
+        TG_OP = 'UPDATE' AND NEW.concesion IS DISTINCT FROM OLD.concesion
+        AND NEW.concesion_ref_id IS NOT DISTINCT FROM OLD.concesion_ref_id
+    )) THEN
+        NEW.concesion_ref_id := (
+            SELECT id FROM ingesta_concesion
+            WHERE UPPER(TRIM(nombre)) = UPPER(TRIM(NEW.concesion)) ORDER BY activo DESC, id LIMIT 1
+        );
+    END IF;
+    IF NEW.ase IS NOT NULL AND (NEW.ase_ref_id IS NULL OR (
+        TG_OP = 'UPDATE' AND NEW.ase IS DISTINCT FROM OLD.ase
+        AND NEW.ase_ref_id IS NOT DISTINCT FROM OLD.ase_ref_id
+    )) THEN
+        NEW.ase_ref_id := (
+            SELECT id FROM ingesta_ase
+            WHERE UPPER(TRIM(nombre)) = UPPER(TRIM(NEW.ase)) ORDER BY activo DESC, id LIMIT 1
+        );
+    END IF;
+    IF NEW.servicio IS NOT NULL AND (NEW.servicio_ref_id IS NULL OR (
+        TG_OP = 'UPDATE' AND NEW.servicio IS DISTINCT FROM OLD.servicio
+        AND NEW.servicio_ref_id IS NOT DISTINCT FROM OLD.servicio_ref_id
+    )) THEN
+        NEW.servicio_ref_id := (
+            SELECT id FROM ingesta_servicio
+            WHERE UPPER(TRIM(nombre)) = UPPER(TRIM(NEW.servicio)) ORDER BY activo DESC, id LIMIT 1
+        );
+    END IF;
+    IF NEW.zona_descarga IS NOT NULL AND (NEW.zona_descarga_ref_id IS NULL OR (
+        TG_OP = 'UPDATE' AND NEW.zona_descarga IS DISTINCT FROM OLD.zona_descarga
+        AND NEW.zona_descarga_ref_id IS NOT DISTINCT FROM OLD.zona_descarga_ref_id
+    )) THEN
+        NEW.zona_descarga_ref_id := (
+            SELECT id FROM ingesta_zonadescarga
+            WHERE UPPER(TRIM(nombre)) = UPPER(TRIM(NEW.zona_descarga)) ORDER BY activo DESC, id LIMIT 1
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ingesta_disposicionfinal_resolver_catalogos
+BEFORE INSERT OR UPDATE OF concesion, ase, servicio, zona_descarga ON ingesta_disposicionfinal
+FOR EACH ROW EXECUTE FUNCTION ingesta_disposicionfinal_resolver_catalogos();
+"""
+
+# Cuando se crea, renombra, activa, desactiva o elimina una entrada de un catálogo, se
+# vuelven a resolver las filas con ese nombre (argumentos: columna del nombre en
+# DisposicionFinal y columna de la llave)
+RESOLVER_CATALOGO = """
+CREATE OR REPLACE FUNCTION ingesta_catalogo_resolver_disposicion() RETURNS trigger AS $$
+DECLARE
+    nombres text[];
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.nombre IS NOT DISTINCT FROM OLD.nombre AND NEW.activo IS NOT DISTINCT FROM OLD.activo THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        nombres := ARRAY[UPPER(TRIM(NEW.nombre))];
+    ELSIF TG_OP = 'DELETE' THEN
+        nombres := ARRAY[UPPER(TRIM(OLD.nombre))];
+    ELSE
+        nombres := ARRAY[UPPER(TRIM(NEW.nombre)), UPPER(TRIM(OLD.nombre))];
+    END IF;
+    EXECUTE format(
+        'WITH nuevos AS (
+            SELECT d.id, (
+                SELECT c.id FROM %1$I c WHERE UPPER(TRIM(c.nombre)) = UPPER(TRIM(d.%2$I)) ORDER BY c.activo DESC, c.id LIMIT 1
+            ) AS ref
+            FROM ingesta_disposicionfinal d
+            WHERE UPPER(TRIM(d.%2$I)) = ANY($1)
+        )
+        UPDATE ingesta_disposicionfinal d SET %3$I = n.ref
+        FROM nuevos n
+        WHERE d.id = n.id AND d.%3$I IS DISTINCT FROM n.ref',
+        TG_TABLE_NAME, TG_ARGV[0], TG_ARGV[1]
+    ) USING nombres;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ingesta_concesion_resolver_disposicion
+AFTER INSERT OR UPDATE OF nombre, activo OR DELETE ON ingesta_concesion
+FOR EACH ROW EXECUTE FUNCTION ingesta_catalogo_resolver_disposicion('concesion', 'concesion_ref_id');
+
+CREATE TRIGGER ingesta_ase_resolver_disposicion
+AFTER INSERT OR UPDATE OF nombre, activo OR DELETE ON ingesta_ase
+FOR EACH ROW EXECUTE FUNCTION ingesta_catalogo_resolver_disposicion('ase', 'ase_ref_id');
+
+CREATE TRIGGER ingesta_servicio_resolver_disposicion
+AFTER INSERT OR UPDATE OF nombre, activo OR DELETE ON ingesta_servicio
+FOR EACH ROW EXECUTE FUNCTION ingesta_catalogo_resolver_disposicion('servicio', 'servicio_ref_id');
+
+CREATE TRIGGER ingesta_zonadescarga_resolver_disposicion
+AFTER INSERT OR UPDATE OF nombre, activo OR DELETE ON ingesta_zonadescarga
+FOR EACH ROW EXECUTE FUNCTION ingesta_catalogo_resolver_disposicion('zona_descarga', 'zona_descarga_ref_id');
+"""
+
+ELIMINAR = """
+DROP TRIGGER IF EXISTS ingesta_concesion_resolver_disposicion ON ingesta_concesion;
+DROP TRIGGER IF EXISTS ingesta_ase_resolver_disposicion ON ingesta_ase;
+DROP TRIGGER IF EXISTS ingesta_servicio_resolver_disposicion ON ingesta_servicio;
+DROP TRIGGER IF EXISTS ingesta_zonadescarga_resolver_disposicion ON ingesta_zonadescarga;
+DROP FUNCTION IF EXISTS ingesta_catalogo_resolver_disposicion();
+DROP TRIGGER IF EXISTS ingesta_disposicionfinal_resolver_catalogos ON ingesta_disposicionfinal;
+DROP FUNCTION IF EXISTS ingesta_disposicionfinal_resolver_catalogos();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0013_registrocarga_estado_purgando'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RESOLVER_FILA + RESOLVER_CATALOGO, ELIMINAR),
+    ]
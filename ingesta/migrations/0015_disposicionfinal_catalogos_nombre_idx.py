@@ -0,0 +1,28 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingesta', '0014_disposicionfinal_catalogos_trigger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disposicionfinal',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('concesion')), name='ingesta_dis_concesion_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disposicionfinal',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('ase')), name='ingesta_dis_ase_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disposicionfinal',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('servicio')), name='ingesta_dis_servicio_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disposicionfinal',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('zona_descarga')), name='ingesta_dis_zona_desc_norm_idx'),
+        ),
+    ]
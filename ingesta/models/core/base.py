@@ -24,8 +24,10 @@ class EstadoModel(models.Model):
     """
     ESTADOS = (
         ('RECIBIDO', 'Recibido en Django'),
+        ('VALIDANDO', 'Validando archivo'),
         ('EN_MINIO', 'Subido a MinIO'),
         ('PROCESANDO_NIFI', 'Procesando por NiFi'),
+        ('PURGANDO', 'Eliminando datos'),
         ('ERROR', 'Error'),
         ('COMPLETADO', 'Completado'),
     )
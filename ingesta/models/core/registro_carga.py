@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models.functions import TruncMonth
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from .base import TimeStampedModel, EstadoModel
 from datetime import datetime
 
@@ -18,6 +21,54 @@ class RegistroCargaManager(models.Manager):
     def con_errores(self):
         return self.get_queryset().filter(estado='ERROR')
 
+    def pendientes_validacion(self):
+        return self.get_queryset().filter(estado='VALIDANDO')
+
+    def duplicado(self, hash_sha256, tipo_proceso):
+        """
+        Retorna la carga vigente con el mismo contenido para el mismo proceso, si existe.
+        Las cargas rechazadas (ERROR) no cuentan, para permitir reintentar el mismo archivo.
+        """
+        return (
+            self.get_queryset()
+            .filter(hash_sha256=hash_sha256, tipo_proceso=tipo_proceso)
+            .exclude(estado='ERROR')
+            .order_by('fecha_hora_carga')
+            .first()
+        )
+
+    def telemetria(self):
+        """
+        Tiempos y volúmenes de las cargas agregados por tipo de proceso y mes de recepción.
+        """
+        return (
+            self.get_queryset()
+            .annotate(mes=TruncMonth('fecha_hora_carga'))
+            .values('tipo_proceso', 'mes')
+            .annotate(
+                cargas=Count('id'),
+                cargas_error=Count('id', filter=Q(estado='ERROR')),
+                bytes=Sum('tamano_bytes'),
+                filas_leidas=Sum('filas_validadas'),
+                filas_rechazadas=Sum('filas_rechazadas'),
+                filas_cargadas=Sum(F('filas_insertadas') + F('filas_actualizadas') + F('filas_sin_cambios')),
+                validacion_promedio=Avg('duracion_validacion'),
+                validacion_maxima=Max('duracion_validacion'),
+                almacenamiento_promedio=Avg('duracion_almacenamiento'),
+                carga_promedio=Avg('duracion_carga'),
+                carga_maxima=Max('duracion_carga'),
+                # Para filas por segundo solo cuentan las cargas con la etapa medida
+                filas_validacion_medida=Sum('filas_validadas', filter=Q(duracion_validacion__isnull=False)),
+                segundos_validacion=Sum('duracion_validacion'),
+                filas_carga_medida=Sum(
+                    F('filas_insertadas') + F('filas_actualizadas') + F('filas_sin_cambios'),
+                    filter=Q(duracion_carga__isnull=False)
+                ),
+                segundos_carga=Sum('duracion_carga'),
+            )
+            .order_by('-mes', 'tipo_proceso')
+        )
+
 class RegistroCarga(TimeStampedModel, EstadoModel):
     """
     Modelo para registrar las cargas de archivos en el sistema.
@@ -28,9 +79,45 @@ class RegistroCarga(TimeStampedModel, EstadoModel):
     subsecretaria_origen = models.CharField(max_length=100, blank=True, null=True)
     tipo_proceso = models.CharField(max_length=50, blank=True, null=True)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    hash_sha256 = models.CharField(max_length=64, blank=True, null=True)
+
+    # Validación en segundo plano
+    path_temporal = models.CharField(max_length=500, blank=True, null=True)
+    # Clave del reporte de errores en el almacenamiento de reportes (ver validators/error_report.py)
+    path_reporte_errores = models.CharField(max_length=500, blank=True, null=True)
+    filas_validadas = models.PositiveIntegerField(default=0)
+    errores_encontrados = models.PositiveIntegerField(default=0)
+    reclamado_en = models.DateTimeField(blank=True, null=True)
+
+    # Resultado de la carga en la tabla del proceso
+    filas_insertadas = models.PositiveIntegerField(default=0)
+    filas_actualizadas = models.PositiveIntegerField(default=0)
+    filas_sin_cambios = models.PositiveIntegerField(default=0)
+
+    # Telemetría: tamaño, filas con errores y fin y duración (segundos) de cada etapa.
+    # La recepción es fecha_hora_carga y las filas leídas son filas_validadas
+    tamano_bytes = models.BigIntegerField(blank=True, null=True)
+    filas_rechazadas = models.PositiveIntegerField(default=0)
+    fecha_validado = models.DateTimeField(blank=True, null=True)
+    fecha_almacenado = models.DateTimeField(blank=True, null=True)
+    fecha_cargado = models.DateTimeField(blank=True, null=True)
+    duracion_validacion = models.FloatField(blank=True, null=True)
+    duracion_almacenamiento = models.FloatField(blank=True, null=True)
+    duracion_carga = models.FloatField(blank=True, null=True)
+
+    # Reintentos del proceso de carga local (procesar_cargas)
+    intentos_carga = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(blank=True, null=True)
 
     objects = RegistroCargaManager()
 
+    # Campo con la hora de fin de cada etapa medida
+    CAMPOS_FECHA_ETAPA = {
+        'validacion': 'fecha_validado',
+        'almacenamiento': 'fecha_almacenado',
+        'carga': 'fecha_cargado',
+    }
+
     def __str__(self):
         return f"{self.nombre_archivo_original} ({self.fecha_hora_carga.strftime('%Y-%m-%d %H:%M')})"
 
@@ -45,6 +132,36 @@ class RegistroCarga(TimeStampedModel, EstadoModel):
         self.mensaje_error = mensaje
         self.save()
 
+    def registrar_etapa(self, etapa, segundos):
+        """
+        Anota la duración y la hora de fin de una etapa ('validacion', 'almacenamiento'
+        o 'carga'). No guarda el registro.
+        """
+        setattr(self, f'duracion_{etapa}', round(segundos, 3))
+        setattr(self, self.CAMPOS_FECHA_ETAPA[etapa], timezone.now())
+
+    @property
+    def filas_validas(self):
+        return max(self.filas_validadas - self.filas_rechazadas, 0)
+
+    @property
+    def filas_por_segundo_validacion(self):
+        if not self.duracion_validacion:
+            return None
+        return round(self.filas_validadas / self.duracion_validacion, 1)
+
+    @property
+    def filas_por_segundo_carga(self):
+        if not self.duracion_carga:
+            return None
+        filas = self.filas_insertadas + self.filas_actualizadas + self.filas_sin_cambios
+        return round(filas / self.duracion_carga, 1)
+
+    @property
+    def validacion_terminada(self):
+        """Indica si la validación en segundo plano ya terminó (con o sin errores)."""
+        return self.estado != 'VALIDANDO'
+
     class Meta:
         ordering = ['-fecha_hora_carga']
         verbose_name = 'Registro de Carga'
@@ -53,4 +170,5 @@ class RegistroCarga(TimeStampedModel, EstadoModel):
             models.Index(fields=['fecha_hora_carga']),
             models.Index(fields=['estado']),
             models.Index(fields=['tipo_proceso']),
+            models.Index(fields=['hash_sha256', 'tipo_proceso']),
         ] 
\ No newline at end of file
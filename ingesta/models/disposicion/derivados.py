@@ -0,0 +1,130 @@
+"""
+Campos derivados de ``DisposicionFinal`` (``epoch_entrada``, ``epoch_salida`` y
+``peso_residuos``) calculados en bloque.
+
+Las mismas reglas de ``DisposicionFinal.save()`` se ofrecen en dos formas: vectorizadas
+sobre un DataFrame (para cargas y ``bulk_create``) y como expresiones SQL (para
+actualizar filas ya guardadas sin traerlas a Python).
+"""
+import pandas as pd
+from django.conf import settings
+from django.db.models import BigIntegerField, BooleanField, DecimalField
+from django.db.models.expressions import RawSQL
+
+# Pares (fecha, hora) a partir de los cuales se calcula cada campo epoch
+CAMPOS_EPOCH = {
+    'epoch_entrada': ('fecha_entrada', 'hora_entrada'),
+    'epoch_salida': ('fecha_salida', 'hora_salida'),
+}
+
+CAMPOS_DERIVADOS = tuple(CAMPOS_EPOCH) + ('peso_residuos',)
+
+_EPOCH = pd.Timestamp('1970-01-01', tz='UTC')
+
+
+def calcular_epoch(fechas, horas, zona_horaria=None):
+    """
+    Segundos desde 1970-01-01 UTC de cada fecha y hora, interpretadas en ``zona_horaria``
+    (por defecto ``settings.TIME_ZONE``). Retorna ``<NA>`` si falta la fecha o la hora.
+    """
+    momentos = (fechas + horas).dt.tz_localize(
+        zona_horaria or settings.TIME_ZONE,
+        ambiguous='NaT',
+        nonexistent='NaT'
+    )
+    return ((momentos - _EPOCH) // pd.Timedelta(seconds=1)).astype('Int64')
+
+
+def calcular_derivados(df):
+    """
+    Calcula sobre el bloque completo los campos que ``DisposicionFinal.save()`` calcula
+    por instancia: ``epoch_entrada``, ``epoch_salida`` y ``peso_residuos``.
+    Las fechas deben venir como ``datetime64`` y las horas como ``timedelta64``.
+    """
+    for campo_epoch, (campo_fecha, campo_hora) in CAMPOS_EPOCH.items():
+        if campo_fecha in df.columns and campo_hora in df.columns:
+            df[campo_epoch] = calcular_epoch(df[campo_fecha], df[campo_hora])
+
+    if 'peso_entrada' in df.columns and 'peso_salida' in df.columns:
+        diferencia = df['peso_entrada'] - df['peso_salida']
+        if 'peso_residuos' in df.columns:
+            # Como en save(), la diferencia reemplaza el valor del archivo cuando ambos pesos existen
+            df['peso_residuos'] = diferencia.fillna(df['peso_residuos'])
+        else:
+            df['peso_residuos'] = diferencia
+    return df
+
+
+def calcular_derivados_objetos(objetos):
+    """
+    Asigna los campos derivados a una lista de instancias sin guardarlas, calculándolos
+    de una vez para todo el lote.
+    """
+    if not objetos:
+        return objetos
+    df = pd.DataFrame({
+        'fecha_entrada': pd.to_datetime([obj.fecha_entrada for obj in objetos]),
+        'hora_entrada': _horas([obj.hora_entrada for obj in objetos]),
+        'fecha_salida': pd.to_datetime([obj.fecha_salida for obj in objetos]),
+        'hora_salida': _horas([obj.hora_salida for obj in objetos]),
+    })
+    for campo_epoch, (campo_fecha, campo_hora) in CAMPOS_EPOCH.items():
+        for obj, valor in zip(objetos, calcular_epoch(df[campo_fecha], df[campo_hora])):
+            if getattr(obj, campo_fecha) and getattr(obj, campo_hora):
+                setattr(obj, campo_epoch, int(valor) if not pd.isna(valor) else None)
+
+    # Decimales exactos: la resta se hace con Decimal, igual que en save()
+    for obj in objetos:
+        if obj.peso_entrada is not None and obj.peso_salida is not None:
+            obj.peso_residuos = obj.peso_entrada - obj.peso_salida
+    return objetos
+
+
+def _horas(valores):
+    return pd.to_timedelta([valor.isoformat() if valor is not None else None for valor in valores])
+
+
+def _columna(tabla, campo):
+    return f'"{tabla}"."{campo}"'
+
+
+def _sql_epoch(tabla, campo_epoch):
+    fecha, hora = (_columna(tabla, campo) for campo in CAMPOS_EPOCH[campo_epoch])
+    return (
+        f'CASE WHEN {fecha} IS NOT NULL AND {hora} IS NOT NULL '
+        f'THEN CAST(EXTRACT(EPOCH FROM ({fecha} + {hora}) AT TIME ZONE %s) AS bigint) '
+        f'ELSE {_columna(tabla, campo_epoch)} END'
+    )
+
+
+def _sql_peso_residuos(tabla):
+    entrada, salida, residuos = (_columna(tabla, campo) for campo in ('peso_entrada', 'peso_salida', 'peso_residuos'))
+    return f'CASE WHEN {entrada} IS NOT NULL AND {salida} IS NOT NULL THEN {entrada} - {salida} ELSE {residuos} END'
+
+
+def expresiones_derivados(tabla):
+    """
+    Expresiones SQL con el valor correcto de cada campo derivado, para ``QuerySet.update``.
+    Como en ``save()``, un campo se conserva cuando faltan los datos para calcularlo.
+    """
+    zona = settings.TIME_ZONE
+    return {
+        'epoch_entrada': RawSQL(_sql_epoch(tabla, 'epoch_entrada'), [zona], output_field=BigIntegerField()),
+        'epoch_salida': RawSQL(_sql_epoch(tabla, 'epoch_salida'), [zona], output_field=BigIntegerField()),
+        'peso_residuos': RawSQL(
+            _sql_peso_residuos(tabla), [], output_field=DecimalField(max_digits=30, decimal_places=2)
+        ),
+    }
+
+
+def condicion_desactualizados(tabla):
+    """
+    Condición SQL verdadera para las filas con algún campo derivado desactualizado.
+    """
+    zona = settings.TIME_ZONE
+    sql = ' OR '.join([
+        f"{_columna(tabla, 'epoch_entrada')} IS DISTINCT FROM ({_sql_epoch(tabla, 'epoch_entrada')})",
+        f"{_columna(tabla, 'epoch_salida')} IS DISTINCT FROM ({_sql_epoch(tabla, 'epoch_salida')})",
+        f"{_columna(tabla, 'peso_residuos')} IS DISTINCT FROM ({_sql_peso_residuos(tabla)})",
+    ])
+    return RawSQL(f'({sql})', [zona, zona], output_field=BooleanField())
@@ -1,9 +1,38 @@
 from django.db import models
+from django.db.models.functions import Trim, Upper
 from datetime import datetime
 from ingesta.models.core.base import TimeStampedModel
 from ingesta.models.core.registro_carga import RegistroCarga
+from ingesta.models.disposicion.derivados import (
+    calcular_derivados_objetos,
+    condicion_desactualizados,
+    expresiones_derivados,
+)
 
-class DisposicionFinalManager(models.Manager):
+class DisposicionFinalQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save(): los campos derivados se calculan para todo el lote
+        objs = list(objs)
+        calcular_derivados_objetos(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def desactualizados(self):
+        """
+        Filas cuyo epoch_entrada, epoch_salida o peso_residuos no corresponde a sus datos.
+        """
+        return self.filter(condicion_desactualizados(self.model._meta.db_table))
+
+    def actualizar_derivados(self):
+        """
+        Recalcula en la base de datos los campos derivados de las filas desactualizadas,
+        con un solo UPDATE. Retorna la cantidad de filas actualizadas.
+        """
+        return self.desactualizados().update(
+            **expresiones_derivados(self.model._meta.db_table),
+            fecha_actualizacion=int(datetime.now().timestamp())
+        )
+
+class DisposicionFinalManager(models.Manager.from_queryset(DisposicionFinalQuerySet)):
     def get_queryset(self):
         return super().get_queryset()
 
@@ -19,6 +48,13 @@ class DisposicionFinalManager(models.Manager):
     def por_concesion(self, concesion):
         return self.get_queryset().filter(concesion=concesion)
 
+    def calcular_derivados(self, objs):
+        """
+        Asigna epoch_entrada, epoch_salida y peso_residuos a un lote de instancias sin
+        guardarlas (para cargas que no pasan por save()).
+        """
+        return calcular_derivados_objetos(list(objs))
+
 class DisposicionFinal(TimeStampedModel):
     """
     Modelo para registrar las disposiciones finales de residuos.
@@ -46,6 +82,13 @@ class DisposicionFinal(TimeStampedModel):
     # Información del servicio
     servicio = models.CharField(max_length=60, null=True, blank=True)
     zona_descarga = models.CharField(max_length=60, null=True, blank=True)
+
+    # Catálogos resueltos al cargar a partir de los nombres anteriores (ver loaders/catalogos.py),
+    # para que los reportes unan y filtren por llave en lugar de comparar UPPER(TRIM(nombre))
+    concesion_ref = models.ForeignKey('ingesta.Concesion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    ase_ref = models.ForeignKey('ingesta.ASE', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    servicio_ref = models.ForeignKey('ingesta.Servicio', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    zona_descarga_ref = models.ForeignKey('ingesta.ZonaDescarga', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     
     # Información de peso (en kilogramos)
     peso_entrada = models.DecimalField(max_digits=30, decimal_places=2, null=True, blank=True)
@@ -111,6 +154,13 @@ class DisposicionFinal(TimeStampedModel):
             models.Index(fields=['epoch_salida']),
             models.Index(fields=['placa']),
             models.Index(fields=['concesion']),
-            models.Index(fields=['fecha_entrada']),
+            # También sirve de clave de paginación de los reportes (fecha_entrada, id)
+            models.Index(fields=['fecha_entrada', 'id']),
+            # Búsqueda por nombre normalizado del trigger que resuelve las llaves de los
+            # catálogos cuando uno de ellos cambia (migración 0014)
+            models.Index(Upper(Trim('concesion')), name='ingesta_dis_concesion_norm_idx'),
+            models.Index(Upper(Trim('ase')), name='ingesta_dis_ase_norm_idx'),
+            models.Index(Upper(Trim('servicio')), name='ingesta_dis_servicio_norm_idx'),
+            models.Index(Upper(Trim('zona_descarga')), name='ingesta_dis_zona_desc_norm_idx'),
         ]
         unique_together = ['fecha_entrada', 'hora_entrada', 'consecutivo_entrada']
\ No newline at end of file
@@ -0,0 +1,11 @@
+from .esquema import ProcesoSchema, CampoValidacion, EsquemaInvalido, compilar_esquema
+from .registro import RegistroEsquemas, registro_esquemas
+
+__all__ = [
+    'ProcesoSchema',
+    'CampoValidacion',
+    'EsquemaInvalido',
+    'compilar_esquema',
+    'RegistroEsquemas',
+    'registro_esquemas'
+]
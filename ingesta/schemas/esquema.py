@@ -0,0 +1,314 @@
+"""
+Esquemas compilados de los procesos de carga.
+
+Cada proceso definido en ``file_structure/`` se valida y se compila una sola vez en un
+``ProcesoSchema`` inmutable con todo lo que necesitan validadores y cargadores: cabeceras,
+posiciones de columnas, tipos, parámetros de lectura, campos de validación con sus
+transformaciones ya compiladas y el mapeo de catálogos.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from openpyxl.utils import column_index_from_string
+
+from globalfunctions.string_manager import get_string
+
+TIPOS_ARCHIVO = ('csv', 'xlsx')
+
+# Modos de carga en la tabla destino: ``copy`` inserta todas las filas (y la validación
+# rechaza registros existentes); ``upsert`` inserta o actualiza por la clave única
+MODOS_CARGA = ('copy', 'upsert')
+
+# Tipo de columna en pandas según el tipo declarado en ``validation``
+DTYPE_POR_TIPO = {
+    'date': 'datetime64[ns]',
+    'time': 'timedelta64[ns]',
+    'integer': 'Int64',
+    'decimal': 'float64',
+    'string': 'object',
+}
+
+
+class EsquemaInvalido(ValueError):
+    """
+    Error de una definición de proceso que no pasa la verificación de esquema.
+    """
+
+    def __init__(self, errores):
+        self.errores = list(errores)
+        super().__init__('; '.join(self.errores))
+
+
+def _congelar(valor):
+    """
+    Copia profunda de solo lectura de un valor leído de JSON.
+    """
+    if isinstance(valor, dict):
+        return MappingProxyType({clave: _congelar(item) for clave, item in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(item) for item in valor)
+    return valor
+
+
+def _descongelar(valor):
+    if isinstance(valor, Mapping):
+        return {clave: _descongelar(item) for clave, item in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(item) for item in valor]
+    return valor
+
+
+def version_config(process_config):
+    """
+    Hash SHA-256 de la definición de un proceso, independiente del orden de las claves.
+    """
+    contenido = json.dumps(process_config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+@dataclass(frozen=True)
+class CampoValidacion:
+    """
+    Campo de la clave de validación: columna del archivo, campo del modelo y la
+    transformación compilada que convierte la columna al valor de la base de datos.
+    """
+    field: str
+    db_field: str
+    type: Optional[str]
+    transform: Optional[Mapping]
+    transformar: Callable = field(repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class ProcesoSchema:
+    """
+    Definición compilada e inmutable de un tipo de proceso.
+    """
+    clave: str
+    subsecretaria: str
+    nombre: str
+    version: str
+    origen: str
+    file_type: str
+    file_start_row: int
+    file_start_col: str
+    file_end_col: str
+    header: tuple
+    indice_columnas: Mapping[str, int]
+    dtypes: Mapping[str, str]
+    parametros_lectura: Mapping
+    table_name: Optional[str]
+    modo_carga: str
+    validacion: tuple
+    columnas_modelo: Mapping[str, tuple]
+    catalog_mapping: Mapping[str, str]
+    catalog_required: tuple
+    catalog_optional: tuple
+    config: Mapping = field(repr=False, compare=False)
+
+    @property
+    def modelo(self):
+        """
+        Modelo de la tabla destino del proceso, o None si no tiene.
+        """
+        if not self.table_name:
+            return None
+        try:
+            return apps.get_model('ingesta', self.table_name)
+        except LookupError:
+            return None
+
+    @property
+    def catalogos_habilitados(self):
+        return bool(self.catalog_mapping)
+
+    def como_diccionario(self):
+        """
+        Retorna la definición original del proceso como diccionario (formato de los JSON).
+        """
+        return _descongelar(self.config)
+
+
+def _indice_columna(config, key, default, errores):
+    valor = config.get(key, default)
+    try:
+        return column_index_from_string(valor)
+    except (ValueError, TypeError, AttributeError):
+        errores.append(get_string('errors.schema_invalid_column', 'ingesta').format(key=key, value=valor))
+        return None
+
+
+def _verificar_campo_modelo(modelo, table_name, db_field, errores):
+    try:
+        modelo._meta.get_field(db_field)
+    except FieldDoesNotExist:
+        errores.append(get_string('errors.schema_unknown_db_field', 'ingesta').format(
+            table=table_name, db_field=db_field
+        ))
+
+
+def compilar_esquema(clave, subsecretaria, process_config, origen=''):
+    """
+    Verifica la definición de un proceso y la compila en un ``ProcesoSchema``.
+    Lanza ``EsquemaInvalido`` con la lista de problemas encontrados.
+    Los campos del modelo solo se verifican cuando los modelos ya están cargados.
+    """
+    # Importación diferida: ingesta.validators depende de este paquete
+    from ingesta.validators.catalog_validators import CatalogLookup
+    from ingesta.validators.transforms import TRANSFORMACIONES, compilar_transformacion
+
+    errores = []
+    config = process_config
+
+    file_type = config.get('file_type', 'csv')
+    if file_type not in TIPOS_ARCHIVO:
+        errores.append(get_string('errors.schema_file_type', 'ingesta').format(value=file_type))
+
+    header = tuple(config.get('header') or ())
+    if not header:
+        errores.append(get_string('errors.schema_header_empty', 'ingesta'))
+    repetidas = sorted({columna for columna in header if header.count(columna) > 1})
+    if repetidas:
+        errores.append(get_string('errors.schema_header_duplicated', 'ingesta').format(columns=', '.join(repetidas)))
+
+    file_start_row = config.get('file_start_row', 1)
+    file_start_col = config.get('file_start_col', 'A')
+    file_end_col = config.get('file_end_col', 'Z')
+    if file_type == 'xlsx':
+        inicio = _indice_columna(config, 'file_start_col', 'A', errores)
+        fin = _indice_columna(config, 'file_end_col', 'Z', errores)
+        if inicio is not None and fin is not None and header and fin - inicio + 1 != len(header):
+            errores.append(get_string('errors.schema_header_width', 'ingesta').format(
+                count=len(header), start=file_start_col, end=file_end_col, width=fin - inicio + 1
+            ))
+        parametros_lectura = {
+            'file_start_row': file_start_row,
+            'file_start_col': file_start_col,
+            'file_end_col': file_end_col,
+        }
+    else:
+        parametros_lectura = {
+            'delimiter': config.get('delimiter', ';'),
+            'dtype': str,
+            'keep_default_na': False,
+        }
+
+    table_name = config.get('table_name')
+    modo_carga = config.get('modo_carga', 'copy')
+    if modo_carga not in MODOS_CARGA:
+        errores.append(get_string('errors.schema_load_mode', 'ingesta').format(
+            value=modo_carga, modes=', '.join(MODOS_CARGA)
+        ))
+    modelo = None
+    if table_name and apps.models_ready:
+        try:
+            modelo = apps.get_model('ingesta', table_name)
+        except LookupError:
+            errores.append(get_string('errors.schema_unknown_model', 'ingesta').format(table=table_name))
+
+    dtypes = dict.fromkeys(header, 'object')
+    validacion = []
+    for field_config in config.get('validation', []):
+        field_name = field_config['field']
+        db_field = field_config.get('db_field', field_name.lower().replace(' ', '_'))
+        tipo = field_config.get('type')
+        transform = field_config.get('transform')
+        if field_name not in header:
+            errores.append(get_string('errors.schema_validation_field', 'ingesta').format(field=field_name))
+        if tipo is not None and tipo not in DTYPE_POR_TIPO:
+            errores.append(get_string('errors.schema_unknown_type', 'ingesta').format(type=tipo, field=field_name))
+        if transform and transform.get('function') not in TRANSFORMACIONES:
+            errores.append(get_string('errors.schema_unknown_transform', 'ingesta').format(
+                function=transform.get('function'), field=field_name
+            ))
+        if modelo is not None:
+            _verificar_campo_modelo(modelo, table_name, db_field, errores)
+        if field_name in dtypes and tipo in DTYPE_POR_TIPO:
+            dtypes[field_name] = DTYPE_POR_TIPO[tipo]
+        validacion.append(CampoValidacion(
+            field=field_name,
+            db_field=db_field,
+            type=tipo,
+            transform=_congelar(transform) if transform else None,
+            transformar=compilar_transformacion(field_config)
+        ))
+
+    # Campos del modelo en que se carga cada columna: column_mapping explícito (un campo, una
+    # lista de campos o null para omitir la columna) o, por defecto, el nombre de la columna
+    # normalizado si es un campo del modelo
+    column_mapping = config.get('column_mapping', {})
+    for column_name in column_mapping:
+        if column_name not in header:
+            errores.append(get_string('errors.schema_mapping_column', 'ingesta').format(field=column_name))
+    columnas_modelo = {}
+    if modelo is not None:
+        campos = {campo.name for campo in modelo._meta.concrete_fields}
+        asignados = set()
+        for column_name in header:
+            if column_name in column_mapping:
+                destino = column_mapping[column_name] or []
+                model_fields = tuple([destino] if isinstance(destino, str) else destino)
+            else:
+                model_field = column_name.lower().replace(' ', '_')
+                model_fields = (model_field,) if model_field in campos else ()
+            for model_field in model_fields:
+                if model_field not in campos:
+                    _verificar_campo_modelo(modelo, table_name, model_field, errores)
+                elif model_field in asignados:
+                    errores.append(get_string('errors.schema_mapping_duplicated', 'ingesta').format(db_field=model_field))
+                asignados.add(model_field)
+            if model_fields:
+                columnas_modelo[column_name] = model_fields
+
+    catalog_config = config.get('catalog_validation', {})
+    catalog_mapping = {}
+    catalog_required = ()
+    catalog_optional = ()
+    if catalog_config.get('enabled', False):
+        catalog_mapping = dict(catalog_config.get('field_mapping', {}))
+        catalog_required = tuple(catalog_config.get('required_fields', []))
+        catalog_optional = tuple(catalog_config.get('optional_fields', []))
+        if not catalog_mapping:
+            errores.append(get_string('errors.schema_catalog_empty', 'ingesta'))
+        for column_name, model_name in catalog_mapping.items():
+            if column_name not in header:
+                errores.append(get_string('errors.schema_catalog_column', 'ingesta').format(field=column_name))
+            if model_name not in CatalogLookup.MODELOS:
+                errores.append(get_string('errors.schema_catalog_model', 'ingesta').format(
+                    model=model_name, field=column_name
+                ))
+        for column_name in catalog_required + catalog_optional:
+            if column_name not in catalog_mapping:
+                errores.append(get_string('errors.schema_catalog_unmapped', 'ingesta').format(field=column_name))
+
+    if errores:
+        raise EsquemaInvalido(errores)
+
+    return ProcesoSchema(
+        clave=clave,
+        subsecretaria=subsecretaria,
+        nombre=config.get('nombre', clave),
+        version=version_config(config),
+        origen=origen,
+        file_type=file_type,
+        file_start_row=file_start_row,
+        file_start_col=file_start_col,
+        file_end_col=file_end_col,
+        header=header,
+        indice_columnas=MappingProxyType({columna: indice for indice, columna in enumerate(header)}),
+        dtypes=MappingProxyType(dtypes),
+        parametros_lectura=MappingProxyType(parametros_lectura),
+        table_name=table_name,
+        modo_carga=modo_carga,
+        validacion=tuple(validacion),
+        columnas_modelo=MappingProxyType(columnas_modelo),
+        catalog_mapping=MappingProxyType(catalog_mapping),
+        catalog_required=catalog_required,
+        catalog_optional=catalog_optional,
+        config=_congelar(config)
+    )
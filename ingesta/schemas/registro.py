@@ -0,0 +1,190 @@
+"""
+Registro de los esquemas de proceso definidos en ``file_structure/``.
+
+Los JSON se leen y compilan una sola vez; el registro revisa como máximo cada
+``INTERVALO_REVISION`` segundos si algún archivo cambió (fecha de modificación y tamaño)
+y en ese caso recompila todo. Así, un tipo de proceso nuevo queda disponible sin
+reiniciar el servidor. Si los archivos modificados no son válidos se conserva la
+versión anterior.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from globalfunctions.string_manager import get_string
+
+from .esquema import EsquemaInvalido, compilar_esquema
+
+DIRECTORIO_ESTRUCTURAS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'file_structure'
+)
+
+# Segundos entre revisiones de cambios en los archivos
+INTERVALO_REVISION = 1.0
+
+
+class RegistroEsquemas:
+    """
+    Esquemas compilados de todos los procesos, agrupados por subsecretaría.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_ESTRUCTURAS, intervalo=INTERVALO_REVISION):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._firma = None
+        self._revisado_en = 0.0
+        self._esquemas = MappingProxyType({})
+        self._subsecretarias = MappingProxyType({})
+        self._diccionario = {}
+        self.version = None
+
+    def _archivos(self):
+        """
+        Retorna la lista ordenada de (subsecretaria, ruta) de los JSON de procesos.
+        """
+        archivos = []
+        for subsecretaria in sorted(os.listdir(self.directorio)):
+            subsecretaria_path = os.path.join(self.directorio, subsecretaria)
+            if not os.path.isdir(subsecretaria_path):
+                continue
+            for file in sorted(os.listdir(subsecretaria_path)):
+                if file.endswith('.json'):
+                    archivos.append((subsecretaria, os.path.join(subsecretaria_path, file)))
+        return archivos
+
+    def _firma_archivos(self):
+        firma = []
+        for subsecretaria, path in self._archivos():
+            estado = os.stat(path)
+            firma.append((path, estado.st_mtime_ns, estado.st_size))
+        return tuple(firma)
+
+    def _compilar(self):
+        """
+        Lee y compila todos los JSON. Lanza ``EsquemaInvalido`` con los errores de todos
+        los procesos si alguno no es válido.
+        """
+        esquemas = {}
+        subsecretarias = {}
+        errores = []
+        for subsecretaria, path in self._archivos():
+            subsecretarias.setdefault(subsecretaria, get_string(f'subsecretaria.{subsecretaria}', 'ingesta'))
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    procesos = json.load(f)
+            except (OSError, ValueError) as e:
+                errores.append(get_string('errors.schema_unreadable', 'ingesta').format(path=path, error=e))
+                continue
+
+            for clave, process_config in procesos.items():
+                if clave in esquemas:
+                    errores.append(get_string('errors.schema_duplicate_process', 'ingesta').format(
+                        process=clave, path=path, other=esquemas[clave].origen
+                    ))
+                    continue
+                try:
+                    esquemas[clave] = compilar_esquema(clave, subsecretaria, process_config, origen=path)
+                except (EsquemaInvalido, KeyError, TypeError, AttributeError) as e:
+                    detalle = '; '.join(e.errores) if isinstance(e, EsquemaInvalido) else repr(e)
+                    errores.append(get_string('errors.schema_invalid', 'ingesta').format(
+                        process=clave, path=path, errors=detalle
+                    ))
+
+        if errores:
+            raise EsquemaInvalido(errores)
+        return esquemas, subsecretarias
+
+    def cargar(self):
+        """
+        Compila los esquemas de inmediato. Lanza ``EsquemaInvalido`` si alguno no es válido.
+        """
+        with self._lock:
+            firma = self._firma_archivos()
+            self._activar(*self._compilar(), firma)
+
+    def _activar(self, esquemas, subsecretarias, firma):
+        diccionario = {}
+        for subsecretaria, nombre in subsecretarias.items():
+            diccionario[subsecretaria] = {'nombre': nombre, 'procesos': {}}
+        for clave, esquema in esquemas.items():
+            diccionario[esquema.subsecretaria]['procesos'][clave] = esquema.como_diccionario()
+
+        self.version = hashlib.sha256(
+            ''.join(f'{clave}:{esquema.version}' for clave, esquema in sorted(esquemas.items())).encode('utf-8')
+        ).hexdigest()
+        self._esquemas = MappingProxyType(esquemas)
+        self._subsecretarias = MappingProxyType(subsecretarias)
+        self._diccionario = diccionario
+        self._firma = firma
+        self._revisado_en = time.monotonic()
+
+    def _actualizar(self):
+        """
+        Recompila los esquemas si los archivos cambiaron desde la última revisión.
+        """
+        if self._firma is not None and time.monotonic() - self._revisado_en < self.intervalo:
+            return
+        with self._lock:
+            if self._firma is not None and time.monotonic() - self._revisado_en < self.intervalo:
+                return
+            firma = self._firma_archivos()
+            if firma == self._firma:
+                self._revisado_en = time.monotonic()
+                return
+            primera_carga = self._firma is None
+            try:
+                esquemas, subsecretarias = self._compilar()
+            except EsquemaInvalido as e:
+                if primera_carga:
+                    raise
+                # Conservar la versión anterior hasta que los archivos se corrijan
+                print(get_string('messages.schema_reload_error', 'ingesta').format(error=e))
+                self._firma = firma
+                self._revisado_en = time.monotonic()
+                return
+            self._activar(esquemas, subsecretarias, firma)
+            if not primera_carga:
+                print(get_string('messages.schemas_reloaded', 'ingesta').format(version=self.version[:12]))
+
+    def esquemas(self):
+        """
+        Retorna un mapeo de solo lectura ``{tipo_proceso: ProcesoSchema}``.
+        """
+        self._actualizar()
+        return self._esquemas
+
+    def obtener(self, tipo_proceso, subsecretaria=None):
+        """
+        Retorna el esquema de un tipo de proceso, o None si no existe (o si no pertenece
+        a la subsecretaría indicada).
+        """
+        esquema = self.esquemas().get(tipo_proceso)
+        if esquema is None or (subsecretaria is not None and esquema.subsecretaria != subsecretaria):
+            return None
+        return esquema
+
+    def subsecretarias(self):
+        """
+        Retorna un mapeo de solo lectura ``{subsecretaria: nombre}``.
+        """
+        self._actualizar()
+        return self._subsecretarias
+
+    def subsecretaria_de(self, tipo_proceso):
+        esquema = self.obtener(tipo_proceso)
+        return esquema.subsecretaria if esquema else None
+
+    def como_diccionario(self):
+        """
+        Retorna la configuración agrupada por subsecretaría con el formato original
+        de ``load_process_config``: ``{subsecretaria: {'nombre': ..., 'procesos': {...}}}``.
+        """
+        self._actualizar()
+        return self._diccionario
+
+
+registro_esquemas = RegistroEsquemas()
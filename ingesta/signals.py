@@ -0,0 +1,20 @@
+"""
+Señales de la ingesta.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+
+from ingesta.models import DisposicionFinal
+
+# Se envía cuando cambian filas de DisposicionFinal sin pasar por save() o delete() del
+# modelo (cargas con COPY, purgas y actualizaciones en bloque), para que quien guarde
+# resultados calculados sobre la tabla (por ejemplo, los reportes) los descarte
+datos_disposicion_modificados = Signal()
+
+
+def notificar_datos_disposicion():
+    """
+    Envía ``datos_disposicion_modificados`` cuando la transacción actual se confirme
+    (de inmediato si no hay una transacción abierta).
+    """
+    transaction.on_commit(lambda: datos_disposicion_modificados.send(sender=DisposicionFinal))
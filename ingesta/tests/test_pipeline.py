@@ -0,0 +1,127 @@
+"""
+Flujo completo de una carga de disposición final sin servicios externos: el almacenamiento
+se reemplaza por ``MinioSistemaArchivos`` con ``MINIO_BACKEND=filesystem``.
+"""
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from openpyxl import Workbook
+
+from ingesta.forms.upload import PROCESO_DATA, PROCESS_TO_SUBSECRETARIA
+from ingesta.jobs.validacion import encolar_validacion, validar_carga
+from ingesta.models import Concesion, DisposicionFinal, ZonaDescarga
+
+TIPO_PROCESO = 'disposicion_final_pesaje'
+FILAS = 20
+
+
+def contenido_disposicion_final(filas):
+    """
+    Bytes de un XLSX válido de pesaje con ``filas`` viajes, en el formato que exporta la
+    báscula. openpyxl guarda la hora en las propiedades del libro, así que dos llamadas
+    pueden dar contenidos (y SHA-256) distintos.
+    """
+    encabezado = list(PROCESO_DATA['disposicion_final']['procesos'][TIPO_PROCESO]['header'])
+    libro = Workbook()
+    hoja = libro.active
+    for _ in range(5):
+        hoja.append([])
+    hoja.append([None] + encabezado)
+    inicio = datetime(2024, 1, 1, 6, 0)
+    for indice in range(filas):
+        fila = dict.fromkeys(encabezado)
+        fila.update({
+            'FECHA ENTRADA': inicio + timedelta(minutes=indice),
+            'FECHA SALIDA': inicio + timedelta(minutes=indice + 30),
+            'CONSECUTIVO ENTRADA': 100000 + indice,
+            'CONSECUTIVO SALIDA': 200000 + indice,
+            'PLACA': f'ABC{indice:03d}',
+            'NUMERO VEHICULO': str(indice),
+            'CONCESION': 'Area Limpia DC',
+            'SERVICIO': 'Domiciliario',
+            'ZONA DESCARGA': 'Fase 2 Optimizacion',
+            'PESO ENTRADA': 20000,
+            'PESO SALIDA': 9000.5,
+            'PESO RESIDUOS': 10999.5,
+            'MACRORUTA': 'M1',
+            'MICRORUTA': 'm2',
+        })
+        hoja.append([None] + [fila[columna] for columna in encabezado])
+    contenido = io.BytesIO()
+    libro.save(contenido)
+    return contenido.getvalue()
+
+
+class FlujoCargaTests(TransactionTestCase):
+    """
+    ``encolar_validacion`` → ``validar_carga`` → ``procesar_cargas --una-vez``. Es un
+    ``TransactionTestCase`` porque ``procesar_cargas`` carga desde hilos con su propia conexión.
+    """
+
+    # Con ``available_apps`` el vaciado entre pruebas usa TRUNCATE ... CASCADE, necesario
+    # porque la tabla de reports_dynamicreportconfig (sin modelo) referencia a auth_user
+    available_apps = ['django.contrib.auth', 'django.contrib.contenttypes', 'accounts', 'ingesta', 'reports']
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        entorno = mock.patch.dict(os.environ, {
+            'MINIO_BACKEND': 'filesystem',
+            'MINIO_FILESYSTEM_ROOT': os.path.join(self.directorio, 'minio'),
+        })
+        entorno.start()
+        self.addCleanup(entorno.stop)
+        ajustes = override_settings(
+            INGESTA_DIRECTORIO_TEMPORAL=os.path.join(self.directorio, 'temporal'),
+            REPORTES_DIRECTORIO_EXPORTACIONES=os.path.join(self.directorio, 'exportaciones'),
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.user = get_user_model().objects.create_user('cargador', password='x')
+        Concesion.objects.create(codigo='ALDC', nombre='Area Limpia DC', categoria='ORDINARIOS')
+        ZonaDescarga.objects.create(codigo='F2', nombre='Fase 2 Optimizacion', categoria='RELLENO')
+
+    def test_carga_completa(self):
+        registro, duplicado = encolar_validacion(
+            SimpleUploadedFile('pesaje.xlsx', contenido_disposicion_final(FILAS)), 'pesaje.xlsx', TIPO_PROCESO,
+            PROCESS_TO_SUBSECRETARIA.get(TIPO_PROCESO), self.user
+        )
+        self.assertIsNone(duplicado)
+        self.assertEqual(registro.estado, 'VALIDANDO')
+
+        self.assertTrue(validar_carga(registro), registro.mensaje_error)
+        registro.refresh_from_db()
+        self.assertEqual(registro.estado, 'EN_MINIO')
+        self.assertTrue(os.path.isfile(os.path.join(
+            os.environ['MINIO_FILESYSTEM_ROOT'], os.environ.get('MINIO_BUCKET_NAME', 'uaesp-ingesta-crudo'),
+            registro.path_minio
+        )))
+
+        call_command('procesar_cargas', una_vez=True, hilos=1, stdout=open(os.devnull, 'w'))
+        registro.refresh_from_db()
+        self.assertEqual(registro.estado, 'COMPLETADO', registro.mensaje_error)
+        self.assertEqual(registro.filas_insertadas, FILAS)
+        self.assertEqual(DisposicionFinal.objects.filter(registro_carga=registro).count(), FILAS)
+
+    def test_archivo_repetido(self):
+        contenido = contenido_disposicion_final(FILAS)
+        primero, _ = encolar_validacion(
+            SimpleUploadedFile('pesaje.xlsx', contenido), 'pesaje.xlsx', TIPO_PROCESO,
+            PROCESS_TO_SUBSECRETARIA.get(TIPO_PROCESO), self.user
+        )
+        validar_carga(primero)
+        registro, duplicado = encolar_validacion(
+            SimpleUploadedFile('pesaje.xlsx', contenido), 'pesaje.xlsx', TIPO_PROCESO,
+            PROCESS_TO_SUBSECRETARIA.get(TIPO_PROCESO), self.user
+        )
+        self.assertIsNone(registro)
+        self.assertEqual(duplicado.pk, primero.pk)
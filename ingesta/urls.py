@@ -7,6 +7,8 @@ app_name = 'ingesta'
 urlpatterns = [
     path('historial/', views.file_history_view, name='file_history'),
     path('cargar/', views.upload_file_view, name='upload_file'),
+    path('cargar_lote/', views.upload_batch_view, name='upload_batch'),
+    path('estado_validacion/<int:file_id>/', views.validation_status, name='validation_status'),
     path('download_file/<int:file_id>/', views.download_file, name='download_file'),
     path('download_error_file/', views.download_error_file, name='download_error_file'),
     path('delete_file/<int:file_id>/', views.delete_file, name='delete_file'),
@@ -1,9 +1,19 @@
-from .catalog_validators import CatalogValidator
+from .catalog_validators import CatalogValidator, CatalogLookup
 from .file_validators import validar_estructura_csv, validar_registros_existentes, transform_value
+from .error_report import (
+    construir_reporte_errores, nombre_reporte_errores, guardar_reporte_errores, leer_reporte_errores,
+    eliminar_reporte_errores
+)
 
 __all__ = [
     'CatalogValidator', 
+    'CatalogLookup',
     'validar_estructura_csv', 
     'validar_registros_existentes', 
-    'transform_value'
+    'transform_value',
+    'construir_reporte_errores',
+    'nombre_reporte_errores',
+    'guardar_reporte_errores',
+    'leer_reporte_errores',
+    'eliminar_reporte_errores'
 ]
@@ -1,7 +1,51 @@
+import pandas as pd
 from django.core.exceptions import ValidationError
 from ingesta.models import Concesion, ASE, Servicio, ZonaDescarga
 from globalfunctions.string_manager import get_string
 
+
+def normalizar_nombre_catalogo(value):
+    """
+    Normaliza un nombre de catálogo con la misma semántica que ``nombre__iexact``.
+    """
+    return str(value).strip().upper()
+
+
+class CatalogLookup:
+    """
+    Catálogos activos precargados en memoria para validar columnas completas.
+    Cada catálogo se consulta una sola vez y se guarda como un conjunto de nombres normalizados.
+    """
+
+    MODELOS = {
+        'Concesion': Concesion,
+        'ASE': ASE,
+        'Servicio': Servicio,
+        'ZonaDescarga': ZonaDescarga,
+    }
+
+    def __init__(self, model_names=None):
+        self._nombres = {}
+        for model_name in (model_names or self.MODELOS.keys()):
+            model = self.MODELOS[model_name]
+            nombres = model.objects.filter(activo=True).values_list('nombre', flat=True)
+            self._nombres[model_name] = frozenset(normalizar_nombre_catalogo(nombre) for nombre in nombres)
+
+    def contiene(self, model_name, value):
+        """
+        Indica si el valor existe en el catálogo activo.
+        """
+        return normalizar_nombre_catalogo(value) in self._nombres[model_name]
+
+    def contiene_valores(self, model_name, values):
+        """
+        Evalúa la pertenencia de una colección de valores (por ejemplo, los valores
+        distintos de una columna) y retorna una serie booleana alineada con ellos.
+        """
+        nombres = self._nombres[model_name]
+        values = pd.Series(values, dtype=object)
+        return values.map(lambda value: normalizar_nombre_catalogo(value) in nombres).astype(bool)
+
 class CatalogValidator:
     """
     Validador para verificar que los valores coincidan con los catálogos oficiales.
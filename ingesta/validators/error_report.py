@@ -0,0 +1,171 @@
+import io
+import os
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+from coreview.minio_utils import get_minio_client, get_minio_bucket
+from globalfunctions.string_manager import get_string
+
+
+def nombre_reporte_errores(original_filename):
+    """
+    Retorna el nombre con que se descarga el reporte de errores de un archivo.
+    """
+    return f"{get_string('errors.error_file_name_prefix', 'ingesta')}{original_filename.replace('.xlsx', '.csv').replace('.csv', '_errores.csv')}"
+
+
+def construir_reporte_errores(error_df, original_filename):
+    """
+    Construye el contenido CSV del reporte de errores de validación: un encabezado con
+    el resumen seguido del detalle por fila. Incluye BOM UTF-8 para que Excel lo abra
+    con la codificación correcta.
+    """
+    csv_buffer = io.StringIO()
+
+    # Agregar información del reporte al inicio
+    csv_buffer.write(get_string('errors.report_title', 'ingesta') + "\n")
+    csv_buffer.write(get_string('errors.report_original_file', 'ingesta').format(filename=original_filename) + "\n")
+    csv_buffer.write(get_string('errors.report_validation_date', 'ingesta').format(date=datetime.now().strftime('%Y-%m-%d %H:%M:%S')) + "\n")
+    csv_buffer.write(get_string('errors.report_total_rows_with_errors', 'ingesta').format(count=len(error_df)) + "\n")
+    csv_buffer.write(get_string('errors.report_total_errors_found', 'ingesta').format(count=error_df['Cantidad de Errores'].sum()) + "\n")
+    csv_buffer.write("\n")
+
+    # Escribir el DataFrame de errores con codificación UTF-8 explícita
+    error_df.to_csv(csv_buffer, index=False, sep=';', encoding='utf-8')
+    csv_content = csv_buffer.getvalue()
+    csv_buffer.close()
+
+    # Agregar BOM UTF-8 al inicio para compatibilidad con Excel
+    return '\ufeff' + csv_content
+
+
+# Almacenamiento de reportes: los reportes se guardan fuera de la sesión y se referencian por clave
+PREFIJO_REPORTES = 'reportes_errores/'
+TAMANO_BLOQUE_DESCARGA = 64 * 1024
+
+_minio_client = None
+
+
+def _cliente_minio():
+    global _minio_client
+    if _minio_client is None:
+        _minio_client = get_minio_client()
+    return _minio_client
+
+
+def _usa_minio():
+    return getattr(settings, 'INGESTA_REPORTES_ERRORES_ALMACENAMIENTO', 'minio') == 'minio'
+
+
+def _directorio_reportes():
+    directorio = os.path.join(settings.INGESTA_DIRECTORIO_TEMPORAL, PREFIJO_REPORTES)
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _ruta_local(clave):
+    # La clave es generada por guardar_reporte_errores; se descarta cualquier componente de ruta
+    return os.path.join(_directorio_reportes(), os.path.basename(clave))
+
+
+def guardar_reporte_errores(csv_content):
+    """
+    Guarda el contenido de un reporte de errores en MinIO (o en el directorio temporal,
+    según ``INGESTA_REPORTES_ERRORES_ALMACENAMIENTO``) y retorna la clave para descargarlo.
+    """
+    clave = f"{uuid.uuid4().hex}.csv"
+    contenido = csv_content.encode('utf-8')
+    if _usa_minio():
+        minio_client = _cliente_minio()
+        bucket = get_minio_bucket()
+        if not minio_client.bucket_exists(bucket):
+            minio_client.make_bucket(bucket)
+        minio_client.put_object(
+            bucket_name=bucket,
+            object_name=f"{PREFIJO_REPORTES}{clave}",
+            data=io.BytesIO(contenido),
+            length=len(contenido),
+            content_type='text/csv; charset=utf-8'
+        )
+    else:
+        with open(_ruta_local(clave), 'wb') as reporte:
+            reporte.write(contenido)
+    return clave
+
+
+def leer_reporte_errores(clave):
+    """
+    Genera el contenido de un reporte guardado en bloques, para enviarlo con una
+    respuesta en streaming sin cargarlo completo en memoria.
+    Lanza ``FileNotFoundError`` si el reporte no existe o ya venció.
+    """
+    if _usa_minio():
+        try:
+            respuesta = _cliente_minio().get_object(get_minio_bucket(), f"{PREFIJO_REPORTES}{clave}")
+        except S3Error as e:
+            if e.code == 'NoSuchKey':
+                raise FileNotFoundError(clave) from e
+            raise
+
+        def bloques_minio():
+            try:
+                yield from respuesta.stream(TAMANO_BLOQUE_DESCARGA)
+            finally:
+                respuesta.close()
+                respuesta.release_conn()
+        return bloques_minio()
+
+    archivo = open(_ruta_local(clave), 'rb')
+
+    def bloques_locales():
+        with archivo:
+            yield from iter(lambda: archivo.read(TAMANO_BLOQUE_DESCARGA), b'')
+    return bloques_locales()
+
+
+def limpiar_reportes_vencidos(antiguedad):
+    """
+    Elimina los reportes guardados hace más de ``antiguedad`` (timedelta) y retorna
+    las claves eliminadas.
+    """
+    limite = timezone.now() - antiguedad
+    eliminadas = []
+    if _usa_minio():
+        minio_client = _cliente_minio()
+        bucket = get_minio_bucket()
+        if not minio_client.bucket_exists(bucket):
+            return eliminadas
+        vencidos = [
+            objeto.object_name
+            for objeto in minio_client.list_objects(bucket, prefix=PREFIJO_REPORTES, recursive=True)
+            if objeto.last_modified and objeto.last_modified < limite
+        ]
+        if vencidos:
+            errores = minio_client.remove_objects(bucket, (DeleteObject(nombre) for nombre in vencidos))
+            fallidos = {error.name for error in errores}
+            eliminadas = [nombre[len(PREFIJO_REPORTES):] for nombre in vencidos if nombre not in fallidos]
+    else:
+        limite_local = limite.timestamp()
+        for entrada in os.scandir(_directorio_reportes()):
+            if entrada.is_file() and entrada.stat().st_mtime < limite_local:
+                os.remove(entrada.path)
+                eliminadas.append(entrada.name)
+    return eliminadas
+
+
+def eliminar_reporte_errores(clave):
+    """
+    Elimina un reporte guardado. No falla si el reporte ya no existe.
+    """
+    if _usa_minio():
+        _cliente_minio().remove_object(get_minio_bucket(), f"{PREFIJO_REPORTES}{clave}")
+        return
+    try:
+        os.remove(_ruta_local(clave))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,103 @@
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+
+class LectorBloquesXlsx:
+    """
+    Lector de archivos XLSX en modo de solo lectura que recorre la hoja fila por fila.
+    Lee primero la fila de encabezados (``file_start_row`` entre ``file_start_col`` y
+    ``file_end_col``) para poder validarla antes de procesar datos, y luego entrega las
+    filas en bloques de tamaño acotado, de modo que la memoria no crece con el archivo.
+    """
+
+    def __init__(self, uploaded_file, file_start_row, file_start_col, file_end_col, tamano_bloque):
+        self.file_start_row = max(file_start_row, 1)
+        self.tamano_bloque = tamano_bloque
+        self._min_col = column_index_from_string(file_start_col)
+        self._max_col = column_index_from_string(file_end_col)
+        self._ancho = self._max_col - self._min_col + 1
+
+        self._workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        # pd.read_excel usa la primera hoja por defecto
+        hoja = self._workbook.worksheets[0]
+        self._filas = hoja.iter_rows(
+            min_row=self.file_start_row,
+            min_col=self._min_col,
+            max_col=self._max_col,
+            values_only=True
+        )
+        self.encabezados = self._leer_encabezados()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+    def cerrar(self):
+        self._workbook.close()
+
+    def _completar_fila(self, fila):
+        fila = tuple(fila)
+        if len(fila) < self._ancho:
+            fila += (None,) * (self._ancho - len(fila))
+        return fila
+
+    def _leer_encabezados(self):
+        """
+        Lee la fila de encabezados y nombra las columnas como lo haría ``pd.read_excel``:
+        las celdas vacías quedan como ``Unnamed: n`` y los nombres repetidos reciben sufijo.
+        """
+        fila = next(self._filas, None)
+        if fila is None:
+            return []
+
+        encabezados = []
+        vistos = {}
+        for posicion, valor in enumerate(self._completar_fila(fila)):
+            nombre = f"Unnamed: {posicion}" if valor is None else valor
+            if nombre in vistos:
+                vistos[nombre] += 1
+                nombre = f"{nombre}.{vistos[nombre]}"
+            else:
+                vistos[nombre] = 0
+            encabezados.append(nombre)
+
+        # Descartar columnas vacías al final, como lo hace pandas
+        while encabezados and str(encabezados[-1]).startswith('Unnamed: '):
+            encabezados.pop()
+        return encabezados
+
+    def bloques(self):
+        """
+        Genera DataFrames de a lo sumo ``tamano_bloque`` filas.
+        Las filas vacías intermedias se conservan (como en ``pd.read_excel``) y las finales
+        se descartan. El índice de cada fila es su desplazamiento respecto a la fila de
+        encabezados (base 0), por lo que ``file_start_row + índice + 1`` es su número de fila.
+        """
+        ancho = len(self.encabezados)
+        fila_vacia = (None,) * ancho
+        filas = []
+        indices = []
+        vacias_pendientes = range(0)
+        for desplazamiento, fila in enumerate(self._filas):
+            fila = self._completar_fila(fila)[:ancho]
+            if all(valor is None for valor in fila):
+                # Solo se emiten si aparece una fila con datos después
+                if not vacias_pendientes:
+                    vacias_pendientes = range(desplazamiento, desplazamiento)
+                vacias_pendientes = range(vacias_pendientes.start, desplazamiento + 1)
+                continue
+            for indice_vacia in vacias_pendientes:
+                filas.append(fila_vacia)
+                indices.append(indice_vacia)
+            vacias_pendientes = range(0)
+            filas.append(fila)
+            indices.append(desplazamiento)
+            if len(filas) >= self.tamano_bloque:
+                yield pd.DataFrame.from_records(filas, columns=self.encabezados, index=indices)
+                filas = []
+                indices = []
+        if filas:
+            yield pd.DataFrame.from_records(filas, columns=self.encabezados, index=indices)
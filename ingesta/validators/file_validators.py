@@ -1,123 +1,165 @@
-import io
+import uuid
+
 import pandas as pd
-from io import StringIO
-from ..forms.upload import PROCESO_DATA
+from django.conf import settings
+from django.db import connection, transaction
+from globalfunctions.db_copy import copiar_dataframe
 from globalfunctions.string_manager import get_string
-from django.db.models import Q
-from ingesta.models import DisposicionFinal
-from django.apps import apps
-from datetime import datetime
-from ingesta.validators.catalog_validators import CatalogValidator
+from ingesta.schemas import registro_esquemas
+from ingesta.validators.catalog_validators import CatalogLookup, CatalogValidator
+from ingesta.validators.file_readers import LectorBloquesXlsx
+from ingesta.validators.transforms import transformar_columna, transformar_entero, transformar_fecha
 
 def transform_value(value, transform_config):
     """
     Transforma un valor según la configuración para coincidir con el formato de la base de datos.
+    Para columnas completas use ``ingesta.validators.transforms``, que aplica la misma lógica vectorizada.
     """
     if not transform_config:
         return value
 
-    function_name = transform_config.get('function')
-    args = transform_config.get('args', {})
+    resultado = transformar_columna(pd.Series([value], dtype=object), transform_config).iloc[0]
+    if pd.isna(resultado):
+        return value
 
+    function_name = transform_config.get('function')
     if function_name == 'transform_date':
-        try:
-            if isinstance(value, str):
-                # Intentar analizar la cadena de fecha
-                try:
-                    # Primero intentar analizar como datetime
-                    dt = pd.to_datetime(value)
-                    return dt.strftime('%Y-%m-%d')
-                except:
-                    # Si falla, intentar formatos comunes
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%m-%d-%Y']:
-                        try:
-                            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
-                        except ValueError:
-                            continue
-            elif isinstance(value, datetime):
-                return value.strftime('%Y-%m-%d')
-            return value
-        except Exception:
-            return value
+        return resultado.strftime('%Y-%m-%d')
     elif function_name == 'transform_integer':
-        try:
-            if isinstance(value, str):
-                # Eliminar cualquier carácter no numérico excepto el punto decimal
-                cleaned = ''.join(c for c in value if c.isdigit() or c == '.')
-                return int(float(cleaned))
-            return int(value)
-        except (ValueError, TypeError):
-            return value
-    elif function_name == 'split_text':
-        try:
-            character = args.get('character', ' ')
-            position = args.get('position', 0)
-            return value.split(character)[position]
-        except (ValueError, TypeError):
-            return value
-    return value
-
-def validar_registros_existentes(df, proceso_config):
+        return int(resultado)
+    return resultado
+
+def _modelo_validacion(esquema):
     """
-    Valida si algún registro ya existe en la base de datos verificando solo un registro.
-    Dado que los archivos provienen de interventoría y cubren meses completos, verificar un registro es suficiente.
-    Retorna una tupla (bool, str): (es_valido, mensaje_error)
+    Retorna el modelo y los campos de validación del proceso, o (None, None) si no aplica.
     """
-    # Obtener nombre de tabla de la configuración
-    table_name = proceso_config.get('table_name')
-    if not table_name:
-        return True, None
+    model = esquema.modelo
+    if model is None or not esquema.validacion:
+        return None, None
+    return model, esquema.validacion
 
-    # Obtener clase del modelo desde el nombre de la tabla
-    try:
-        model = apps.get_model('ingesta', table_name)
-    except LookupError:
-        return True, None
+def extraer_claves_validacion(df, esquema):
+    """
+    Transforma las columnas de validación de un bloque de filas a los valores que se
+    guardan en la base de datos, aplicando las transformaciones por columna completa.
+    Retorna un DataFrame con la columna 'Fila' (número de fila en el archivo) y una
+    columna por cada ``db_field``, o None si el proceso no define validación.
+    Las filas con alguna parte de la clave vacía o inválida se descartan.
+    """
+    model, validation_fields = _modelo_validacion(esquema)
+    if model is None or df.empty:
+        return None
 
-    # Obtener campos de validación de la configuración
-    validation_fields = proceso_config.get('validation', [])
-    if not validation_fields:
-        return True, None
+    claves = pd.DataFrame({'Fila': df.index + esquema.file_start_row + 1})
+    for campo in validation_fields:
+        db_field = campo.db_field
+        if campo.field not in df.columns:
+            return None
+
+        serie = campo.transformar(df[campo.field])
+
+        # Normalizar al formato de texto con que se comparan en la base de datos
+        tipo_db = model._meta.get_field(db_field).get_internal_type()
+        if tipo_db == 'DateField' or pd.api.types.is_datetime64_any_dtype(serie):
+            serie = transformar_fecha(serie).dt.strftime('%Y-%m-%d')
+        elif campo.type == 'integer' or tipo_db in ('IntegerField', 'BigIntegerField'):
+            serie = transformar_entero(serie)
+            serie = serie.astype(str).where(serie.notna())
+        else:
+            serie = serie.map(lambda value: str(value).strip() if pd.notna(value) else None)
+            serie = serie.where(serie != '')
+        claves[db_field] = serie.values
+
+    return claves.dropna().reset_index(drop=True)
+
+def buscar_registros_existentes(claves, esquema):
+    """
+    Compara todas las claves del archivo contra la tabla del proceso en una sola
+    consulta basada en conjuntos: en PostgreSQL las claves se copian con COPY a una
+    tabla temporal y se cruzan con un JOIN. Retorna el subconjunto de ``claves`` que
+    ya existe en la base de datos, ordenado por fila.
+    """
+    model, validation_fields = _modelo_validacion(esquema)
+    if model is None or claves is None or claves.empty:
+        return claves.iloc[0:0] if claves is not None else None
+
+    db_fields = [columna for columna in claves.columns if columna != 'Fila']
+    table_name = model._meta.db_table
+
+    if connection.vendor == 'postgresql':
+        tabla_temporal = f"tmp_claves_{uuid.uuid4().hex[:12]}"
+        definicion = ', '.join(
+            f'"{db_field}" {model._meta.get_field(db_field).db_type(connection)}' for db_field in db_fields
+        )
+        condiciones = ' AND '.join(f't."{db_field}" = d."{db_field}"' for db_field in db_fields)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMP TABLE {tabla_temporal} ("Fila" bigint, {definicion}) ON COMMIT DROP')
+            copiar_dataframe(cursor, tabla_temporal, claves)
+            cursor.execute(f'ANALYZE {tabla_temporal}')
+            cursor.execute(
+                f'SELECT DISTINCT t."Fila" FROM {tabla_temporal} t '
+                f'JOIN "{table_name}" d ON {condiciones}'
+            )
+            filas_existentes = {row[0] for row in cursor.fetchall()}
+    else:
+        # Otros motores: traer las claves existentes por lotes del primer campo y cruzarlas en memoria
+        primer_campo = db_fields[0]
+        valores = claves[primer_campo].unique().tolist()
+        existentes = set()
+        for inicio in range(0, len(valores), 1000):
+            lote = valores[inicio:inicio + 1000]
+            for registro in model.objects.filter(**{f'{primer_campo}__in': lote}).values_list(*db_fields):
+                existentes.add(tuple(str(value) for value in registro))
+        claves_tuplas = claves[db_fields].astype(str).apply(tuple, axis=1)
+        filas_existentes = set(claves.loc[claves_tuplas.isin(existentes), 'Fila'])
+
+    return claves[claves['Fila'].isin(filas_existentes)].sort_values('Fila').reset_index(drop=True)
+
+def _resultado_registros_existentes(existentes, esquema):
+    """
+    Construye el mensaje y el reporte de filas que ya existen en la base de datos.
+    Retorna una tupla (mensaje_error, dataframe_error) o (None, None).
+    """
+    if existentes is None or existentes.empty:
+        return None, None
+
+    nombres_campos = {campo.db_field: campo.field for campo in esquema.validacion}
+    db_fields = [columna for columna in existentes.columns if columna != 'Fila']
+    descripcion_clave = pd.Series('', index=existentes.index)
+    for posicion, db_field in enumerate(db_fields):
+        separador = ', ' if posicion else ''
+        descripcion_clave = descripcion_clave + f"{separador}{nombres_campos.get(db_field, db_field)}: " + existentes[db_field].astype(str)
+
+    error_df = pd.DataFrame({
+        'Fila': existentes['Fila'].values,
+        'Cantidad de Errores': 1,
+        'Descripción de Errores': get_string('errors.existing_record_row', 'ingesta') + ' (' + descripcion_clave + ')',
+    })
 
-    # Transformar valores según la configuración solo para la primera fila
-    if df.empty:
+    filas = existentes['Fila'].tolist()
+    error_message = get_string('errors.file_has_overlapping_records', 'ingesta').format(
+        count=len(filas),
+        rows=', '.join(str(fila) for fila in filas[:10]) + ('...' if len(filas) > 10 else '')
+    )
+    return error_message, error_df
+
+def validar_registros_existentes(df, esquema):
+    """
+    Valida si alguna fila del archivo ya existe en la base de datos según los campos
+    de validación del proceso. Se comparan las claves de todas las filas, no solo la primera,
+    para detectar archivos que se traslapan parcialmente con cargas anteriores.
+    Retorna una tupla (bool, str): (es_valido, mensaje_error)
+    """
+    claves = extraer_claves_validacion(df, esquema)
+    if claves is None:
         return True, None
-    
-    first_row = df.iloc[0]
-    transformed_row = {}
-    
-    for field_config in validation_fields:
-        field_name = field_config['field']
-        field_type = field_config.get('type')
-        transform_config = field_config.get('transform')
-        
-        if field_name in first_row and pd.notna(first_row[field_name]):
-            value = first_row[field_name]
-            
-            # Aplicar transformación basada en el tipo de campo si no se proporciona una transformación específica
-            if not transform_config and field_type:
-                if field_type == 'date':
-                    transform_config = {'function': 'transform_date'}
-                elif field_type == 'integer':
-                    transform_config = {'function': 'transform_integer'}
-            
-            if transform_config:
-                value = transform_value(value, transform_config)
-            
-            transformed_row[field_name] = value
-
-    # Verificar si esta combinación de campos ya existe en la base de datos
-    query = Q()
-    for field_config in validation_fields:
-        field_name = field_config['field']
-        db_field = field_config.get('db_field', field_name.lower().replace(' ', '_'))
-        
-        if field_name in transformed_row:
-            query &= Q(**{db_field: transformed_row[field_name]})
 
-    # Si tenemos una consulta válida y existen registros, retornar False
-    if query and model.objects.filter(query).exists():
-        return False, get_string('errors.file_has_existing_records', 'ingesta')
+    error_message, _ = _resultado_registros_existentes(
+        buscar_registros_existentes(claves, esquema),
+        esquema
+    )
+    if error_message:
+        return False, error_message
 
     return True, None
 
@@ -131,138 +173,177 @@ def get_catalog_error_message(field, value, error_string_key):
         return get_string(error_string_key, 'ingesta').format(ase=value)
     elif 'zona' in error_string_key:
         return get_string(error_string_key, 'ingesta').format(zona=value)
+    elif 'servicio' in error_string_key:
+        return get_string(error_string_key, 'ingesta').format(servicio=value)
     else:
         # Fallback para otros tipos
         return get_string(error_string_key, 'ingesta').format(value=value)
 
-def validar_catalogos_y_generar_log(df, proceso_config):
+# Strings de error por modelo de catálogo
+CATALOG_ERROR_STRINGS = {
+    'Concesion': 'errors.invalid_concesion',
+    'ASE': 'errors.invalid_ase',
+    'ZonaDescarga': 'errors.invalid_zona_descarga',
+    'Servicio': 'errors.invalid_servicio',
+}
+
+def _mensajes_columna_catalogo(serie, field, model_name, catalogos, requerido, mensaje_vacio):
+    """
+    Calcula el mensaje de error de cada fila de una columna de catálogo.
+    Cada valor distinto se normaliza y se busca en el catálogo una sola vez;
+    el resultado se expande a todas las filas con los códigos de ``pd.factorize``.
+    Retorna un arreglo con el mensaje de error o None por fila.
+    """
+    codigos, unicos = pd.factorize(serie)
+    # El código -1 corresponde a valores nulos, que se tratan como texto vacío
+    textos = pd.Series([str(value).strip() for value in unicos] + [''], dtype=object)
+    no_vacios = textos != ''
+    existe = pd.Series(False, index=textos.index)
+    existe[no_vacios] = catalogos.contiene_valores(model_name, textos[no_vacios]).values
+
+    mensajes = pd.Series(None, index=textos.index, dtype=object)
+    error_string_key = CATALOG_ERROR_STRINGS[model_name]
+    for posicion in textos.index[no_vacios & ~existe]:
+        mensajes[posicion] = get_catalog_error_message(field, textos[posicion], error_string_key)
+    if requerido:
+        mensajes[~no_vacios] = mensaje_vacio
+
+    return mensajes.values[codigos]
+
+def _errores_catalogo_bloque(df, esquema, catalogos):
+    """
+    Valida las columnas de catálogo de un bloque de filas.
+    Retorna una tupla (dataframe_error, total_errores); el DataFrame es None si no hay errores.
+    """
+    catalog_mapping = esquema.catalog_mapping
+
+    mensaje_vacio = get_string('errors.required_field_empty', 'ingesta')
+
+    # Mensajes por columna, en el mismo orden en que se reportan dentro de cada fila
+    columnas_mensajes = []
+    for field in esquema.catalog_required:
+        if field in df.columns:
+            columnas_mensajes.append(_mensajes_columna_catalogo(
+                df[field], field, catalog_mapping[field], catalogos,
+                requerido=True,
+                mensaje_vacio=f"{field.title()}: {mensaje_vacio}"
+            ))
+    for field in esquema.catalog_optional:
+        if field in df.columns:
+            columnas_mensajes.append(_mensajes_columna_catalogo(
+                df[field], field, catalog_mapping[field], catalogos,
+                requerido=False,
+                mensaje_vacio=None
+            ))
+
+    if not columnas_mensajes or df.empty:
+        return None, 0
+
+    # Combinar los mensajes de todas las columnas con máscaras booleanas
+    cantidad = pd.Series(0, index=df.index)
+    descripcion = pd.Series(None, index=df.index, dtype=object)
+    for mensajes in columnas_mensajes:
+        mensajes = pd.Series(mensajes, index=df.index, dtype=object)
+        cantidad += mensajes.notna()
+        descripcion = (descripcion + '; ' + mensajes).fillna(descripcion).fillna(mensajes)
+
+    con_errores = cantidad > 0
+    total_errors = int(cantidad.sum())
+    if total_errors == 0:
+        return None, 0
+
+    # Obtener la configuración del archivo para calcular el número de fila correcto
+    # file_start_row es la fila donde empiezan los datos (1-based)
+    # el índice del DataFrame es 0-based; sumamos 1 para convertir a 1-based
+    error_df = pd.DataFrame({
+        'Fila': df.index[con_errores] + esquema.file_start_row + 1,
+        'Cantidad de Errores': cantidad[con_errores].values,
+        'Descripción de Errores': descripcion[con_errores].values,
+    })
+    return error_df, total_errors
+
+def _resultado_errores_catalogo(error_dfs, total_errors):
+    """
+    Consolida los errores de catálogo de todos los bloques en (mensaje_error, dataframe_error).
+    """
+    if total_errors == 0:
+        return None, None
+
+    error_df = pd.concat(error_dfs, ignore_index=True)
+    error_message = get_string('errors.catalog_validation_errors_found', 'ingesta').format(
+        error_count=total_errors,
+        row_count=len(error_df)
+    )
+    return error_message, error_df
+
+def validar_catalogos_y_generar_log(df, esquema, catalogos=None):
     """
     Valida los catálogos en el archivo y genera un DataFrame con los errores encontrados.
+    Los catálogos activos se cargan una sola vez (o se reciben precargados en ``catalogos``)
+    y cada columna se valida completa, por lo que el costo depende de la cantidad de
+    valores distintos y no de la cantidad de filas.
     Retorna una tupla (mensaje_error, dataframe_error).
     """
-    from ingesta.models import Concesion, ASE, ZonaDescarga
-    
-    # Verificar si la validación de catálogos está habilitada para este proceso
-    catalog_config = proceso_config.get('catalog_validation', {})
-    if not catalog_config.get('enabled', False):
+    if not esquema.catalogos_habilitados:
         return None, None
-    
-    # Obtener configuración específica del proceso
-    required_fields = catalog_config.get('required_fields', [])
-    optional_fields = catalog_config.get('optional_fields', [])
-    field_mapping = catalog_config.get('field_mapping', {})
-    
-    # Mapeo de nombres de columnas a modelos y strings de error
-    catalog_mapping = {}
-    error_string_mapping = {}
-    for column_name, model_name in field_mapping.items():
-        if model_name == 'Concesion':
-            catalog_mapping[column_name] = Concesion
-            error_string_mapping[column_name] = 'errors.invalid_concesion'
-        elif model_name == 'ASE':
-            catalog_mapping[column_name] = ASE
-            error_string_mapping[column_name] = 'errors.invalid_ase'
-        elif model_name == 'ZonaDescarga':
-            catalog_mapping[column_name] = ZonaDescarga
-            error_string_mapping[column_name] = 'errors.invalid_zona_descarga'
-    
-    # Validar que la configuración sea correcta
-    if not catalog_mapping:
-        print(get_string('messages.catalog_mapping_warning', 'ingesta'))
-        return None, None
-    
-    error_rows = []
-    total_errors = 0
-    
-    # Obtener la configuración del archivo para calcular el número de fila correcto
-    file_start_row = proceso_config.get('file_start_row', 1)
-    
-    for index, row in df.iterrows():
-        row_errors = []
-        # Calcular el número de fila real en el archivo original
-        # file_start_row es la fila donde empiezan los datos (1-based)
-        # index es el índice del DataFrame (0-based)
-        # Sumamos 1 para convertir a 1-based
-        row_number = file_start_row + index + 1
-        
-        # Validar campos requeridos
-        for field in required_fields:
-            if field in df.columns:
-                value = str(row[field]).strip() if pd.notna(row[field]) else ''
-                
-                if not value:
-                    row_errors.append(f"{field.title()}: {get_string('errors.required_field_empty', 'ingesta')}")
-                    total_errors += 1
-                else:
-                    # Verificar si existe en el catálogo
-                    model = catalog_mapping[field]
-                    exists = model.objects.filter(
-                        nombre__iexact=value,
-                        activo=True
-                    ).exists()
-                    if not exists:
-                        # Usar el string correspondiente del archivo JSON
-                        error_string_key = error_string_mapping[field]
-                        error_message = get_catalog_error_message(field, value, error_string_key)
-                        row_errors.append(error_message)
-                        total_errors += 1
-
-        # Validar campos opcionales
-        for field in optional_fields:
-            if field in df.columns:
-                value = str(row[field]).strip() if pd.notna(row[field]) else ''
-                
-                if value:  # Solo validar si no está vacío
-                    model = catalog_mapping[field]
-                    exists = model.objects.filter(
-                        nombre__iexact=value,
-                        activo=True
-                    ).exists()
-                    
-                    if not exists:
-                        # Usar el string correspondiente del archivo JSON
-                        error_string_key = error_string_mapping[field]
-                        error_message = get_catalog_error_message(field, value, error_string_key)
-                        row_errors.append(error_message)
-                        total_errors += 1
-
-        # Si hay errores en esta fila, agregarla al reporte
-        if row_errors:
-            error_row = {
-                'Fila': row_number,
-                'Cantidad de Errores': len(row_errors),
-                'Descripción de Errores': '; '.join(row_errors)
-            }
-            error_rows.append(error_row)
-    # Crear DataFrame de errores
-    error_df = pd.DataFrame(error_rows) if error_rows else pd.DataFrame()
-    
-    # Generar mensaje de error
-    if total_errors > 0:
-        error_message = get_string('errors.catalog_validation_errors_found', 'ingesta').format(
-            error_count=total_errors,
-            row_count=len(error_rows)
-        )
-        return error_message, error_df
-    
-    return None, None
 
-def validar_estructura_csv(uploaded_file, subsecretaria, tipo_proceso):
-    # Obtener configuración del proceso de PROCESO_DATA
-    proceso_config = PROCESO_DATA.get(subsecretaria, {}).get('procesos', {}).get(tipo_proceso, {})
+    if catalogos is None:
+        catalogos = CatalogLookup(set(esquema.catalog_mapping.values()))
 
-    if not proceso_config:
-        return False, get_string('errors.no_process_structure', 'ingesta').format(process_type=tipo_proceso)
+    error_df, total_errors = _errores_catalogo_bloque(df, esquema, catalogos)
+    return _resultado_errores_catalogo([error_df], total_errors)
+
+def _mensaje_cabeceras_invalidas(cabeceras_esperadas, cabeceras_reales, tipo_proceso):
+    """
+    Construye el mensaje de error cuando las cabeceras del archivo no coinciden.
+    """
+    print(get_string('messages.headers_expected', 'ingesta').format(
+        process_type=tipo_proceso,
+        headers=cabeceras_esperadas
+    ))
+    print(get_string('messages.headers_found', 'ingesta').format(headers=cabeceras_reales))
 
-    cabeceras_esperadas = proceso_config.get('header', None)
-    file_type = proceso_config.get('file_type', 'csv')
-    file_start_row = proceso_config.get('file_start_row', 0)
-    file_start_col = proceso_config.get('file_start_col', 'A')
-    file_end_col = proceso_config.get('file_end_col', 'Z')
+    msg_error = get_string('errors.headers_mismatch', 'ingesta').format(
+        expected_count=len(cabeceras_esperadas),
+        found_count=len(cabeceras_reales)
+    )
 
-    if not cabeceras_esperadas:
+    faltan = set(cabeceras_esperadas) - set(cabeceras_reales)
+    sobran = set(cabeceras_reales) - set(cabeceras_esperadas)
+
+    if faltan:
+        msg_error += get_string('errors.missing_columns', 'ingesta').format(
+            columns=', '.join(list(faltan)[:3]) + ('...' if len(faltan)>3 else '')
+        )
+    if sobran:
+        msg_error += get_string('errors.extra_columns', 'ingesta').format(
+            columns=', '.join(str(columna) for columna in list(sobran)[:3]) + ('...' if len(sobran)>3 else '')
+        )
+    return msg_error
+
+def _bloques_csv(uploaded_file, esquema, tamano_bloque):
+    """
+    Lee un archivo CSV en bloques de ``tamano_bloque`` filas.
+    """
+    return pd.read_csv(uploaded_file, chunksize=tamano_bloque, **esquema.parametros_lectura)
+
+def validar_estructura_csv(uploaded_file, subsecretaria, tipo_proceso, progreso=None):
+    """
+    Valida la estructura y el contenido de un archivo de carga.
+    Si se indica ``progreso``, se llama como ``progreso(filas_leidas, errores_encontrados)``
+    después de cada bloque de filas, para reportar el avance de validaciones en segundo plano.
+    """
+    # Obtener el esquema compilado del proceso
+    esquema = registro_esquemas.obtener(tipo_proceso, subsecretaria)
+
+    if esquema is None:
         return False, get_string('errors.no_process_structure', 'ingesta').format(process_type=tipo_proceso)
 
+    cabeceras_esperadas = list(esquema.header)
+    file_type = esquema.file_type
+    tamano_bloque = getattr(settings, 'INGESTA_TAMANO_BLOQUE_FILAS', 10000)
+
+    lector_xlsx = None
     try:
         uploaded_file.seek(0)
         
@@ -278,54 +359,62 @@ def validar_estructura_csv(uploaded_file, subsecretaria, tipo_proceso):
 
         # Leer archivo basado en la configuración
         if file_type == 'xlsx':
-            # Leer archivo XLSX con fila de inicio y columnas configuradas
-            df = pd.read_excel(
-                uploaded_file,
-                header=file_start_row - 1,  # Convertir a índice basado en 0
-                usecols=f"{file_start_col}:{file_end_col}"
-            )
+            # Leer en modo de solo lectura: primero la fila de cabeceras y luego bloques de filas
+            lector_xlsx = LectorBloquesXlsx(uploaded_file, tamano_bloque=tamano_bloque, **esquema.parametros_lectura)
+            cabeceras_reales = lector_xlsx.encabezados
+            if not cabeceras_reales:
+                return False, get_string('errors.file_empty', 'ingesta')
+            # Fallar rápido si las cabeceras no coinciden, antes de leer datos
+            if cabeceras_reales != cabeceras_esperadas:
+                return False, _mensaje_cabeceras_invalidas(cabeceras_esperadas, cabeceras_reales, tipo_proceso)
+            bloques = lector_xlsx.bloques()
         else:
-            # Para archivos CSV, mantener la lógica existente
-            df = pd.read_csv(io.BytesIO(uploaded_file.read()), delimiter=';', dtype=str, keep_default_na=False)
-        
-        uploaded_file.seek(0)
+            # Para archivos CSV, las cabeceras se conocen con el primer bloque
+            bloques = _bloques_csv(uploaded_file, esquema, tamano_bloque)
 
-        if df.empty:
-            return False, get_string('errors.file_empty', 'ingesta')
+        catalog_mapping = esquema.catalog_mapping
+        catalogos = CatalogLookup(set(catalog_mapping.values())) if catalog_mapping else None
+        error_dfs = []
+        claves = []
+        total_errors = 0
+        total_filas = 0
 
-        cabeceras_reales = df.columns.tolist()
-        if cabeceras_reales != cabeceras_esperadas:
-            print(get_string('messages.headers_expected', 'ingesta').format(
-                process_type=tipo_proceso,
-                headers=cabeceras_esperadas
-            ))
-            print(get_string('messages.headers_found', 'ingesta').format(headers=cabeceras_reales))
-            
-            msg_error = get_string('errors.headers_mismatch', 'ingesta').format(
-                expected_count=len(cabeceras_esperadas),
-                found_count=len(cabeceras_reales)
-            )
+        for bloque in bloques:
+            if total_filas == 0:
+                cabeceras_reales = bloque.columns.tolist()
+                if cabeceras_reales != cabeceras_esperadas:
+                    return False, _mensaje_cabeceras_invalidas(cabeceras_esperadas, cabeceras_reales, tipo_proceso)
 
-            faltan = set(cabeceras_esperadas) - set(cabeceras_reales)
-            sobran = set(cabeceras_reales) - set(cabeceras_esperadas)
+            total_filas += len(bloque)
 
-            if faltan:
-                msg_error += get_string('errors.missing_columns', 'ingesta').format(
-                    columns=', '.join(list(faltan)[:3]) + ('...' if len(faltan)>3 else '')
-                )
-            if sobran:
-                msg_error += get_string('errors.extra_columns', 'ingesta').format(
-                    columns=', '.join(list(sobran)[:3]) + ('...' if len(sobran)>3 else '')
-                )
-            return False, msg_error
+            # Acumular solo las claves de validación; se comparan todas juntas al final.
+            # En modo upsert las filas existentes se actualizan al cargar, no se rechazan
+            if esquema.modo_carga == 'copy':
+                claves_bloque = extraer_claves_validacion(bloque, esquema)
+                if claves_bloque is not None:
+                    claves.append(claves_bloque)
 
-        # Validar si algún registro ya existe
-        is_valid, error_msg = validar_registros_existentes(df, proceso_config)
-        if not is_valid:
-            return False, error_msg
+            # Validar valores de catálogos del bloque y acumular el reporte de errores
+            if catalog_mapping:
+                error_df, errores_bloque = _errores_catalogo_bloque(bloque, esquema, catalogos)
+                if error_df is not None:
+                    error_dfs.append(error_df)
+                    total_errors += errores_bloque
 
-        # Validar valores de catálogos y generar reporte de errores
-        catalog_errors, error_df = validar_catalogos_y_generar_log(df, proceso_config)
+            if progreso:
+                progreso(total_filas, total_errors)
+
+        if total_filas == 0:
+            return False, get_string('errors.file_empty', 'ingesta')
+
+        # Validar si alguna fila ya existe, con una sola consulta para todo el archivo
+        if claves:
+            existentes = buscar_registros_existentes(pd.concat(claves, ignore_index=True), esquema)
+            existing_errors, existing_df = _resultado_registros_existentes(existentes, esquema)
+            if existing_errors:
+                return False, existing_errors, existing_df
+
+        catalog_errors, error_df = _resultado_errores_catalogo(error_dfs, total_errors)
 
         if catalog_errors:
             return False, catalog_errors, error_df
@@ -355,3 +444,7 @@ def validar_estructura_csv(uploaded_file, subsecretaria, tipo_proceso):
             return False, get_string('errors.file_unexpected', 'ingesta').format(
                 error=get_string('errors.file_structure_generic', 'ingesta')
             )
+    finally:
+        if lector_xlsx is not None:
+            lector_xlsx.cerrar()
+        uploaded_file.seek(0)
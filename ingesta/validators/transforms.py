@@ -0,0 +1,284 @@
+"""
+Transformaciones de columnas definidas en la configuración de cada proceso.
+
+Cada entrada de ``validation`` puede declarar una transformación explícita
+(``transform``) y un tipo (``type``). Ambas se compilan en una lista de operaciones
+que se aplican sobre la columna completa (una ``Series`` de pandas) en lugar de
+valor por valor. Validadores y cargadores comparten estas funciones para que los
+valores se conviertan exactamente igual en ambos lados.
+"""
+from datetime import date, datetime, time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+# Formatos de fecha que se prueban, en orden, cuando el valor no coincide con el formato configurado.
+# El orden mes/día primero replica la interpretación por defecto de pd.to_datetime.
+FORMATOS_FECHA_COMUNES = ['ISO8601', '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%d-%m-%Y']
+
+# Equivalencias entre los patrones de fecha usados en los JSON (estilo Java) y strftime
+PATRONES_FECHA = [
+    ('yyyy', '%Y'),
+    ('yy', '%y'),
+    ('MM', '%m'),
+    ('dd', '%d'),
+    ('HH', '%H'),
+    ('mm', '%M'),
+    ('ss', '%S'),
+]
+
+# Transformación implícita según el tipo declarado del campo
+TRANSFORMACION_POR_TIPO = {
+    'date': 'transform_date',
+    'time': 'transform_time',
+    'integer': 'transform_integer',
+    'decimal': 'transform_decimal',
+}
+
+
+def formato_strftime(formato):
+    """
+    Convierte un patrón como ``yyyy-MM-dd`` a ``%Y-%m-%d``. Los formatos que ya usan
+    directivas de strftime se retornan sin cambios.
+    """
+    if not formato or '%' in formato:
+        return formato
+    for patron, directiva in PATRONES_FECHA:
+        formato = formato.replace(patron, directiva)
+    return formato
+
+
+# Resultado de pd.api.types.infer_dtype cuando todos los valores no nulos son del tipo buscado
+TIPOS_INFERIDOS = {str: ('string',), date: ('date', 'datetime'), datetime: ('datetime',), time: ('time',)}
+
+
+def _mascara_tipo(serie, tipos):
+    tipo_inferido = pd.api.types.infer_dtype(serie, skipna=True)
+    if tipo_inferido in TIPOS_INFERIDOS.get(tipos, ()):
+        return serie.notna()
+    if tipo_inferido == 'empty':
+        return pd.Series(False, index=serie.index)
+    return serie.map(lambda value: isinstance(value, tipos)).astype(bool)
+
+
+def transformar_fecha(serie, format=None):
+    """
+    Convierte una columna a fechas (``datetime64`` sin hora). Los textos se analizan
+    primero con el formato configurado y luego con los formatos comunes; los valores
+    que no se pueden interpretar quedan como ``NaT``.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.normalize()
+
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+
+    # Celdas de Excel que ya vienen como fecha
+    es_fecha = _mascara_tipo(serie, date)
+    if es_fecha.any():
+        resultado[es_fecha] = pd.to_datetime(serie[es_fecha], errors='coerce')
+
+    es_texto = _mascara_tipo(serie, str)
+    pendientes = serie[es_texto].str.strip()
+    pendientes = pendientes[pendientes != '']
+    formatos = FORMATOS_FECHA_COMUNES
+    if format:
+        formatos = [formato_strftime(format)] + formatos
+    for formato in formatos:
+        if pendientes.empty:
+            break
+        try:
+            fechas = pd.to_datetime(pendientes, format=formato, errors='coerce')
+        except (ValueError, TypeError):
+            continue
+        if getattr(fechas.dt, 'tz', None) is not None:
+            fechas = fechas.dt.tz_localize(None)
+        convertidas = fechas.notna()
+        resultado[convertidas[convertidas].index] = fechas[convertidas]
+        pendientes = pendientes[~convertidas]
+
+    # Último recurso: interpretación libre, una vez por cada valor distinto restante
+    for value in pendientes.unique():
+        try:
+            fecha = pd.to_datetime(value)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if fecha is not pd.NaT and fecha.tzinfo is not None:
+            fecha = fecha.tz_localize(None)
+        resultado[pendientes.index[pendientes == value]] = fecha
+
+    return resultado.dt.normalize()
+
+
+def transformar_entero(serie):
+    """
+    Convierte una columna a enteros (``Int64``). En los textos se eliminan los caracteres
+    no numéricos excepto el punto decimal; la parte decimal se trunca. Los valores que no
+    se pueden interpretar quedan como ``<NA>``.
+    """
+    if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+        es_texto = _mascara_tipo(serie, str)
+        if es_texto.all():
+            numeros = pd.Series(np.nan, index=serie.index)
+        else:
+            numeros = pd.to_numeric(serie.where(~es_texto), errors='coerce').astype('float64')
+        if es_texto.any():
+            textos = serie[es_texto]
+            # Solo se limpian con la expresión regular los textos que no son dígitos con a lo sumo un punto
+            sucios = ~textos.str.replace('.', '', n=1, regex=False).str.isdigit().astype(bool)
+            convertidos = textos.where(~sucios).astype('float64')
+            if sucios.any():
+                limpios = textos[sucios].str.replace(r'[^0-9.]', '', regex=True)
+                convertidos[sucios] = pd.to_numeric(limpios, errors='coerce')
+            numeros[es_texto] = convertidos
+    else:
+        numeros = serie.astype('float64')
+    return pd.Series(np.trunc(numeros.astype('float64')), index=serie.index).astype('Int64')
+
+
+def transformar_hora(serie):
+    """
+    Convierte una columna a horas del día (``timedelta64`` desde la medianoche). Acepta
+    celdas de Excel con hora o con fecha y hora, y textos como ``HH:MM``, ``HH:MM:SS`` o
+    ``yyyy-MM-dd HH:MM:SS``; los valores que no se pueden interpretar quedan como ``NaT``.
+    """
+    if pd.api.types.is_timedelta64_dtype(serie):
+        return serie
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie - serie.dt.normalize()
+
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype='timedelta64[ns]')
+
+    # Celdas de Excel que ya vienen como hora
+    es_hora = _mascara_tipo(serie, time)
+    if es_hora.any():
+        resultado[es_hora] = pd.to_timedelta(
+            [value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6 for value in serie[es_hora]],
+            unit='s'
+        )
+
+    es_fecha_hora = _mascara_tipo(serie, datetime)
+    if es_fecha_hora.any():
+        fechas = pd.to_datetime(serie[es_fecha_hora], errors='coerce')
+        resultado[es_fecha_hora] = fechas - fechas.dt.normalize()
+
+    es_texto = _mascara_tipo(serie, str)
+    if es_texto.any():
+        textos = serie[es_texto].str.strip()
+        # HH:MM se completa con segundos para que pd.to_timedelta lo acepte
+        textos = textos.where(~textos.str.fullmatch(r'\d{1,2}:\d{2}'), textos + ':00')
+        horas = pd.to_timedelta(textos.where(textos.str.fullmatch(r'\d{1,2}:\d{2}:\d{2}(\.\d+)?')), errors='coerce')
+        pendientes = horas.isna() & (textos != '')
+        if pendientes.any():
+            fechas = pd.to_datetime(textos[pendientes], errors='coerce', format='mixed')
+            horas[pendientes] = fechas - fechas.dt.normalize()
+        resultado[es_texto] = horas
+
+    return resultado
+
+
+def transformar_decimal(serie):
+    """
+    Convierte una columna a números decimales (``float64``). En los textos se eliminan los
+    caracteres no numéricos; una coma se interpreta como separador decimal solo si el texto
+    no tiene punto. Los valores que no se pueden interpretar quedan como ``NaN``.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype('float64')
+
+    es_texto = _mascara_tipo(serie, str)
+    numeros = pd.to_numeric(serie.where(~es_texto), errors='coerce').astype('float64')
+    if es_texto.any():
+        textos = serie[es_texto].str.strip()
+        sin_punto = ~textos.str.contains('.', regex=False)
+        textos = textos.where(~sin_punto, textos.str.replace(',', '.', regex=False))
+        numeros[es_texto] = pd.to_numeric(textos.str.replace(r'[^0-9.\-]', '', regex=True), errors='coerce')
+    return numeros
+
+
+def dividir_texto(serie, character=' ', position=0):
+    """
+    Divide los textos de una columna por ``character`` y conserva la parte en ``position``.
+    Los valores que no son texto se mantienen sin cambios.
+    """
+    resultado = serie.astype(object)
+    es_texto = _mascara_tipo(serie, str)
+    if es_texto.any():
+        # Limitar el número de divisiones evita construir listas completas por cada fila
+        divisiones = position + 1 if position >= 0 else -1
+        resultado[es_texto] = serie[es_texto].str.split(character, n=divisiones, regex=False).str[position]
+    return resultado
+
+
+TRANSFORMACIONES = {
+    'transform_date': transformar_fecha,
+    'transform_time': transformar_hora,
+    'transform_integer': transformar_entero,
+    'transform_decimal': transformar_decimal,
+    'split_text': dividir_texto,
+}
+
+
+def _por_valores_unicos(funcion, serie):
+    """
+    Aplica ``funcion`` solo a los valores distintos de la columna y expande el resultado.
+    Las columnas de fechas y consecutivos repiten mucho sus valores, así que la mayor
+    parte del trabajo se hace sobre unas pocas filas.
+    """
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == len(serie):
+        return funcion(serie)
+    transformados = funcion(pd.Series(unicos, dtype=serie.dtype if serie.dtype != object else object))
+    return pd.Series(transformados.array.take(codigos, allow_fill=True), index=serie.index)
+
+
+def _compilar_paso(transform_config):
+    funcion = TRANSFORMACIONES.get(transform_config.get('function'))
+    if funcion is None:
+        return None
+    return partial(_por_valores_unicos, partial(funcion, **transform_config.get('args', {})))
+
+
+def compilar_transformacion(field_config):
+    """
+    Compila la transformación de un campo de ``validation`` en una función que recibe
+    y retorna una ``Series``. La transformación explícita se aplica primero y luego la
+    conversión implícita del tipo declarado, si es distinta.
+    """
+    pasos = []
+    transform_config = field_config.get('transform')
+    if transform_config:
+        pasos.append(_compilar_paso(transform_config))
+
+    funcion_tipo = TRANSFORMACION_POR_TIPO.get(field_config.get('type'))
+    if funcion_tipo and (not transform_config or transform_config.get('function') != funcion_tipo):
+        pasos.append(_compilar_paso({'function': funcion_tipo}))
+
+    pasos = [paso for paso in pasos if paso is not None]
+
+    def transformar(serie):
+        for paso in pasos:
+            serie = paso(serie)
+        return serie
+
+    return transformar
+
+
+def compilar_transformaciones(proceso_config):
+    """
+    Retorna un diccionario ``{columna del archivo: función}`` con las transformaciones
+    de todos los campos de ``validation`` del proceso.
+    """
+    return {
+        field_config['field']: compilar_transformacion(field_config)
+        for field_config in proceso_config.get('validation', [])
+    }
+
+
+def transformar_columna(serie, transform_config):
+    """
+    Aplica una única configuración de transformación (``{'function': ..., 'args': ...}``)
+    a una columna completa.
+    """
+    paso = _compilar_paso(transform_config or {})
+    return paso(serie) if paso else serie
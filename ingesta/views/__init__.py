@@ -1,6 +1,6 @@
 from coreview.base import get_template_context, handle_error
 from coreview.dashboard import dashboard_view
-from .core.file_management import file_history_view, upload_file_view, download_file, download_error_file, delete_file
+from .core.file_management import file_history_view, upload_file_view, upload_batch_view, validation_status, download_file, download_error_file, delete_file
 from .core.evidence import evidence_list_view, download_evidence, delete_evidence
 
 __all__ = [
@@ -9,6 +9,8 @@ __all__ = [
     'dashboard_view',
     'file_history_view',
     'upload_file_view',
+    'upload_batch_view',
+    'validation_status',
     'download_file',
     'download_error_file',
     'delete_file',
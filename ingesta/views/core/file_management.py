@@ -1,22 +1,32 @@
 import re
+import time
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from minio.error import S3Error
 
 from accounts.models import UserProfile
 from accounts.utils import get_user_role, role_required, user_allowed_subsecretarias
 from coreview.base import get_template_context, handle_error
 from coreview.minio_utils import get_minio_client, get_minio_bucket
+from globalfunctions.file_hash import calcular_sha256
 from globalfunctions.string_manager import get_string
 from ingesta.decorators import admin_required
-from ingesta.forms import PROCESS_TO_SUBSECRETARIA, UploadFileForm
+from ingesta.forms import PROCESS_TO_SUBSECRETARIA, UploadBatchForm, UploadFileForm
+from ingesta.jobs.lote import encolar_lote, expandir_archivos
+from ingesta.jobs.validacion import encolar_validacion, subir_archivo_minio
+from ingesta.loaders import ErrorPurga, purgar_carga
 from ingesta.models import RegistroCarga
-from ingesta.validators import validar_estructura_csv
+from ingesta.validators import (
+    construir_reporte_errores, guardar_reporte_errores, leer_reporte_errores, nombre_reporte_errores,
+    validar_estructura_csv
+)
 
 minio_client = get_minio_client()
 MINIO_BUCKET = get_minio_bucket()
@@ -95,6 +105,95 @@ def sanitize_filename(filename):
     # Limitar longitud
     return filename[:255]
 
+def _guardar_reporte_en_sesion(request, clave, original_filename):
+    """
+    Guarda en la sesión la clave del reporte de errores para que el usuario lo pueda descargar.
+    El contenido queda en el almacenamiento de reportes, no en la sesión.
+    """
+    request.session['error_file_key'] = clave
+    request.session['error_file_name'] = nombre_reporte_errores(original_filename)
+    request.session['has_validation_errors'] = True
+
+
+def _url_resultado_validacion(registro):
+    return f"{reverse('ingesta:upload_file')}?carga={registro.id}"
+
+
+def _respuesta_validacion_encolada(request, registro):
+    """
+    Responde a una carga enviada en modo de validación en segundo plano. Las solicitudes
+    hechas desde el formulario con JavaScript reciben la URL de estado para consultar el avance.
+    """
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'id': registro.id,
+            'status_url': reverse('ingesta:validation_status', args=[registro.id]),
+            'redirect_url': _url_resultado_validacion(registro),
+        })
+    return redirect(_url_resultado_validacion(registro))
+
+
+def _respuesta_archivo_duplicado(request, duplicado):
+    """
+    Informa que el archivo ya había sido cargado, sin validarlo ni guardarlo de nuevo.
+    """
+    messages.warning(request, get_string('errors.file_already_uploaded', 'ingesta').format(
+        filename=duplicado.nombre_archivo_original,
+        date=duplicado.fecha_hora_carga.strftime('%Y-%m-%d %H:%M'),
+        id=duplicado.id
+    ))
+    return redirect('ingesta:upload_file')
+
+
+def _mostrar_resultado_validacion(request, carga_id):
+    """
+    Traduce el resultado de una validación en segundo plano a los mensajes del formulario
+    de carga, igual que en la validación síncrona.
+    """
+    registro = RegistroCarga.objects.filter(id=carga_id, user=request.user).first()
+    if registro is None or not _ensure_registro_access(request.user, registro):
+        return
+
+    if registro.estado == 'VALIDANDO':
+        messages.info(request, get_string('messages.validation_queued', 'ingesta').format(
+            filename=registro.nombre_archivo_original
+        ))
+    elif registro.estado == 'ERROR':
+        if registro.path_reporte_errores:
+            _guardar_reporte_en_sesion(request, registro.path_reporte_errores, registro.nombre_archivo_original)
+        messages.error(request, registro.mensaje_error)
+    else:
+        messages.success(request, get_string('errors.processing_complete', 'ingesta'))
+        messages.success(request, get_string('messages.db_save_success', 'ingesta').format(
+            filename=registro.nombre_archivo_original,
+            process_type=registro.tipo_proceso
+        ))
+
+
+@role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR])
+def validation_status(request, file_id):
+    """
+    Retorna en JSON el avance de la validación en segundo plano de una carga.
+    """
+    carga = get_object_or_404(RegistroCarga, id=file_id, user=request.user)
+
+    if not _ensure_registro_access(request.user, carga):
+        raise PermissionDenied
+
+    return JsonResponse({
+        'estado': carga.estado,
+        'estado_display': carga.get_estado_display(),
+        'filas_validadas': carga.filas_validadas,
+        'errores_encontrados': carga.errores_encontrados,
+        'terminado': carga.validacion_terminada,
+        'mensaje': get_string('messages.validation_progress', 'ingesta').format(
+            rows=carga.filas_validadas,
+            errors=carga.errores_encontrados
+        ),
+        'redirect_url': _url_resultado_validacion(carga),
+    })
+
+
 @role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR])
 def upload_file_view(request):
     allowed_subsecretarias = _get_allowed_subsecretarias(request.user)
@@ -120,13 +219,46 @@ def upload_file_view(request):
             if not (uploaded_file.name.lower().endswith('.csv') or uploaded_file.name.lower().endswith('.xlsx')):
                 messages.error(request, get_string('errors.file_extension', 'ingesta'))
                 return render_upload_form(request, form)
+
+            # En modo de validación en segundo plano solo se guarda el archivo y se crea el registro
+            if settings.INGESTA_VALIDACION_ASINCRONA:
+                try:
+                    registro, duplicado = encolar_validacion(
+                        uploaded_file,
+                        original_filename,
+                        tipo_proceso_seleccionado,
+                        subsecretaria_origen,
+                        request.user
+                    )
+                except Exception as general_error:
+                    print(get_string('messages.general_error', 'ingesta').format(error=general_error))
+                    messages.error(request, str(general_error))
+                    return redirect('ingesta:upload_file')
+                if duplicado is not None:
+                    return _respuesta_archivo_duplicado(request, duplicado)
+                return _respuesta_validacion_encolada(request, registro)
+
+            # Un archivo idéntico ya cargado para el mismo proceso no se vuelve a validar ni a guardar
+            hash_sha256 = calcular_sha256(uploaded_file)
+            duplicado = RegistroCarga.objects.duplicado(hash_sha256, tipo_proceso_seleccionado)
+            if duplicado is not None:
+                return _respuesta_archivo_duplicado(request, duplicado)
             
             # Validación de estructura específica
             print(get_string('messages.validating_file', 'ingesta').format(
                 filename=original_filename,
                 process_type=tipo_proceso_seleccionado
             ))
-            validation_result = validar_estructura_csv(uploaded_file, subsecretaria_origen, tipo_proceso_seleccionado)
+            filas_leidas = {'filas': 0}
+
+            def progreso(filas, errores):
+                filas_leidas['filas'] = filas
+
+            inicio_validacion = time.perf_counter()
+            validation_result = validar_estructura_csv(
+                uploaded_file, subsecretaria_origen, tipo_proceso_seleccionado, progreso=progreso
+            )
+            duracion_validacion = time.perf_counter() - inicio_validacion
 
             # Verificar si es un error simple (2 elementos)
             if len(validation_result) == 2:
@@ -142,36 +274,11 @@ def upload_file_view(request):
                 if not es_valido:
                     # Guardar el DataFrame de errores en la sesión para descarga
                     if error_df is not None and not error_df.empty:
-                        import base64
-                        import io
-                        
-                        # Crear el archivo CSV en memoria
-                        csv_buffer = io.StringIO()
-                        
-                        # Agregar información del reporte al inicio
-                        from datetime import datetime
-                        csv_buffer.write(get_string('errors.report_title', 'ingesta') + "\n")
-                        csv_buffer.write(get_string('errors.report_original_file', 'ingesta').format(filename=original_filename) + "\n")
-                        csv_buffer.write(get_string('errors.report_validation_date', 'ingesta').format(date=datetime.now().strftime('%Y-%m-%d %H:%M:%S')) + "\n")
-                        csv_buffer.write(get_string('errors.report_total_rows_with_errors', 'ingesta').format(count=len(error_df)) + "\n")
-                        csv_buffer.write(get_string('errors.report_total_errors_found', 'ingesta').format(count=error_df['Cantidad de Errores'].sum()) + "\n")
-                        csv_buffer.write("\n")
-                        
-                        # Escribir el DataFrame de errores con codificación UTF-8 explícita
-                        error_df.to_csv(csv_buffer, index=False, sep=';', encoding='utf-8')
-                        csv_content = csv_buffer.getvalue()
-                        csv_buffer.close()
-                        
-                        # Agregar BOM UTF-8 al inicio para compatibilidad con Excel
-                        csv_content = '\ufeff' + csv_content
-                        
-                        # Codificar el contenido en base64
-                        encoded_content = base64.b64encode(csv_content.encode('utf-8')).decode('utf-8')
-                        
-                        # Guardar en la sesión
-                        request.session['error_file_content'] = encoded_content
-                        request.session['error_file_name'] = f"{get_string('errors.error_file_name_prefix', 'ingesta')}{original_filename.replace('.xlsx', '.csv').replace('.csv', '_errores.csv')}"
-                        request.session['has_validation_errors'] = True
+                        try:
+                            clave = guardar_reporte_errores(construir_reporte_errores(error_df, original_filename))
+                            _guardar_reporte_en_sesion(request, clave, original_filename)
+                        except Exception as e:
+                            print(get_string('messages.general_error', 'ingesta').format(error=e))
                     messages.error(request, error_validacion)
                     # Redirigir en lugar de renderizar para evitar reenvío del formulario
                     return redirect('ingesta:upload_file')
@@ -198,37 +305,31 @@ def upload_file_view(request):
                         estado='CARGADO',
                         tipo_proceso=tipo_proceso_seleccionado,
                         subsecretaria_origen=subsecretaria_origen,
+                        hash_sha256=hash_sha256,
+                        tamano_bytes=uploaded_file.size,
+                        filas_validadas=filas_leidas['filas'],
                         user=request.user
                     )
+                    registro.registrar_etapa('validacion', duracion_validacion)
                     registro.save()
 
-                    # Definir nombre del objeto en MinIO
-                    object_name = f"{subsecretaria_origen}/{tipo_proceso_seleccionado}/{registro.id}/{original_filename}"
-
-                    # Asegurar que el bucket exista
-                    if not minio_client.bucket_exists(MINIO_BUCKET):
-                        minio_client.make_bucket(MINIO_BUCKET)
-                        print(get_string('messages.bucket_created', 'ingesta').format(bucket=MINIO_BUCKET))
-
                     # Agregar mensaje de subida a almacenamiento
                     messages.info(request, get_string('errors.uploading_to_storage', 'ingesta'))
-                    
-                    # Volver al inicio del archivo antes de subir
-                    uploaded_file.seek(0)
-
-                    # Subir a MinIO
-                    minio_client.put_object(
-                        bucket_name=MINIO_BUCKET,
-                        object_name=object_name,
-                        data=uploaded_file,
-                        length=uploaded_file.size,
-                        content_type='text/csv' if original_filename.lower().endswith('.csv') else 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+                    # Subir a MinIO (por partes si el archivo es grande)
+                    inicio_almacenamiento = time.perf_counter()
+                    object_name = subir_archivo_minio(
+                        registro,
+                        uploaded_file,
+                        uploaded_file.size,
+                        minio_client=minio_client,
+                        bucket=MINIO_BUCKET
                     )
-                    print(get_string('messages.upload_success', 'ingesta').format(object_name=object_name))
 
                     # Actualizar registro en la base de datos
                     registro.path_minio = object_name
                     registro.estado = 'EN_MINIO'
+                    registro.registrar_etapa('almacenamiento', time.perf_counter() - inicio_almacenamiento)
                     registro.save()
                     print(get_string('messages.db_save_print', 'ingesta').format(id=registro.id))
 
@@ -241,7 +342,7 @@ def upload_file_view(request):
 
             except S3Error as minio_error:
                 print(get_string('messages.minio_error', 'ingesta').format(error=minio_error))
-                messages.error(request, get_string('errors.upload_error', 'ingesta').format(error=str(minio_error)))
+                messages.error(request, get_string('errors.minio_upload', 'ingesta').format(error=str(minio_error)))
                 # Intentar limpiar el registro si existe
                 if 'registro' in locals():
                     try:
@@ -266,17 +367,153 @@ def upload_file_view(request):
             return redirect('ingesta:upload_file')
 
     else:
+        # Resultado de una validación en segundo plano
+        carga_id = request.GET.get('carga')
+        if carga_id and carga_id.isdigit():
+            _mostrar_resultado_validacion(request, int(carga_id))
+            return redirect('ingesta:upload_file')
+
         # Solo limpiar errores si no hay errores activos (GET request normal)
         # Si hay errores activos, mantenerlos para mostrar el botón de descarga
         if not request.session.get('has_validation_errors', False):
-            if 'error_file_content' in request.session:
-                del request.session['error_file_content']
+            if 'error_file_key' in request.session:
+                del request.session['error_file_key']
             if 'error_file_name' in request.session:
                 del request.session['error_file_name']
             
         form = UploadFileForm(**form_kwargs)
         return render_upload_form(request, form)
 
+def _filas_resultado_lote(user, resultado_lote):
+    """
+    Construye las filas de la tabla de resultados de un lote a partir del resumen guardado
+    en la sesión, con el estado actual de cada carga. Las filas ``pendiente`` siguen en
+    validación y la página consulta su estado con ``validation_status``.
+    """
+    ids = {item[clave] for item in resultado_lote for clave in ('carga', 'duplicado') if item[clave]}
+    registros = RegistroCarga.objects.filter(id__in=ids, user=user).in_bulk() if ids else {}
+    filas = []
+    for item in resultado_lote:
+        registro = registros.get(item['carga'])
+        duplicado = registros.get(item['duplicado'])
+        if item['error']:
+            mensaje = item['error']
+        elif duplicado is not None:
+            mensaje = get_string('errors.file_already_uploaded', 'ingesta').format(
+                filename=duplicado.nombre_archivo_original,
+                date=duplicado.fecha_hora_carga.strftime('%Y-%m-%d %H:%M'),
+                id=duplicado.id
+            )
+        elif registro is not None and registro.estado == 'ERROR':
+            mensaje = registro.mensaje_error
+        else:
+            mensaje = ''
+        pendiente = registro is not None and not registro.validacion_terminada
+        filas.append({
+            'nombre': item['nombre'],
+            'registro': registro,
+            'duplicado': duplicado,
+            'pendiente': pendiente,
+            'valido': registro is not None and not pendiente and registro.estado != 'ERROR',
+            'mensaje': mensaje,
+        })
+    return filas
+
+
+@role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR])
+def upload_batch_view(request):
+    """
+    Carga por lotes: varios archivos (o un zip) de un mismo tipo de proceso. Solo los
+    registra; ``validar_cargas`` los valida en segundo plano y la página muestra el estado
+    de cada archivo hasta que todos terminan.
+    """
+    allowed_subsecretarias = _get_allowed_subsecretarias(request.user)
+    form_kwargs = {}
+    if allowed_subsecretarias is not None:
+        form_kwargs['allowed_subsecretarias'] = list(allowed_subsecretarias)
+
+    if request.method == 'POST':
+        form = UploadBatchForm(request.POST, request.FILES, **form_kwargs)
+        if not form.is_valid():
+            messages.error(request, get_string('errors.invalid_form', 'ingesta'))
+            return redirect('ingesta:upload_batch')
+
+        tipo_proceso_seleccionado = form.cleaned_data['tipo_proceso']
+        subsecretaria_origen = PROCESS_TO_SUBSECRETARIA.get(tipo_proceso_seleccionado)
+        if allowed_subsecretarias is not None and subsecretaria_origen not in allowed_subsecretarias:
+            messages.error(request, get_string('errors.no_permissions', 'ingesta'))
+            return redirect('ingesta:upload_batch')
+
+        try:
+            archivos, omitidos = expandir_archivos(form.cleaned_data['file'])
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('ingesta:upload_batch')
+
+        if omitidos:
+            messages.warning(request, get_string('messages.batch_skipped_files', 'ingesta').format(
+                files=', '.join(omitidos[:5]) + ('...' if len(omitidos) > 5 else '')
+            ))
+        if not archivos:
+            messages.error(request, get_string('errors.batch_no_files', 'ingesta'))
+            return redirect('ingesta:upload_batch')
+
+        resultados = encolar_lote(
+            [(sanitize_filename(nombre), archivo) for nombre, archivo in archivos],
+            tipo_proceso_seleccionado,
+            subsecretaria_origen,
+            request.user
+        )
+
+        # Solo se guarda un resumen con los identificadores; el detalle se lee de cada carga
+        request.session['resultado_lote'] = [
+            {
+                'nombre': resultado.nombre,
+                'carga': resultado.registro.id if resultado.registro else None,
+                'duplicado': resultado.duplicado.id if resultado.duplicado else None,
+                'error': resultado.error,
+            }
+            for resultado in resultados
+        ]
+        return redirect('ingesta:upload_batch')
+
+    resultado_lote = request.session.get('resultado_lote')
+    filas = _filas_resultado_lote(request.user, resultado_lote) if resultado_lote else []
+    pendientes = sum(1 for fila in filas if fila['pendiente'])
+    if resultado_lote and not pendientes:
+        # El resumen se conserva mientras quedan archivos en validación
+        del request.session['resultado_lote']
+    context = {
+        'form': UploadBatchForm(**form_kwargs),
+        'filas': filas,
+        'TEMPLATE_BATCH_TITLE': get_string('templates.batch_title', 'ingesta'),
+        'TEMPLATE_BATCH_DESCRIPTION': get_string('templates.batch_description', 'ingesta'),
+        'TEMPLATE_BATCH_HELP': get_string('templates.batch_help', 'ingesta'),
+        'TEMPLATE_BATCH_BUTTON': get_string('templates.batch_button', 'ingesta'),
+        'TEMPLATE_BATCH_RESULTS': get_string('templates.batch_results', 'ingesta'),
+        'TEMPLATE_BATCH_SUMMARY': get_string(
+            'templates.batch_summary_pending' if pendientes else 'templates.batch_summary', 'ingesta'
+        ).format(
+            valid=sum(1 for fila in filas if fila['valido']),
+            total=len(filas),
+            pending=pendientes
+        ),
+        'TEMPLATE_BATCH_ROWS': get_string('templates.batch_rows', 'ingesta'),
+        'TEMPLATE_BATCH_ERRORS': get_string('templates.batch_errors', 'ingesta'),
+        'TEMPLATE_BATCH_DUPLICATE': get_string('templates.batch_duplicate', 'ingesta'),
+        'TEMPLATE_BATCH_NOT_REGISTERED': get_string('templates.batch_not_registered', 'ingesta'),
+        'TEMPLATE_ORIGINAL_FILE': get_string('templates.original_file', 'ingesta'),
+        'TEMPLATE_STATUS': get_string('templates.status', 'ingesta'),
+        'TEMPLATE_DOWNLOAD_ERROR_FILE': get_string('errors.download_error_file', 'ingesta'),
+        'TEMPLATE_UPLOAD_FILE': get_string('templates.upload_file', 'ingesta'),
+        'TEMPLATE_PROCESSING_MODAL_TITLE': get_string('templates.processing_modal_title', 'ingesta'),
+        'TEMPLATE_PROCESSING_SPINNER': get_string('templates.processing_spinner', 'ingesta'),
+        'TEMPLATE_PROCESSING_WARNING': get_string('templates.processing_warning', 'ingesta'),
+        'TEMPLATE_PROCESSING_BATCH': get_string('templates.processing_batch_message', 'ingesta'),
+    }
+    context.update(get_template_context())
+    return render(request, 'ingesta/upload_batch.html', context)
+
 def render_upload_form(request, form):
     """Función auxiliar para renderizar el formulario de carga."""
     context = {
@@ -290,7 +527,10 @@ def render_upload_form(request, form):
         'TEMPLATE_PROCESSING_INITIAL': get_string('templates.processing_initial_message', 'ingesta'),
         'TEMPLATE_PROCESSING_WARNING': get_string('templates.processing_warning', 'ingesta'),
         'TEMPLATE_PROCESSING_FILE_TEMPLATE': get_string('templates.processing_file_template', 'ingesta'),
-        'TEMPLATE_PROCESSING_DEFAULT_FILENAME': get_string('templates.processing_default_filename', 'ingesta')
+        'TEMPLATE_PROCESSING_DEFAULT_FILENAME': get_string('templates.processing_default_filename', 'ingesta'),
+        'TEMPLATE_PROCESSING_QUEUED': get_string('templates.processing_queued', 'ingesta'),
+        'TEMPLATE_BATCH_LINK': get_string('templates.batch_link', 'ingesta'),
+        'VALIDACION_ASINCRONA': settings.INGESTA_VALIDACION_ASINCRONA
     }
     context.update(get_template_context())
     return render(request, 'ingesta/upload_form.html', context)
@@ -331,34 +571,56 @@ def download_file(request, file_id):
         messages.error(request, get_string('errors.unexpected_error', 'ingesta').format(error=str(e)))
         return redirect('ingesta:file_history')
 
+def _descargar_reporte_carga(request, carga_id):
+    """
+    Descarga el reporte de errores guardado en una carga del usuario actual.
+    """
+    carga = get_object_or_404(RegistroCarga, id=carga_id, user=request.user)
+    if not _ensure_registro_access(request.user, carga):
+        raise PermissionDenied
+    if not carga.path_reporte_errores:
+        messages.error(request, get_string('errors.no_error_file_available', 'ingesta'))
+        return redirect('ingesta:upload_batch')
+    try:
+        response = StreamingHttpResponse(
+            leer_reporte_errores(carga.path_reporte_errores),
+            content_type='text/csv; charset=utf-8'
+        )
+    except FileNotFoundError:
+        messages.error(request, get_string('errors.no_error_file_available', 'ingesta'))
+        return redirect('ingesta:upload_batch')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_reporte_errores(carga.nombre_archivo_original)}"'
+    return response
+
 @role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR])
 def download_error_file(request):
     """
-    Download the error file from session if it exists and belongs to the current user.
+    Download the error report referenced from the session if it exists and belongs to the current user.
+    With ``?carga=<id>`` the report of that upload is downloaded instead (used by batch uploads).
     """
-    if ('error_file_content' not in request.session or 
+    carga_id = request.GET.get('carga')
+    if carga_id and carga_id.isdigit():
+        return _descargar_reporte_carga(request, int(carga_id))
+
+    if ('error_file_key' not in request.session or 
         'error_file_name' not in request.session or 
         'has_validation_errors' not in request.session):
         messages.error(request, get_string('errors.no_error_file_available', 'ingesta'))
         return redirect('ingesta:upload_file')
     
     try:
-        import base64
-        
-        # Obtener contenido del archivo de la sesión
-        encoded_content = request.session['error_file_content']
+        # Abrir el reporte guardado; se envía en bloques sin cargarlo completo en memoria
+        clave = request.session['error_file_key']
         filename = request.session['error_file_name']
-        
-        # Decodificar contenido
-        file_content = base64.b64decode(encoded_content)
-        
+        contenido = leer_reporte_errores(clave)
+
         # Crear respuesta HTTP con codificación UTF-8 explícita
-        response = HttpResponse(file_content, content_type='text/csv; charset=utf-8')
+        response = StreamingHttpResponse(contenido, content_type='text/csv; charset=utf-8')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         response['Content-Encoding'] = 'utf-8'
         
         # Limpiar la sesión después de descargar
-        del request.session['error_file_content']
+        del request.session['error_file_key']
         del request.session['error_file_name']
         del request.session['has_validation_errors']
         
@@ -366,7 +628,13 @@ def download_error_file(request):
         messages.success(request, get_string('success.error_file_downloaded', 'ingesta'))
         
         return response
-        
+
+    except FileNotFoundError:
+        # El reporte ya fue eliminado por la limpieza de reportes vencidos
+        for key in ('error_file_key', 'error_file_name', 'has_validation_errors'):
+            request.session.pop(key, None)
+        messages.error(request, get_string('errors.no_error_file_available', 'ingesta'))
+        return redirect('ingesta:upload_file')
     except Exception as e:
         messages.error(request, get_string('errors.error_file_download_error', 'ingesta').format(error=str(e)))
         return redirect('ingesta:upload_file')
@@ -377,24 +645,13 @@ def delete_file(request, file_id):
     carga = get_object_or_404(RegistroCarga, id=file_id)
     
     try:
-        # Delete related evidences from MinIO
-        for ev in getattr(carga, 'evidencias', []).all():
-            try:
-                if ev.path_minio:
-                    minio_client.remove_object(MINIO_BUCKET, ev.path_minio)
-            except S3Error as e:
-                messages.error(request, get_string('errors.minio_delete_error', 'ingesta').format(error=str(e)))
-            except Exception as e:
-                messages.error(request, get_string('errors.unexpected_error', 'ingesta').format(error=str(e)))
-
-        # Delete from MinIO if path exists
-        if carga.path_minio:
-            minio_client.remove_object(MINIO_BUCKET, carga.path_minio)
-
-        # Delete from database
-        carga.delete()
+        # Borra en lotes las filas cargadas, recalcula los totales mensuales y elimina
+        # de MinIO el archivo, las evidencias y el reporte de errores antes del registro
+        filas = purgar_carga(carga, minio_client=minio_client, bucket=MINIO_BUCKET)
 
-        messages.success(request, get_string('success.file_deleted', 'ingesta'))
+        messages.success(request, get_string('success.file_purged', 'ingesta').format(rows=filas))
+    except ErrorPurga as e:
+        messages.error(request, str(e))
     except S3Error as e:
         messages.error(request, get_string('errors.minio_delete_error', 'ingesta').format(error=str(e)))
     except Exception as e:
@@ -4,4 +4,13 @@ from globalfunctions.string_manager import get_string
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
-    verbose_name = 'Reportes e Indicadores'
\ No newline at end of file
+    verbose_name = 'Reportes e Indicadores'
+
+    def ready(self):
+        from ingesta.signals import datos_disposicion_modificados
+        from .queries import avanzar_version_datos
+
+        # Los cambios en las tablas de origen avanzan la versión con disparadores (migración
+        # 0002); la señal cubre los que se hacen directamente sobre particiones
+        # (TRUNCATE o reemplazo de un mes), que no disparan los de la tabla principal
+        datos_disposicion_modificados.connect(avanzar_version_datos, dispatch_uid='reports_version_datos')
@@ -0,0 +1,241 @@
+"""
+Exportación de reportes en segundo plano.
+
+La vista del reporte encola las exportaciones grandes como ``ExportacionReporte`` en
+estado PENDIENTE; el comando ``procesar_exportaciones`` las toma con
+``SELECT ... FOR UPDATE SKIP LOCKED`` (varios procesos pueden trabajar a la vez), escribe
+el archivo por bloques en el directorio de exportaciones y lo sube a MinIO por partes.
+La página consulta el estado hasta que termina y descarga el archivo desde MinIO.
+
+El objeto en MinIO se nombra con la clave de la consulta y la versión de los datos:
+si ya hay una exportación completada de la misma consulta, con los mismos datos y
+formato, en las últimas ``REPORTES_EXPORTACIONES_HORAS``, la nueva se completa con ese
+objeto sin generarlo otra vez. ``limpiar_exportaciones`` elimina las exportaciones y los
+archivos más antiguos.
+"""
+import os
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from coreview.minio_utils import get_minio_bucket, get_minio_client
+from globalfunctions.string_manager import get_string
+from ingesta.jobs.validacion import CONTENT_TYPE_XLSX, TAMANO_PARTE_MINIO
+from reports.models import ExportacionReporte
+from reports.queries import ConsultaReporte, FiltrosReporte, escribir_xlsx, lineas_csv, ruta_en_cache
+from reports.queries.cache import limpiar_archivos_exportacion, publicar_exportacion, ruta_temporal
+
+PREFIJO_EXPORTACIONES = 'reportes/exportaciones/'
+
+CONTENT_TYPES = {
+    'xlsx': CONTENT_TYPE_XLSX,
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Bytes por lectura al descargar el archivo desde MinIO
+TAMANO_BLOQUE_DESCARGA = 1024 * 1024
+
+# Campos que una exportación toma de otra ya completada con la misma consulta
+CAMPOS_RESULTADO = ['version', 'path_minio', 'tamano_bytes', 'filas_escritas', 'filas_totales']
+
+
+def _cliente(minio_client):
+    minio_client = minio_client or get_minio_client()
+    if not minio_client:
+        raise RuntimeError(get_string('errors.minio_not_configured', 'ingesta'))
+    return minio_client
+
+
+def _completada(clave, version, formato):
+    # Las exportaciones vencidas no se reutilizan aunque limpiar_exportaciones no las haya borrado
+    limite = timezone.now() - timedelta(hours=settings.REPORTES_EXPORTACIONES_HORAS)
+    return (
+        ExportacionReporte.objects
+        .filter(
+            estado='COMPLETADO', clave=clave, version=version, formato=formato, path_minio__isnull=False,
+            terminado_en__gte=limite
+        )
+        .order_by('-terminado_en')
+        .first()
+    )
+
+
+def _completar_con(exportacion, existente):
+    for campo in CAMPOS_RESULTADO:
+        setattr(exportacion, campo, getattr(existente, campo))
+    exportacion.estado = 'COMPLETADO'
+    exportacion.terminado_en = timezone.now()
+
+
+def encolar_exportacion(filtros, formato, user):
+    """
+    Crea la exportación de ``filtros`` en ``formato`` para el usuario. Si el mismo archivo
+    ya existe para la versión actual de los datos, se crea ya completada.
+    """
+    consulta = ConsultaReporte(filtros)
+    exportacion = ExportacionReporte(
+        user=user, filtros=asdict(filtros), formato=formato, clave=consulta.clave,
+        filas_totales=consulta.totales()[0]
+    )
+    existente = _completada(consulta.clave, consulta.version, formato)
+    if existente is not None:
+        _completar_con(exportacion, existente)
+    exportacion.save()
+    return exportacion
+
+
+def reclamar_siguiente_exportacion(tiempo_maximo):
+    """
+    Toma la exportación pendiente más antigua sin bloquear a otros procesos. Las que se
+    están generando desde hace más de ``tiempo_maximo`` vuelven a estar disponibles.
+    """
+    limite = timezone.now() - tiempo_maximo
+    with transaction.atomic():
+        exportacion = (
+            ExportacionReporte.objects
+            .filter(Q(estado='PENDIENTE') | Q(estado='GENERANDO', reclamado_en__lt=limite))
+            .select_for_update(skip_locked=True)
+            .order_by('creado_en')
+            .first()
+        )
+        if exportacion is not None:
+            exportacion.estado = 'GENERANDO'
+            exportacion.reclamado_en = timezone.now()
+            exportacion.save(update_fields=['estado', 'reclamado_en'])
+    return exportacion
+
+
+@contextmanager
+def _registro_avance(exportacion):
+    """
+    Función ``progreso`` que guarda ``filas_escritas`` por una conexión propia en
+    autocommit: ``ConsultaReporte.bloques`` lee dentro de una transacción, y lo que se
+    actualizara por la misma conexión no se vería hasta terminar el archivo.
+    """
+    conexion = connections.create_connection(DEFAULT_DB_ALIAS)
+    tabla = conexion.ops.quote_name(ExportacionReporte._meta.db_table)
+
+    def progreso(filas):
+        with conexion.cursor() as cursor:
+            cursor.execute(f'UPDATE {tabla} SET filas_escritas = %s WHERE id = %s', [filas, exportacion.pk])
+    try:
+        yield progreso
+    finally:
+        conexion.close()
+
+
+def _escribir_archivo(consulta, formato, path, progreso):
+    if formato == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as archivo:
+            for lineas in lineas_csv(consulta, progreso):
+                archivo.write(lineas)
+    else:
+        with open(path, 'wb') as archivo:
+            escribir_xlsx(consulta, archivo, progreso)
+
+
+def generar_exportacion(exportacion, minio_client=None, bucket=None):
+    """
+    Genera el archivo de una exportación reclamada y lo sube a MinIO. El avance queda en
+    ``filas_escritas``. Retorna True si la exportación quedó COMPLETADO; si falla queda en
+    ERROR con el mensaje.
+    """
+    consulta = ConsultaReporte(FiltrosReporte.desde_dict(exportacion.filtros))
+    formato = exportacion.formato
+    temporal = None
+    try:
+        # Otro proceso pudo generar el mismo archivo mientras esta esperaba
+        existente = _completada(consulta.clave, consulta.version, formato)
+        if existente is None:
+            minio_client = _cliente(minio_client)
+            bucket = bucket or get_minio_bucket()
+
+            exportacion.version = consulta.version
+            exportacion.filas_totales = consulta.totales()[0]
+            exportacion.save(update_fields=['version', 'filas_totales'])
+
+            # Se escribe en el directorio de exportaciones para dejar también el archivo
+            # en la caché local de ``export_report_csv``
+            ruta = ruta_en_cache(consulta, formato)
+            temporal = ruta_temporal(ruta)
+            with _registro_avance(exportacion) as progreso:
+                _escribir_archivo(consulta, formato, temporal, progreso)
+
+            if not minio_client.bucket_exists(bucket):
+                minio_client.make_bucket(bucket)
+            objeto = f'{PREFIJO_EXPORTACIONES}{consulta.espacio_cache}/v{consulta.version}_{consulta.clave}.{formato}'
+            tamano = os.path.getsize(temporal)
+            with open(temporal, 'rb') as archivo:
+                minio_client.put_object(
+                    bucket_name=bucket,
+                    object_name=objeto,
+                    data=archivo,
+                    length=tamano,
+                    part_size=TAMANO_PARTE_MINIO,
+                    content_type=CONTENT_TYPES[formato]
+                )
+            publicar_exportacion(temporal, ruta, consulta.version)
+            temporal = None
+
+            exportacion.path_minio = objeto
+            exportacion.tamano_bytes = tamano
+            exportacion.filas_escritas = exportacion.filas_totales
+            exportacion.estado = 'COMPLETADO'
+            exportacion.terminado_en = timezone.now()
+        else:
+            _completar_con(exportacion, existente)
+        exportacion.mensaje_error = None
+        exportacion.save()
+        return True
+    except Exception as error:
+        exportacion.estado = 'ERROR'
+        exportacion.mensaje_error = get_string('errors.export_failed', 'reports').format(error=error)
+        exportacion.terminado_en = timezone.now()
+        exportacion.save()
+        return False
+    finally:
+        if temporal and os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def leer_exportacion(exportacion, minio_client=None, bucket=None):
+    """
+    Retorna un generador con el contenido del archivo de una exportación completada,
+    leído desde MinIO por bloques. El objeto se pide antes de retornar, así que un
+    archivo inexistente lanza ``S3Error`` aquí y no durante la descarga.
+    """
+    respuesta = _cliente(minio_client).get_object(bucket or get_minio_bucket(), exportacion.path_minio)
+
+    def contenido():
+        try:
+            yield from respuesta.stream(TAMANO_BLOQUE_DESCARGA)
+        finally:
+            respuesta.close()
+            respuesta.release_conn()
+    return contenido()
+
+
+def limpiar_exportaciones_vencidas(antiguedad, minio_client=None, bucket=None):
+    """
+    Elimina las exportaciones terminadas hace más de ``antiguedad``, los objetos de MinIO
+    que ninguna otra exportación usa y los archivos del directorio de exportaciones con
+    esa antigüedad. Retorna la cantidad de exportaciones eliminadas.
+    """
+    limite = timezone.now() - antiguedad
+    vencidas = ExportacionReporte.objects.filter(estado__in=['COMPLETADO', 'ERROR'], terminado_en__lt=limite)
+    objetos = set(vencidas.exclude(path_minio=None).values_list('path_minio', flat=True))
+    eliminadas, _ = vencidas.delete()
+
+    objetos -= set(ExportacionReporte.objects.filter(path_minio__in=objetos).values_list('path_minio', flat=True))
+    if objetos:
+        minio_client = _cliente(minio_client)
+        bucket = bucket or get_minio_bucket()
+        for objeto in objetos:
+            minio_client.remove_object(bucket, objeto)
+    limpiar_archivos_exportacion(antiguedad)
+    return eliminadas
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.jobs.exportacion import limpiar_exportaciones_vencidas
+
+
+class Command(BaseCommand):
+    help = 'Elimina las exportaciones de reportes terminadas que superan el tiempo de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=settings.REPORTES_EXPORTACIONES_HORAS,
+            help='Antigüedad en horas a partir de la cual se elimina una exportación '
+                 f'(por defecto {settings.REPORTES_EXPORTACIONES_HORAS})'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Sigue en ejecución y repite la limpieza cada tantos segundos'
+        )
+
+    def handle(self, *args, **options):
+        if options['intervalo'] is None:
+            self._limpiar(options['horas'])
+            return
+
+        self.stdout.write(f'Limpiando exportaciones cada {options["intervalo"]:g} s...')
+        while True:
+            close_old_connections()
+            try:
+                self._limpiar(options['horas'])
+            except Exception as error:
+                # Un fallo de MinIO o de la base de datos no detiene el proceso
+                self.stdout.write(self.style.WARNING(f'No se pudieron limpiar las exportaciones: {error}'))
+            time.sleep(options['intervalo'])
+
+    def _limpiar(self, horas):
+        eliminadas = limpiar_exportaciones_vencidas(timedelta(hours=horas))
+        self.stdout.write(self.style.SUCCESS(f'Exportaciones eliminadas: {eliminadas}'))
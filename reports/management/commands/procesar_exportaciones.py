@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.jobs.exportacion import generar_exportacion, reclamar_siguiente_exportacion
+
+
+class Command(BaseCommand):
+    help = 'Genera en segundo plano las exportaciones de reportes pendientes y las guarda en MinIO'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las exportaciones pendientes y termina, en lugar de esperar nuevas'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay exportaciones pendientes (por defecto 2)'
+        )
+        parser.add_argument(
+            '--tiempo-maximo',
+            type=int,
+            default=60,
+            help='Minutos tras los cuales una exportación sin terminar se vuelve a tomar (por defecto 60)'
+        )
+
+    def handle(self, *args, **options):
+        tiempo_maximo = timedelta(minutes=options['tiempo_maximo'])
+        self.stdout.write('Esperando exportaciones de reportes...')
+
+        while True:
+            close_old_connections()
+            exportacion = reclamar_siguiente_exportacion(tiempo_maximo)
+            if exportacion is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            self.stdout.write(f'Generando exportación {exportacion.id} ({exportacion.get_formato_display()})...')
+            if generar_exportacion(exportacion):
+                self.stdout.write(self.style.SUCCESS(
+                    f'Exportación {exportacion.id}: {exportacion.filas_escritas} filas en {exportacion.path_minio}'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Exportación {exportacion.id}: {exportacion.mensaje_error}'))
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Tablas de origen de los reportes: cualquier cambio en ellas avanza la versión de los datos
+TABLAS_ORIGEN = (
+    'ingesta_disposicionfinal', 'ingesta_concesion', 'ingesta_ase', 'ingesta_servicio', 'ingesta_zonadescarga',
+)
+
+# Un disparador por sentencia (también ve las cargas de NiFi, el SQL directo y
+# QuerySet.update()) anota la transacción en reports_version_pendiente; el disparador
+# diferido de esa tabla avanza la secuencia al confirmar la transacción. Si se avanzara
+# en la sentencia, un reporte calculado antes de la confirmación se guardaría con la
+# versión nueva y datos anteriores
+VERSION_DATOS = """
+CREATE SEQUENCE IF NOT EXISTS reports_version_datos;
+
+CREATE TABLE reports_version_pendiente (transaccion bigint PRIMARY KEY);
+
+CREATE OR REPLACE FUNCTION reports_marcar_version_datos() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO reports_version_pendiente VALUES (txid_current()) ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reports_avanzar_version_datos() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM reports_version_pendiente WHERE transaccion = NEW.transaccion;
+    PERFORM nextval('reports_version_datos');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER reports_avanzar_version_datos
+AFTER INSERT ON reports_version_pendiente
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION reports_avanzar_version_datos();
+""" + ''.join(
+    f"""
+CREATE TRIGGER {tabla}_version_datos
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabla}
+FOR EACH STATEMENT EXECUTE FUNCTION reports_marcar_version_datos();
+"""
+    for tabla in TABLAS_ORIGEN
+)
+
+ELIMINAR = ''.join(f'DROP TRIGGER IF EXISTS {tabla}_version_datos ON {tabla};\n' for tabla in TABLAS_ORIGEN) + """
+DROP FUNCTION IF EXISTS reports_marcar_version_datos();
+DROP TABLE IF EXISTS reports_version_pendiente;
+DROP FUNCTION IF EXISTS reports_avanzar_version_datos();
+DROP SEQUENCE IF EXISTS reports_version_datos;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('ingesta', '0002_zonadescarga_servicio_concesion_ase'),
+    ]
+
+    operations = [
+        # Versión de los datos de los reportes: cambia cada vez que se modifican los datos de origen
+        migrations.RunSQL(VERSION_DATOS, ELIMINAR),
+    ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0002_secuencia_version_datos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacionReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filtros', models.JSONField(verbose_name='Filtros')),
+                ('formato', models.CharField(choices=[('xlsx', 'Excel'), ('csv', 'CSV')], default='xlsx', max_length=4, verbose_name='Formato')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('GENERANDO', 'Generando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('mensaje_error', models.TextField(blank=True, null=True)),
+                ('clave', models.CharField(max_length=32)),
+                ('version', models.BigIntegerField(blank=True, null=True)),
+                ('path_minio', models.CharField(blank=True, max_length=500, null=True)),
+                ('tamano_bytes', models.BigIntegerField(blank=True, null=True)),
+                ('filas_escritas', models.PositiveIntegerField(default=0, verbose_name='Filas escritas')),
+                ('filas_totales', models.PositiveIntegerField(default=0, verbose_name='Filas totales')),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('reclamado_en', models.DateTimeField(blank=True, null=True)),
+                ('terminado_en', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Exportación de Reporte',
+                'verbose_name_plural': 'Exportaciones de Reportes',
+                'ordering': ['-creado_en'],
+                'indexes': [
+                    models.Index(fields=['estado', 'creado_en'], name='reports_exp_estado_67be3f_idx'),
+                    models.Index(fields=['clave', 'version', 'formato'], name='reports_exp_clave_dfa760_idx'),
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
 from .indicators import Indicator
+from .exportaciones import ExportacionReporte
 
-__all__ = ['Indicator']
+__all__ = ['Indicator', 'ExportacionReporte']
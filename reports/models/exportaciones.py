@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from globalfunctions.string_manager import get_string
+
+User = get_user_model()
+
+
+class ExportacionReporte(models.Model):
+    """
+    Exportación de un reporte generada en segundo plano por ``procesar_exportaciones``.
+    El archivo terminado queda en MinIO (``path_minio``) y se descarga desde allí.
+    """
+    ESTADOS = (
+        ('PENDIENTE', get_string("models.export_status_pending", "reports")),
+        ('GENERANDO', get_string("models.export_status_running", "reports")),
+        ('COMPLETADO', get_string("models.export_status_completed", "reports")),
+        ('ERROR', get_string("models.export_status_error", "reports")),
+    )
+    FORMATOS = (
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=get_string("models.export_user", "reports"))
+    # FiltrosReporte guardado con dataclasses.asdict
+    filtros = models.JSONField(verbose_name=get_string("models.export_filters", "reports"))
+    formato = models.CharField(max_length=4, choices=FORMATOS, default='xlsx', verbose_name=get_string("models.export_format", "reports"))
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE', verbose_name=get_string("models.export_status", "reports"))
+    mensaje_error = models.TextField(blank=True, null=True)
+
+    # Clave de la consulta y versión de los datos con que se generó el archivo
+    clave = models.CharField(max_length=32)
+    version = models.BigIntegerField(blank=True, null=True)
+    path_minio = models.CharField(max_length=500, blank=True, null=True)
+    tamano_bytes = models.BigIntegerField(blank=True, null=True)
+    filas_escritas = models.PositiveIntegerField(default=0, verbose_name=get_string("models.export_rows", "reports"))
+    filas_totales = models.PositiveIntegerField(default=0, verbose_name=get_string("models.export_total_rows", "reports"))
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    reclamado_en = models.DateTimeField(blank=True, null=True)
+    terminado_en = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = get_string('models.export', 'reports')
+        verbose_name_plural = get_string('models.exports', 'reports')
+        ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'creado_en']),
+            models.Index(fields=['clave', 'version', 'formato']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_formato_display()} {self.creado_en:%Y-%m-%d %H:%M} ({self.get_estado_display()})"
+
+    @property
+    def terminada(self):
+        return self.estado in ('COMPLETADO', 'ERROR')
+
+    @property
+    def nombre_archivo(self):
+        return f'reporte_disposicion_final.{self.formato}'
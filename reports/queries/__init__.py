@@ -0,0 +1,26 @@
+from .cache import avanzar_version_datos, exportacion_vigente, resultado_en_cache, version_datos
+from .disposicion_final import COLUMNAS, Columna, ConsultaReporte, FilasReporte, FiltrosReporte, opciones_filtros
+from .exportacion import escribir_xlsx, lineas_csv, lineas_csv_en_cache, ruta_en_cache, xlsx_en_cache
+from .pivote import DIMENSIONES, MEDIDAS, ErrorPivote, PivoteReporte
+
+__all__ = [
+    'COLUMNAS',
+    'Columna',
+    'ConsultaReporte',
+    'DIMENSIONES',
+    'ErrorPivote',
+    'FilasReporte',
+    'FiltrosReporte',
+    'MEDIDAS',
+    'PivoteReporte',
+    'avanzar_version_datos',
+    'escribir_xlsx',
+    'exportacion_vigente',
+    'lineas_csv',
+    'lineas_csv_en_cache',
+    'opciones_filtros',
+    'resultado_en_cache',
+    'ruta_en_cache',
+    'version_datos',
+    'xlsx_en_cache'
+]
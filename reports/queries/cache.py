@@ -0,0 +1,132 @@
+"""
+Caché de resultados de los reportes.
+
+Cada resultado se guarda con una clave que incluye la versión de los datos
+(``reports_version_datos``, una secuencia de PostgreSQL). Cualquier cambio en los datos
+de origen avanza la secuencia, así que los resultados anteriores dejan de usarse sin
+tener que buscarlos ni borrarlos. La avanzan disparadores de la base de datos (migración
+0002), que también ven las cargas de NiFi, el SQL directo y ``QuerySet.update()``, y la
+señal ``datos_disposicion_modificados`` para los cambios que se hacen directamente sobre
+particiones (ver ``reports.apps``). La secuencia es compartida por todos los procesos
+(web, validación y carga) y leerla no bloquea a nadie.
+
+Las exportaciones se guardan como archivos en ``REPORTES_DIRECTORIO_EXPORTACIONES`` con
+la misma clave. Se usan durante ``REPORTES_EXPORTACIONES_HORAS`` como máximo; al generar
+una nueva se eliminan las de versiones anteriores y las vencidas.
+"""
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+SECUENCIA_VERSION = 'reports_version_datos'
+
+
+def version_datos():
+    """
+    Versión actual de los datos de los reportes.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT last_value, is_called FROM {SECUENCIA_VERSION}')
+        valor, usada = cursor.fetchone()
+    return valor if usada else 0
+
+
+def avanzar_version_datos(**kwargs):
+    """
+    Invalida los resultados guardados. Se ejecuta al confirmar la transacción actual para
+    que nadie guarde datos anteriores al cambio con la versión nueva. Acepta los
+    argumentos de una señal para conectarse directamente.
+    """
+    def avanzar():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [SECUENCIA_VERSION])
+    transaction.on_commit(avanzar)
+
+
+def resultado_en_cache(espacio, clave, version, calcular):
+    """
+    Retorna el resultado guardado para ``(espacio, clave, version)`` o lo calcula con
+    ``calcular()`` y lo guarda por ``REPORTES_CACHE_SEGUNDOS``.
+    """
+    clave_cache = f'reportes:{espacio}:{version}:{clave}'
+    resultado = cache.get(clave_cache)
+    if resultado is None:
+        resultado = calcular()
+        cache.set(clave_cache, resultado, settings.REPORTES_CACHE_SEGUNDOS)
+    return resultado
+
+
+def _directorio_exportaciones():
+    directorio = settings.REPORTES_DIRECTORIO_EXPORTACIONES
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def ruta_exportacion(espacio, clave, version, extension):
+    """
+    Ruta del archivo de exportación para esa clave y versión (exista o no).
+    """
+    return os.path.join(_directorio_exportaciones(), f'v{version}_{espacio}_{clave}.{extension}')
+
+
+def exportacion_vigente(ruta):
+    """
+    Indica si la exportación en ``ruta`` existe y tiene menos de
+    ``REPORTES_EXPORTACIONES_HORAS``; si no, hay que generarla otra vez.
+    """
+    try:
+        modificado = os.path.getmtime(ruta)
+    except FileNotFoundError:
+        return False
+    return modificado >= time.time() - settings.REPORTES_EXPORTACIONES_HORAS * 3600
+
+
+def ruta_temporal(ruta):
+    """
+    Ruta donde escribir una exportación antes de publicarla con ``publicar_exportacion``.
+    """
+    return f'{ruta}.{uuid.uuid4().hex}.parcial'
+
+
+def limpiar_archivos_exportacion(antiguedad=None, version=None):
+    """
+    Elimina del directorio de exportaciones los archivos de más de ``antiguedad`` (un
+    ``timedelta``; por defecto ``REPORTES_EXPORTACIONES_HORAS``), los temporales de más de
+    un día y, si se indica ``version``, los de otras versiones. Retorna cuántos eliminó.
+    """
+    segundos = antiguedad.total_seconds() if antiguedad is not None else settings.REPORTES_EXPORTACIONES_HORAS * 3600
+    limite = time.time() - segundos
+    vigente = f'v{version}_'
+    # Los temporales de más de un día quedaron de exportaciones interrumpidas
+    limite_temporales = time.time() - 24 * 3600
+    eliminados = 0
+    for entrada in os.scandir(_directorio_exportaciones()):
+        if not entrada.is_file():
+            continue
+        if entrada.name.endswith('.parcial'):
+            vencido = entrada.stat().st_mtime < limite_temporales
+        else:
+            vencido = (
+                entrada.stat().st_mtime < limite
+                or (version is not None and not entrada.name.startswith(vigente))
+            )
+        if vencido:
+            try:
+                os.remove(entrada.path)
+                eliminados += 1
+            except FileNotFoundError:
+                pass
+    return eliminados
+
+
+def publicar_exportacion(temporal, ruta, version):
+    """
+    Deja disponible una exportación terminada y elimina las de versiones anteriores y las
+    vencidas.
+    """
+    os.replace(temporal, ruta)
+    limpiar_archivos_exportacion(version=version)
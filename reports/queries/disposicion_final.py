@@ -0,0 +1,390 @@
+"""
+Consultas del reporte de disposición final.
+
+``FiltrosReporte`` es la especificación tipada de los filtros del reporte (rango de
+meses, selecciones múltiples y PIDJ) y ``ConsultaReporte`` arma con ella SQL
+parametrizado que solo une los catálogos que usan las columnas pedidas y los filtros
+aplicados. Los totales y las páginas se guardan en la caché de resultados con la clave
+normalizada de los filtros y la versión de los datos.
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+from django.db import connection, transaction
+
+from .cache import resultado_en_cache, version_datos
+
+ESPACIO_CACHE = 'disposicion_final'
+
+# Filas leídas por viaje desde el cursor del servidor en las exportaciones
+TAMANO_BLOQUE_EXPORTACION = 5000
+
+# Valores aceptados del filtro "Dispuestos PIDJ"
+VALORES_PIDJ = ('PIDJ', 'No Aplica')
+
+
+@dataclass(frozen=True)
+class Columna:
+    """
+    Columna del reporte: etiqueta, expresión SQL y alias de los catálogos que necesita.
+    """
+    etiqueta: str
+    sql: str
+    uniones: tuple = ()
+
+
+COLUMNAS = (
+    Columna('AÑO', 'EXTRACT(YEAR FROM df.fecha_entrada)'),
+    Columna('MES', 'EXTRACT(MONTH FROM df.fecha_entrada)'),
+    Columna('DÍA', 'EXTRACT(DAY FROM df.fecha_entrada)'),
+    Columna('PESO RESIDUOS TON', 'ROUND(df.peso_residuos / 1000.0, 2)'),
+    Columna('FECHA ENTRADA', 'df.fecha_entrada'),
+    Columna('FECHA SALIDA', 'df.fecha_salida'),
+    Columna('CONSECUTIVO ENTRADA', 'df.consecutivo_entrada'),
+    Columna('CONSECUTIVO SALIDA', 'df.consecutivo_salida'),
+    Columna('PLACA', 'df.placa'),
+    Columna('NUMERO VEHICULO', 'df.numero_vehiculo'),
+    Columna('CONCESION', 'UPPER(TRIM(df.concesion))'),
+    Columna('MACRORUTA', 'df.macroruta'),
+    Columna('MICRORUTA', 'df.microruta'),
+    Columna('ASE', 'UPPER(TRIM(df.ase))'),
+    Columna('SERVICIO', 'UPPER(TRIM(df.servicio))'),
+    Columna('ZONA DESCARGA', 'UPPER(TRIM(df.zona_descarga))'),
+    Columna('PESO ENTRADA', 'df.peso_entrada'),
+    Columna('PESO SALIDA', 'df.peso_salida'),
+    Columna('PESO RESIDUOS', 'df.peso_residuos'),
+    Columna('CATEGORIA DEL SERVICIO', 's.categoria', ('s',)),
+    Columna('ORIGEN DEL RESIDUO', 'c.categoria', ('c',)),
+    Columna('DISPUESTOS PIDJ', "CASE WHEN zd.categoria = 'PIDJ' THEN 'PIDJ' ELSE NULL END", ('zd',)),
+)
+
+# Catálogos que se pueden unir a ingesta_disposicionfinal (df), en el orden en que se unen
+UNIONES = {
+    'c': 'LEFT JOIN ingesta_concesion c ON c.id = df.concesion_ref_id',
+    's': 'LEFT JOIN ingesta_servicio s ON s.id = df.servicio_ref_id',
+    'zd': 'LEFT JOIN ingesta_zonadescarga zd ON zd.id = df.zona_descarga_ref_id',
+    'a': 'LEFT JOIN ingesta_ase a ON a.id = df.ase_ref_id',
+}
+
+# Las filas siempre se ordenan por esta clave, de modo que una página puede continuar
+# desde la última fila mostrada (paginación por clave)
+ORDEN = 'df.fecha_entrada DESC, df.id DESC'
+ORDEN_INVERSO = 'df.fecha_entrada ASC, df.id ASC'
+
+
+def sql_desde(alias):
+    """
+    FROM de ``ingesta_disposicionfinal df`` con los catálogos de ``alias`` unidos.
+    """
+    uniones = [sql for nombre, sql in UNIONES.items() if nombre in alias]
+    return '\n'.join(['FROM ingesta_disposicionfinal df'] + uniones)
+
+
+def _entero(valor, defecto, minimo, maximo):
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        return defecto
+    return numero if minimo <= numero <= maximo else defecto
+
+
+def _valores(valores):
+    return tuple(sorted({valor.strip() for valor in valores if valor and valor.strip()}))
+
+
+def _nombres(valores):
+    # Misma normalización que la resolución de catálogos al cargar
+    return tuple(sorted({valor.strip().upper() for valor in valores if valor and valor.strip()}))
+
+
+@dataclass(frozen=True)
+class FiltrosReporte:
+    """
+    Filtros del reporte ya normalizados: dos filtros con la misma selección (en otro
+    orden, con espacios o con otras mayúsculas en los nombres) son iguales y tienen la
+    misma ``clave()``.
+    """
+    anio_inicio: int
+    mes_inicio: int
+    anio_fin: int
+    mes_fin: int
+    concesiones: tuple = ()
+    servicios: tuple = ()
+    zonas: tuple = ()
+    categorias: tuple = ()
+    origenes: tuple = ()
+    dispuestos_pidj: tuple = ()
+
+    @classmethod
+    def desde_parametros(cls, parametros):
+        """
+        Construye los filtros a partir de los parámetros GET del reporte (``QueryDict``).
+        Los años o meses inválidos se reemplazan por los valores por defecto.
+        """
+        anio_actual = datetime.now().year
+        return cls(
+            anio_inicio=_entero(parametros.get('start_year'), anio_actual, 1900, 9999),
+            mes_inicio=_entero(parametros.get('start_month'), 1, 1, 12),
+            anio_fin=_entero(parametros.get('end_year'), anio_actual, 1900, 9999),
+            mes_fin=_entero(parametros.get('end_month'), 12, 1, 12),
+            concesiones=_nombres(parametros.getlist('concesiones')),
+            servicios=_nombres(parametros.getlist('servicios')),
+            zonas=_nombres(parametros.getlist('zonas')),
+            categorias=_valores(parametros.getlist('categorias')),
+            origenes=_valores(parametros.getlist('origenes')),
+            dispuestos_pidj=tuple(
+                valor for valor in _valores(parametros.getlist('dispuestos_pidj')) if valor in VALORES_PIDJ
+            ),
+        )
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """
+        Reconstruye los filtros guardados con ``dataclasses.asdict`` (por ejemplo, en JSON).
+        """
+        return cls(**{
+            nombre: tuple(valor) if isinstance(valor, list) else valor
+            for nombre, valor in datos.items()
+        })
+
+    @property
+    def fecha_inicio(self):
+        return date(self.anio_inicio, self.mes_inicio, 1)
+
+    @property
+    def fecha_fin(self):
+        """
+        Primer día del mes siguiente al mes final (límite exclusivo).
+        """
+        return date(self.anio_fin + self.mes_fin // 12, self.mes_fin % 12 + 1, 1)
+
+    def clave(self):
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:32]
+
+    def condiciones(self):
+        """
+        Retorna ``(sql, parámetros, alias)``: las condiciones del WHERE, sus parámetros y
+        los alias de los catálogos que esas condiciones necesitan unir.
+        """
+        condiciones = [
+            'df.fecha_entrada IS NOT NULL',
+            'df.fecha_entrada >= %s AND df.fecha_entrada < %s',
+        ]
+        parametros = [self.fecha_inicio, self.fecha_fin]
+        alias = set()
+
+        # Las selecciones de catálogo filtran por la llave resuelta al cargar, sin unir el catálogo
+        for nombres, columna, tabla in (
+            (self.concesiones, 'concesion_ref_id', 'ingesta_concesion'),
+            (self.servicios, 'servicio_ref_id', 'ingesta_servicio'),
+            (self.zonas, 'zona_descarga_ref_id', 'ingesta_zonadescarga'),
+        ):
+            if nombres:
+                condiciones.append(f'df.{columna} IN (SELECT id FROM {tabla} WHERE UPPER(TRIM(nombre)) = ANY(%s))')
+                parametros.append(list(nombres))
+
+        if self.categorias:
+            condiciones.append('s.categoria = ANY(%s)')
+            parametros.append(list(self.categorias))
+            alias.add('s')
+
+        if self.origenes:
+            condiciones.append('c.categoria = ANY(%s)')
+            parametros.append(list(self.origenes))
+            alias.add('c')
+
+        if self.dispuestos_pidj:
+            # Cada valor es 'PIDJ' (zona de categoría PIDJ) o 'No Aplica' (cualquier otra)
+            pidj = []
+            if 'PIDJ' in self.dispuestos_pidj:
+                pidj.append("zd.categoria = 'PIDJ'")
+            if 'No Aplica' in self.dispuestos_pidj:
+                pidj.append("(zd.categoria IS NULL OR zd.categoria <> 'PIDJ')")
+            condiciones.append('(' + ' OR '.join(pidj) + ')')
+            alias.add('zd')
+
+        return ' AND '.join(condiciones), parametros, alias
+
+
+class ConsultaReporte:
+    """
+    Consultas de un reporte con ciertos filtros y columnas. La versión de los datos se lee
+    una vez, con la primera consulta, y todas las claves de caché de la instancia la usan.
+    """
+
+    espacio_cache = ESPACIO_CACHE
+
+    def __init__(self, filtros, columnas=COLUMNAS):
+        self.filtros = filtros
+        self.columnas = tuple(columnas)
+        self._version = None
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = version_datos()
+        return self._version
+
+    @property
+    def etiquetas(self):
+        return [columna.etiqueta for columna in self.columnas]
+
+    @property
+    def clave(self):
+        """
+        Clave de los filtros y las columnas, para la caché de resultados y de exportaciones.
+        """
+        contenido = json.dumps([self.filtros.clave(), self.etiquetas])
+        return hashlib.sha256(contenido.encode()).hexdigest()[:32]
+
+    def sql_totales(self):
+        """
+        Cantidad de filas y suma de las toneladas redondeadas por fila. Solo une los
+        catálogos que piden los filtros.
+        """
+        condiciones, parametros, alias = self.filtros.condiciones()
+        sql = (
+            'SELECT COUNT(*), COALESCE(SUM(ROUND(df.peso_residuos / 1000.0, 2)), 0) '
+            f'{sql_desde(alias)} WHERE {condiciones}'
+        )
+        return sql, parametros
+
+    def sql_filas(self, condicion_extra=None, parametros_extra=(), orden=ORDEN, con_id=False):
+        """
+        SELECT de las columnas del reporte con los filtros, ordenado por ``orden``. Con
+        ``con_id`` se agrega ``df.id`` como última columna (clave de paginación).
+        """
+        condiciones, parametros, alias = self.filtros.condiciones()
+        alias = alias | {nombre for columna in self.columnas for nombre in columna.uniones}
+        if condicion_extra:
+            condiciones = f'{condiciones} AND {condicion_extra}'
+            parametros = parametros + list(parametros_extra)
+        seleccion = ', '.join(f'{columna.sql} AS "{columna.etiqueta}"' for columna in self.columnas)
+        if con_id:
+            seleccion += ', df.id'
+        sql = f'SELECT {seleccion} {sql_desde(alias)} WHERE {condiciones} ORDER BY {orden}'
+        return sql, parametros
+
+    def totales(self):
+        """
+        Retorna ``(filas, toneladas)``.
+        """
+        def calcular():
+            sql, parametros = self.sql_totales()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, parametros)
+                return cursor.fetchone()
+        return resultado_en_cache(self.espacio_cache, f'totales:{self.clave}', self.version, calcular)
+
+    def pagina(self, limite, desplazamiento=0, cursor_clave=None, direccion=None):
+        """
+        Filas de una página, cada una con ``df.id`` como última columna. Con
+        ``cursor_clave`` (``(fecha_entrada, id)``) se leen las ``limite`` filas siguientes
+        (``direccion='after'``) o anteriores (``'before'``) a esa clave en lugar de saltar
+        ``desplazamiento`` filas.
+        """
+        def calcular():
+            condicion, parametros_extra, orden, salto = None, (), ORDEN, desplazamiento
+            if cursor_clave:
+                comparacion = '<' if direccion == 'after' else '>'
+                condicion = f'(df.fecha_entrada, df.id) {comparacion} (%s, %s)'
+                parametros_extra = cursor_clave
+                salto = 0
+                if direccion == 'before':
+                    orden = ORDEN_INVERSO
+            sql, parametros = self.sql_filas(condicion, parametros_extra, orden, con_id=True)
+            with connection.cursor() as cursor:
+                cursor.execute(f'{sql} LIMIT %s OFFSET %s', parametros + [limite, salto])
+                filas = cursor.fetchall()
+            if cursor_clave and direccion == 'before':
+                filas.reverse()
+            return filas
+
+        cursor_texto = f'{cursor_clave[0].isoformat()}.{cursor_clave[1]}' if cursor_clave else ''
+        clave = f'pagina:{self.clave}:{limite}:{desplazamiento}:{cursor_texto}:{direccion}'
+        return resultado_en_cache(self.espacio_cache, clave, self.version, calcular)
+
+    def bloques(self, progreso=None):
+        """
+        Recorre todas las filas (sin ``df.id``) con un cursor del servidor, en listas de
+        hasta ``TAMANO_BLOQUE_EXPORTACION`` filas, sin tener más de un bloque en memoria.
+        Si se indica ``progreso``, se llama con las filas entregadas después de cada bloque.
+        """
+        sql, parametros = self.sql_filas()
+        entregadas = 0
+        # Dentro de una transacción el cursor no se materializa completo antes de leerlo
+        with transaction.atomic(), connection.chunked_cursor() as cursor:
+            cursor.execute(sql, parametros)
+            filas = cursor.fetchmany(TAMANO_BLOQUE_EXPORTACION)
+            while filas:
+                yield filas
+                entregadas += len(filas)
+                if progreso:
+                    progreso(entregadas)
+                filas = cursor.fetchmany(TAMANO_BLOQUE_EXPORTACION)
+
+
+def opciones_filtros(version=None):
+    """
+    Opciones de los filtros del reporte: años con datos y valores de los catálogos. Se
+    guardan en la caché de resultados, así que abrir el reporte solo lee la versión de los
+    datos (o usa ``version``, si ya se leyó); los años salen de ``DisposicionFinalMensual``
+    y no de la tabla de hechos.
+    """
+    def calcular():
+        consultas = {
+            'years': 'SELECT DISTINCT year FROM ingesta_disposicionfinalmensual ORDER BY year DESC',
+            'concesiones': 'SELECT DISTINCT nombre FROM ingesta_concesion ORDER BY nombre',
+            'servicios': 'SELECT DISTINCT nombre FROM ingesta_servicio ORDER BY nombre',
+            'zonas': 'SELECT DISTINCT nombre FROM ingesta_zonadescarga ORDER BY nombre',
+            'categorias': 'SELECT DISTINCT categoria FROM ingesta_servicio WHERE categoria IS NOT NULL ORDER BY categoria',
+            'origenes': 'SELECT DISTINCT categoria FROM ingesta_concesion WHERE categoria IS NOT NULL ORDER BY categoria',
+        }
+        opciones = {}
+        with connection.cursor() as cursor:
+            for nombre, sql in consultas.items():
+                cursor.execute(sql)
+                opciones[nombre] = [fila[0] for fila in cursor.fetchall()]
+        return opciones
+    return resultado_en_cache(ESPACIO_CACHE, 'opciones', version_datos() if version is None else version, calcular)
+
+
+class FilasReporte:
+    """
+    Filas filtradas del reporte, que solo se leen por páginas.
+
+    Sirve como lista de objetos de ``Paginator``: ``count()`` retorna el total de la
+    consulta de totales y cada rebanada consulta solo esa página. Si la página viene de
+    un enlace anterior/siguiente, se lee por clave (las filas antes o después de la
+    ``(fecha_entrada, id)`` indicada) en lugar de saltar filas con OFFSET.
+    """
+
+    # FECHA ENTRADA es la columna 4; df.id es la columna extra al final
+    INDICE_FECHA = 4
+
+    def __init__(self, consulta, total, cursor_clave=None, direccion=None):
+        self.consulta = consulta
+        self.total = total
+        self.cursor_clave = cursor_clave
+        self.direccion = direccion
+        self.primera_clave = None
+        self.ultima_clave = None
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            raise TypeError('FilasReporte solo admite rebanadas')
+        filas = self.consulta.pagina(
+            indice.stop - indice.start, indice.start, self.cursor_clave, self.direccion
+        )
+        if filas:
+            self.primera_clave = (filas[0][self.INDICE_FECHA], filas[0][-1])
+            self.ultima_clave = (filas[-1][self.INDICE_FECHA], filas[-1][-1])
+        return [fila[:-1] for fila in filas]
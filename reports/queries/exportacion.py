@@ -0,0 +1,128 @@
+"""
+Exportación de un ``ConsultaReporte`` a CSV o XLSX.
+
+Las filas se leen por bloques con un cursor del servidor, así que la memoria no crece
+con la cantidad de filas. Cada archivo terminado queda en el directorio de exportaciones
+con la clave de la consulta y la versión de los datos: exportar otra vez los mismos
+filtros, sin cambios en los datos y antes de ``REPORTES_EXPORTACIONES_HORAS``, entrega el
+archivo ya generado sin consultar la base.
+"""
+import csv
+import os
+from itertools import chain
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .cache import exportacion_vigente, publicar_exportacion, ruta_exportacion, ruta_temporal
+
+NOMBRE_HOJA_XLSX = 'Reporte Disposición Final'
+
+# Filas usadas para estimar el ancho de las columnas del XLSX
+MUESTRA_ANCHOS_XLSX = 500
+
+
+class _Eco:
+    """
+    Objeto tipo archivo para ``csv.writer`` que retorna cada línea en lugar de guardarla.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def ruta_en_cache(consulta, extension):
+    """
+    Ruta de la exportación de la consulta con la versión actual de los datos (exista o no).
+    """
+    return ruta_exportacion(consulta.espacio_cache, consulta.clave, consulta.version, extension)
+
+
+def lineas_csv(consulta, progreso=None):
+    """
+    Genera el CSV de la consulta por bloques de líneas (``progreso`` como en
+    ``ConsultaReporte.bloques``).
+    """
+    escritor = csv.writer(_Eco())
+    # BOM de UTF-8 para que Excel reconozca la codificación
+    yield '\ufeff' + escritor.writerow(consulta.etiquetas)
+    for filas in consulta.bloques(progreso):
+        yield ''.join(escritor.writerow(fila) for fila in filas)
+
+
+def lineas_csv_en_cache(consulta, ruta):
+    """
+    Como ``lineas_csv``, pero escribe también cada línea en ``ruta``. El archivo solo se
+    publica si el CSV se generó completo; si la descarga se interrumpe, se descarta.
+    """
+    temporal = ruta_temporal(ruta)
+    try:
+        with open(temporal, 'w', encoding='utf-8', newline='') as archivo:
+            for lineas in lineas_csv(consulta):
+                archivo.write(lineas)
+                yield lineas
+    except BaseException:
+        # También GeneratorExit, cuando el cliente cierra la conexión
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    publicar_exportacion(temporal, ruta, consulta.version)
+
+
+def escribir_xlsx(consulta, archivo, progreso=None):
+    """
+    Escribe la consulta en ``archivo`` con un libro de solo escritura (las filas pasan a
+    disco a medida que se agregan). ``progreso`` como en ``ConsultaReporte.bloques``.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(NOMBRE_HOJA_XLSX)
+
+    columnas = consulta.etiquetas
+    bloques = consulta.bloques(progreso)
+    primeras = next(bloques, [])
+
+    # Los anchos se estiman con el encabezado y las primeras filas (máximo 50 caracteres)
+    muestra = primeras[:MUESTRA_ANCHOS_XLSX]
+    for indice, columna in enumerate(columnas):
+        largo = max([len(columna)] + [len(str(fila[indice])) for fila in muestra if fila[indice] is not None])
+        hoja.column_dimensions[get_column_letter(indice + 1)].width = min(largo + 2, 50)
+
+    fuente = Font(bold=True, color="FFFFFF")
+    relleno = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    alineacion = Alignment(horizontal="center", vertical="center")
+    encabezado = []
+    for columna in columnas:
+        celda = WriteOnlyCell(hoja, value=columna)
+        celda.font = fuente
+        celda.fill = relleno
+        celda.alignment = alineacion
+        encabezado.append(celda)
+    hoja.append(encabezado)
+
+    for filas in chain([primeras], bloques):
+        for fila in filas:
+            hoja.append(fila)
+
+    libro.save(archivo)
+
+
+def xlsx_en_cache(consulta):
+    """
+    Retorna la ruta del XLSX de la consulta, generándolo si no existe para esta versión o
+    ya venció.
+    """
+    ruta = ruta_en_cache(consulta, 'xlsx')
+    if exportacion_vigente(ruta):
+        return ruta
+    temporal = ruta_temporal(ruta)
+    try:
+        with open(temporal, 'wb') as archivo:
+            escribir_xlsx(consulta, archivo)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    publicar_exportacion(temporal, ruta, consulta.version)
+    return ruta
@@ -0,0 +1,235 @@
+"""
+Modo agregado (tabla dinámica) del reporte de disposición final.
+
+``PivoteReporte`` agrupa en la base de datos las filas que cumplen los mismos
+``FiltrosReporte`` del reporte por las dimensiones elegidas para filas y columnas, con
+``GROUP BY GROUPING SETS``: en una sola consulta salen las celdas, los subtotales de cada
+nivel de filas, los totales de cada columna y el total general. Solo viajan los grupos,
+no las filas. El resultado se guarda en la caché de resultados como los del reporte.
+
+Tiene la misma interfaz de exportación que ``ConsultaReporte`` (``etiquetas``,
+``bloques``, ``clave``, ``version``), así que se exporta con las mismas funciones.
+"""
+import hashlib
+import json
+from itertools import product
+
+from django.db import connection
+
+from globalfunctions.string_manager import get_string
+
+from .cache import resultado_en_cache, version_datos
+from .disposicion_final import ESPACIO_CACHE, Columna, sql_desde
+
+DIMENSIONES = {
+    'anio': Columna('AÑO', 'EXTRACT(YEAR FROM df.fecha_entrada)::int'),
+    'mes': Columna('MES', 'EXTRACT(MONTH FROM df.fecha_entrada)::int'),
+    'concesion': Columna('CONCESION', 'UPPER(TRIM(df.concesion))'),
+    'servicio': Columna('SERVICIO', 'UPPER(TRIM(df.servicio))'),
+    'zona': Columna('ZONA DESCARGA', 'UPPER(TRIM(df.zona_descarga))'),
+    'categoria': Columna('CATEGORIA DEL SERVICIO', 's.categoria', ('s',)),
+    'origen': Columna('ORIGEN DEL RESIDUO', 'c.categoria', ('c',)),
+    'pidj': Columna('DISPUESTOS PIDJ', "CASE WHEN zd.categoria = 'PIDJ' THEN 'PIDJ' ELSE 'No Aplica' END", ('zd',)),
+}
+
+MEDIDAS = {
+    'toneladas': Columna('TONELADAS', 'SUM(ROUND(df.peso_residuos / 1000.0, 2))'),
+    'viajes': Columna('VIAJES', 'COUNT(*)'),
+    'peso_promedio': Columna('PESO NETO PROMEDIO (KG)', 'ROUND(AVG(df.peso_residuos), 2)'),
+}
+
+MEDIDAS_POR_DEFECTO = ('toneladas',)
+
+# Máximo de dimensiones entre filas y columnas, y de grupos que puede tener el resultado
+MAX_DIMENSIONES = 4
+MAX_GRUPOS = 20000
+
+
+class ErrorPivote(Exception):
+    """
+    La tabla agregada pedida es demasiado grande.
+    """
+
+
+def _claves(valores, validas, excluir=()):
+    claves = []
+    for valor in valores:
+        if valor in validas and valor not in excluir and valor not in claves:
+            claves.append(valor)
+    return claves
+
+
+class PivoteReporte:
+    """
+    Tabla agregada de los filtros del reporte por ``filas`` y ``columnas`` (claves de
+    ``DIMENSIONES``, en orden) con las ``medidas`` (claves de ``MEDIDAS``).
+    """
+
+    espacio_cache = ESPACIO_CACHE
+
+    def __init__(self, filtros, filas=(), columnas=(), medidas=()):
+        self.filtros = filtros
+        self.filas = _claves(filas, DIMENSIONES)[:MAX_DIMENSIONES]
+        self.columnas = _claves(columnas, DIMENSIONES, self.filas)[:MAX_DIMENSIONES - len(self.filas)]
+        self.medidas = _claves(medidas, MEDIDAS) or list(MEDIDAS_POR_DEFECTO)
+        self._version = None
+
+    @classmethod
+    def desde_parametros(cls, filtros, parametros):
+        """
+        Lee las dimensiones y medidas de los parámetros ``pivote_filas``,
+        ``pivote_columnas`` y ``pivote_medidas``; las claves desconocidas se ignoran.
+        """
+        return cls(
+            filtros,
+            parametros.getlist('pivote_filas'),
+            parametros.getlist('pivote_columnas'),
+            parametros.getlist('pivote_medidas'),
+        )
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = version_datos()
+        return self._version
+
+    @property
+    def clave(self):
+        contenido = json.dumps(['pivote', self.filtros.clave(), self.filas, self.columnas, self.medidas])
+        return hashlib.sha256(contenido.encode()).hexdigest()[:32]
+
+    @property
+    def dimensiones(self):
+        return [DIMENSIONES[clave] for clave in self.filas + self.columnas]
+
+    def sql(self):
+        """
+        Consulta con una fila por grupo: las dimensiones (NULL donde el grupo es un
+        subtotal), las medidas y ``GROUPING()`` de las dimensiones como último valor.
+        """
+        condiciones, parametros, alias = self.filtros.condiciones()
+        dimensiones = self.dimensiones
+        medidas = [MEDIDAS[clave] for clave in self.medidas]
+        alias = alias | {nombre for dimension in dimensiones for nombre in dimension.uniones}
+
+        expresiones = [dimension.sql for dimension in dimensiones]
+        seleccion = expresiones + [medida.sql for medida in medidas]
+        if expresiones:
+            seleccion.append(f"GROUPING({', '.join(expresiones)})")
+
+        # Niveles de filas de mayor a menor detalle (hasta el total) cruzados con el
+        # detalle de las columnas y su total
+        filas = [DIMENSIONES[clave].sql for clave in self.filas]
+        columnas = [DIMENSIONES[clave].sql for clave in self.columnas]
+        niveles_filas = [filas[:cantidad] for cantidad in range(len(filas), -1, -1)]
+        niveles_columnas = [columnas, []] if columnas else [[]]
+        conjuntos = ', '.join(
+            f"({', '.join(nivel_filas + nivel_columnas)})"
+            for nivel_filas, nivel_columnas in product(niveles_filas, niveles_columnas)
+        )
+        orden = ', '.join(f'GROUPING({expresion}), {expresion}' for expresion in expresiones) or '1'
+
+        sql = (
+            f"SELECT {', '.join(seleccion)} {sql_desde(alias)} WHERE {condiciones} "
+            f"GROUP BY GROUPING SETS ({conjuntos}) ORDER BY {orden} LIMIT %s"
+        )
+        return sql, parametros + [MAX_GRUPOS + 1]
+
+    def grupos(self):
+        """
+        Filas de la consulta agregada, desde la caché de resultados si ya se calculó.
+        """
+        def calcular():
+            sql, parametros = self.sql()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, parametros)
+                return cursor.fetchall()
+
+        grupos = resultado_en_cache(self.espacio_cache, f'pivote:{self.clave}', self.version, calcular)
+        if len(grupos) > MAX_GRUPOS:
+            raise ErrorPivote(get_string('errors.pivot_too_many_groups', 'reports').format(max=MAX_GRUPOS))
+        return grupos
+
+    def tabla(self):
+        """
+        Retorna la tabla para mostrar: ``encabezados`` (etiquetas de las dimensiones de
+        filas), ``columnas`` (etiqueta y si es un total), ``medidas`` (etiquetas) y
+        ``filas`` (valores de las dimensiones, si es un subtotal y las celdas, una por
+        columna y medida).
+        """
+        total = get_string('templates.pivot_total', 'reports')
+        sin_dato = get_string('templates.pivot_no_value', 'reports')
+        cantidad_filas, cantidad_dimensiones = len(self.filas), len(self.filas) + len(self.columnas)
+        cantidad_medidas = len(self.medidas)
+
+        def clave(valores, agrupadas):
+            return tuple((agrupada, valor is None, valor) for valor, agrupada in zip(valores, agrupadas))
+
+        def etiqueta(parte):
+            agrupada, nulo, valor = parte
+            return total if agrupada else (sin_dato if nulo else valor)
+
+        celdas, orden_filas, claves_columnas = {}, [], set()
+        for grupo in self.grupos():
+            nivel = grupo[-1] if cantidad_dimensiones else 0
+            agrupadas = [bool(nivel >> (cantidad_dimensiones - 1 - indice) & 1) for indice in range(cantidad_dimensiones)]
+            clave_fila = clave(grupo[:cantidad_filas], agrupadas[:cantidad_filas])
+            clave_columna = clave(grupo[cantidad_filas:cantidad_dimensiones], agrupadas[cantidad_filas:])
+            if clave_fila not in celdas:
+                celdas[clave_fila] = {}
+                orden_filas.append(clave_fila)
+            celdas[clave_fila][clave_columna] = grupo[cantidad_dimensiones:cantidad_dimensiones + cantidad_medidas]
+            claves_columnas.add(clave_columna)
+
+        claves_columnas = sorted(claves_columnas)
+        vacio = (None,) * cantidad_medidas
+        return {
+            'encabezados': [DIMENSIONES[clave].etiqueta for clave in self.filas],
+            'columnas': [
+                {
+                    'etiqueta': ' / '.join(str(etiqueta(parte)) for parte in clave_columna) or total,
+                    'total': any(parte[0] for parte in clave_columna) or not clave_columna,
+                }
+                for clave_columna in claves_columnas
+            ],
+            'medidas': [MEDIDAS[clave].etiqueta for clave in self.medidas],
+            'filas': [
+                {
+                    'valores': [etiqueta(parte) for parte in clave_fila] or [total],
+                    'subtotal': any(parte[0] for parte in clave_fila) or not clave_fila,
+                    'celdas': [
+                        valor
+                        for clave_columna in claves_columnas
+                        for valor in celdas[clave_fila].get(clave_columna, vacio)
+                    ],
+                }
+                for clave_fila in orden_filas
+            ],
+        }
+
+    @property
+    def etiquetas(self):
+        """
+        Encabezado plano de la exportación: las dimensiones de filas y una columna por
+        cada columna de la tabla y medida.
+        """
+        tabla = self._tabla_exportacion()
+        etiquetas = list(tabla['encabezados']) or [get_string('templates.pivot_total', 'reports')]
+        for columna in tabla['columnas']:
+            for medida in tabla['medidas']:
+                etiquetas.append(f"{columna['etiqueta']} - {medida}" if self.columnas else medida)
+        return etiquetas
+
+    def bloques(self, progreso=None):
+        """
+        La tabla como un único bloque de filas planas, para las funciones de exportación.
+        """
+        filas = [fila['valores'] + fila['celdas'] for fila in self._tabla_exportacion()['filas']]
+        yield filas
+        if progreso:
+            progreso(len(filas))
+
+    def _tabla_exportacion(self):
+        if not hasattr(self, '_tabla'):
+            self._tabla = self.tabla()
+        return self._tabla
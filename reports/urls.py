@@ -9,6 +9,9 @@ urlpatterns = [
     path('disposicion_final/', disposicion_final_dashboard.disposicion_final_dashboard, name='disposicion_final_dashboard'),
     path('disposicion_final_reportes/', disposicion_final_reportes.disposicion_final_reportes, name='disposicion_final_reportes'),
     path('disposicion_final_reportes/export/', disposicion_final_reportes.export_report_csv, name='df_export_report_csv'),
+    path('disposicion_final_reportes/exportaciones/', disposicion_final_reportes.export_report_job, name='df_export_job'),
+    path('disposicion_final_reportes/exportaciones/<int:export_id>/', disposicion_final_reportes.export_job_status, name='df_export_job_status'),
+    path('disposicion_final_reportes/exportaciones/<int:export_id>/descargar/', disposicion_final_reportes.export_job_download, name='df_export_job_download'),
     path('rbl/', rbl_dashboard.rbl_dashboard, name='rbl_dashboard'),
     path('aprovechamiento/', aprovechamiento_dashboard.aprovechamiento_dashboard, name='aprovechamiento_dashboard'),
     path('alumbrado/', alumbrado_dashboard.alumbrado_dashboard, name='alumbrado_dashboard'),
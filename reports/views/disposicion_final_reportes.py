@@ -1,26 +1,65 @@
-import csv
 import json
-from datetime import datetime
-from io import BytesIO, StringIO
+from datetime import date, datetime
 
-import pandas as pd
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.db import connection
-from django.http import HttpResponse
-from django.shortcuts import render
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from minio.error import S3Error
 
 from accounts.models import UserProfile
 from accounts.utils import role_required
 from django.contrib.auth.decorators import login_required
 from coreview.base import get_template_context
 from globalfunctions.string_manager import get_string
+from reports.jobs.exportacion import CONTENT_TYPES, encolar_exportacion, leer_exportacion
+from reports.models import ExportacionReporte
+from reports.queries import (
+    DIMENSIONES, MEDIDAS, ConsultaReporte, ErrorPivote, FilasReporte, FiltrosReporte, PivoteReporte,
+    exportacion_vigente, lineas_csv_en_cache, opciones_filtros, ruta_en_cache, xlsx_en_cache
+)
 from .main_dashboard import get_areas_misionales_context
 
 
+# Rows per page of the report table
+REPORT_PAGE_SIZE = 50
+
+
+def _parse_page_key(value):
+    """
+    Parse a page cursor ("<fecha_entrada>.<id>"); returns None if it is missing or invalid.
+    """
+    try:
+        fecha, row_id = value.split('.')
+        return date.fromisoformat(fecha), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _format_page_key(key):
+    return f"{key[0].isoformat()}.{key[1]}" if key else None
+
+
+def _pivot_query(filters, params):
+    """
+    Pivot of the report filters when the aggregate mode is on (``modo=pivote``), else None.
+    """
+    if params.get('modo') != 'pivote':
+        return None
+    return PivoteReporte.desde_parametros(filters, params)
+
+
+def _export_filename(query, export_format):
+    suffix = '_pivote' if isinstance(query, PivoteReporte) else ''
+    return f'reporte_disposicion_final{suffix}.{export_format}'
+
+
 @login_required
 def disposicion_final_reportes(request):
     """
-    Simple report builder using the disposicion_final_detallada view.
+    Simple report builder over DisposicionFinal and its catalogs (same columns as disposicion_final_detallada).
     Clean, intuitive interface for filtering data with date ranges and multi-select.
     """
     
@@ -41,155 +80,84 @@ def disposicion_final_reportes(request):
     origenes = request.GET.getlist('origenes')
     dispuestos_pidj = request.GET.getlist('dispuestos_pidj')
     
-    # Get available filter options
-    with connection.cursor() as cursor:
-        # Get available years
-        cursor.execute("SELECT DISTINCT \"AÑO\" FROM disposicion_final_detallada ORDER BY \"AÑO\" DESC")
-        years = [row[0] for row in cursor.fetchall()]
-        
-        # Get available months
-        months = [
-            {'value': '1', 'name': 'Enero'},
-            {'value': '2', 'name': 'Febrero'},
-            {'value': '3', 'name': 'Marzo'},
-            {'value': '4', 'name': 'Abril'},
-            {'value': '5', 'name': 'Mayo'},
-            {'value': '6', 'name': 'Junio'},
-            {'value': '7', 'name': 'Julio'},
-            {'value': '8', 'name': 'Agosto'},
-            {'value': '9', 'name': 'Septiembre'},
-            {'value': '10', 'name': 'Octubre'},
-            {'value': '11', 'name': 'Noviembre'},
-            {'value': '12', 'name': 'Diciembre'},
-        ]
-        
-        # Get available concesiones
-        cursor.execute("SELECT DISTINCT \"nombre\" FROM ingesta_concesion ORDER BY \"nombre\"")
-        concesiones_options = [row[0] for row in cursor.fetchall()]
-        
-        # Get available servicios
-        cursor.execute("SELECT DISTINCT \"nombre\" FROM ingesta_servicio ORDER BY \"nombre\"")
-        servicios_options = [row[0] for row in cursor.fetchall()]
-        
-        # Get available zonas
-        cursor.execute("SELECT DISTINCT \"nombre\" FROM ingesta_zonadescarga ORDER BY \"nombre\"")
-        zonas_options = [row[0] for row in cursor.fetchall()]
-        
-        # Get available categorias
-        cursor.execute("SELECT DISTINCT \"categoria\" FROM ingesta_servicio WHERE \"categoria\" IS NOT NULL ORDER BY \"categoria\"")
-        categorias_options = [row[0] for row in cursor.fetchall()]
-        
-        # Get available origenes
-        cursor.execute("SELECT DISTINCT \"categoria\" FROM ingesta_concesion WHERE \"categoria\" IS NOT NULL ORDER BY \"categoria\"")
-        origenes_options = [row[0] for row in cursor.fetchall()]
-    
-    # Build direct query to base tables (much faster than using the view)
-    query = """
-    SELECT
-        EXTRACT(YEAR FROM df.fecha_entrada) AS "AÑO",
-        EXTRACT(MONTH FROM df.fecha_entrada) AS "MES",
-        EXTRACT(DAY FROM df.fecha_entrada) AS "DÍA",
-        ROUND(df.peso_residuos / 1000.0, 2) AS "PESO RESIDUOS TON",
-        df.fecha_entrada AS "FECHA ENTRADA",
-        df.fecha_salida AS "FECHA SALIDA",
-        df.consecutivo_entrada AS "CONSECUTIVO ENTRADA",
-        df.consecutivo_salida AS "CONSECUTIVO SALIDA",
-        df.placa AS "PLACA",
-        df.numero_vehiculo AS "NUMERO VEHICULO",
-        UPPER(TRIM(df.concesion)) AS "CONCESION",
-        df.macroruta AS "MACRORUTA",
-        df.microruta AS "MICRORUTA",
-        UPPER(TRIM(df.ase)) AS "ASE",
-        UPPER(TRIM(df.servicio)) AS "SERVICIO",
-        UPPER(TRIM(df.zona_descarga)) AS "ZONA DESCARGA",
-        df.peso_entrada AS "PESO ENTRADA",
-        df.peso_salida AS "PESO SALIDA",
-        df.peso_residuos AS "PESO RESIDUOS",
-        s.categoria AS "CATEGORIA DEL SERVICIO",
-        c.categoria AS "ORIGEN DEL RESIDUO",
-        CASE
-            WHEN zd.categoria = 'PIDJ' THEN 'PIDJ'
-            ELSE NULL
-        END AS "DISPUESTOS PIDJ"
-    FROM
-        ingesta_disposicionfinal df
-    LEFT JOIN
-        ingesta_concesion c ON UPPER(TRIM(df.concesion)) = UPPER(TRIM(c.nombre))
-    LEFT JOIN
-        ingesta_servicio s ON UPPER(TRIM(df.servicio)) = UPPER(TRIM(s.nombre))
-    LEFT JOIN
-        ingesta_zonadescarga zd ON UPPER(TRIM(df.zona_descarga)) = UPPER(TRIM(zd.nombre))
-    LEFT JOIN
-        ingesta_ase a ON UPPER(TRIM(df.ase)) = UPPER(TRIM(a.nombre))
-    WHERE
-        df.fecha_entrada IS NOT NULL
-    """
-    params = []
-    
-    # Date range filters - use direct date comparison instead of extracted year/month
-    query += " AND df.fecha_entrada >= %s AND df.fecha_entrada <= %s"
-    params.extend([f"{start_year}-{start_month.zfill(2)}-01", f"{end_year}-{end_month.zfill(2)}-31"])
-    
-    # Multi-select filters - only apply if selections are made
-    if concesiones and len(concesiones) > 0:
-        placeholders = ','.join(['%s'] * len(concesiones))
-        query += f" AND UPPER(TRIM(df.concesion)) IN ({placeholders})"
-        params.extend([concesion.upper().strip() for concesion in concesiones])
-    
-    if servicios and len(servicios) > 0:
-        placeholders = ','.join(['%s'] * len(servicios))
-        query += f" AND UPPER(TRIM(df.servicio)) IN ({placeholders})"
-        params.extend([servicio.upper().strip() for servicio in servicios])
-    
-    if zonas and len(zonas) > 0:
-        placeholders = ','.join(['%s'] * len(zonas))
-        query += f" AND UPPER(TRIM(df.zona_descarga)) IN ({placeholders})"
-        params.extend([zona.upper().strip() for zona in zonas])
-    
-    if categorias and len(categorias) > 0:
-        placeholders = ','.join(['%s'] * len(categorias))
-        query += f" AND s.categoria IN ({placeholders})"
-        params.extend(categorias)
-    
-    if origenes and len(origenes) > 0:
-        placeholders = ','.join(['%s'] * len(origenes))
-        query += f" AND c.categoria IN ({placeholders})"
-        params.extend(origenes)
-    
-    if dispuestos_pidj and len(dispuestos_pidj) > 0:
-        # Handle PIDJ filtering - it's either 'PIDJ' or NULL
-        pidj_conditions = []
-        for value in dispuestos_pidj:
-            if value == 'PIDJ':
-                pidj_conditions.append("zd.categoria = 'PIDJ'")
-            elif value == 'No Aplica':
-                pidj_conditions.append("(zd.categoria IS NULL OR zd.categoria <> 'PIDJ')")
-        
-        if pidj_conditions:
-            query += " AND (" + " OR ".join(pidj_conditions) + ")"
-    
-    query += " ORDER BY df.fecha_entrada DESC"
-    
-    # Execute query and get results
-    with connection.cursor() as cursor:
-        cursor.execute(query, params)
-        columns = [col[0] for col in cursor.description]
-        results = cursor.fetchall()
-    
-    # Paginate results
-    paginator = Paginator(results, 50)  # 50 records per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Calculate totals
-    total_records = len(results)
-    total_weight = sum(row[3] for row in results)  # PESO RESIDUOS TON is column 3
-    
+    filters = FiltrosReporte.desde_parametros(request.GET)
+    query = ConsultaReporte(filters)
+    pivot_query = _pivot_query(filters, request.GET)
+
+    # Filter options come from the result cache (no query on the fact table)
+    options = opciones_filtros(query.version)
+    years = options['years']
+    months = [
+        {'value': '1', 'name': 'Enero'},
+        {'value': '2', 'name': 'Febrero'},
+        {'value': '3', 'name': 'Marzo'},
+        {'value': '4', 'name': 'Abril'},
+        {'value': '5', 'name': 'Mayo'},
+        {'value': '6', 'name': 'Junio'},
+        {'value': '7', 'name': 'Julio'},
+        {'value': '8', 'name': 'Agosto'},
+        {'value': '9', 'name': 'Septiembre'},
+        {'value': '10', 'name': 'Octubre'},
+        {'value': '11', 'name': 'Noviembre'},
+        {'value': '12', 'name': 'Diciembre'},
+    ]
+    concesiones_options = options['concesiones']
+    servicios_options = options['servicios']
+    zonas_options = options['zonas']
+    categorias_options = options['categorias']
+    origenes_options = options['origenes']
+
+    # Filtered rows and totals; only the requested page is read, and both come from the
+    # result cache when the same filters ran before on the same data
+    total_records, total_weight = query.totales()
+
+    # Aggregate mode: the pivot (with its subtotals) is grouped in the database and
+    # replaces the row table
+    pivot, pivot_error, page_obj, rows = None, None, None, None
+    if pivot_query is not None:
+        try:
+            pivot = pivot_query.tabla()
+        except ErrorPivote as error:
+            pivot_error = str(error)
+    else:
+        # Keyset cursor of the page being requested (set by the previous/next links)
+        cursor_key, cursor_direction = None, None
+        for direction in ('after', 'before'):
+            key = _parse_page_key(request.GET.get(direction))
+            if key:
+                cursor_key, cursor_direction = key, direction
+                break
+
+        rows = FilasReporte(query, total_records, cursor_key, cursor_direction)
+        paginator = Paginator(rows, REPORT_PAGE_SIZE)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+    columns = query.etiquetas
+
+    # Query string with the current filters, for the pagination links
+    filters_query = request.GET.copy()
+    for key in ('page', 'after', 'before'):
+        filters_query.pop(key, None)
+    filters_query = filters_query.urlencode()
+
     context = {
         'page_obj': page_obj,
         'columns': columns,
         'total_records': total_records,
         'total_weight': round(total_weight, 2),
+        'filters_query': f'{filters_query}&' if filters_query else '',
+        'next_page_key': _format_page_key(rows.ultima_clave) if page_obj and page_obj.has_next() else None,
+        'previous_page_key': _format_page_key(rows.primera_clave) if page_obj and page_obj.has_previous() else None,
+
+        # Aggregate mode
+        'pivot_mode': pivot_query is not None,
+        'pivot': pivot,
+        'pivot_error': pivot_error,
+        'pivot_dimensions': [{'value': key, 'name': column.etiqueta} for key, column in DIMENSIONES.items()],
+        'pivot_measures': [{'value': key, 'name': column.etiqueta} for key, column in MEDIDAS.items()],
+        'current_pivot_rows': request.GET.getlist('pivote_filas'),
+        'current_pivot_columns': request.GET.getlist('pivote_columnas'),
+        'current_pivot_measures': request.GET.getlist('pivote_medidas'),
         
         # Filter options
         'years': years,
@@ -237,6 +205,7 @@ def disposicion_final_reportes(request):
         'TEMPLATE_FILTER_PIDJ_OPTION_NOT_APPLICABLE': get_string('templates.filter_pidj_option_not_applicable', 'reports'),
         'TEMPLATE_FILTER_BUTTON_RUN': get_string('templates.filter_button_run', 'reports'),
         'TEMPLATE_FILTER_BUTTON_EXPORT': get_string('templates.filter_button_export', 'reports'),
+        'TEMPLATE_FILTER_BUTTON_EXPORT_CSV': get_string('templates.filter_button_export_csv', 'reports'),
         'TEMPLATE_FILTER_BUTTON_RESET': get_string('templates.filter_button_reset', 'reports'),
         'TEMPLATE_SUMMARY_TOTAL_RECORDS': get_string('templates.summary_total_records', 'reports'),
         'TEMPLATE_SUMMARY_TOTAL_WEIGHT': get_string('templates.summary_total_weight', 'reports'),
@@ -255,6 +224,14 @@ def disposicion_final_reportes(request):
         'TEMPLATE_MODAL_EXPORT_DYNAMIC_FILTERS': get_string('templates.modal_export_dynamic_filters', 'reports'),
         'TEMPLATE_MODAL_EXPORT_DYNAMIC_SUFFIX': get_string('templates.modal_export_dynamic_suffix', 'reports'),
         'TEMPLATE_MODAL_EXPORT_FILTERS_ZERO': get_string('templates.modal_export_filters_zero', 'reports'),
+        'TEMPLATE_MODAL_EXPORT_CLOSE': get_string('templates.modal_export_close', 'reports'),
+        'TEMPLATE_PIVOT_TITLE': get_string('templates.pivot_title', 'reports'),
+        'TEMPLATE_PIVOT_ENABLE': get_string('templates.pivot_enable', 'reports'),
+        'TEMPLATE_PIVOT_ROWS': get_string('templates.pivot_rows', 'reports'),
+        'TEMPLATE_PIVOT_COLUMNS': get_string('templates.pivot_columns', 'reports'),
+        'TEMPLATE_PIVOT_MEASURES': get_string('templates.pivot_measures', 'reports'),
+        'TEMPLATE_PIVOT_HINT': get_string('templates.pivot_hint', 'reports'),
+        'TEMPLATE_PIVOT_RESULTS_TITLE': get_string('templates.pivot_results_title', 'reports'),
     }
     
     context.update(get_areas_misionales_context())
@@ -262,162 +239,115 @@ def disposicion_final_reportes(request):
     
     return render(request, 'reports/disposicion_final_reportes.html', context)
 
+
 @role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR, UserProfile.ROLE_REGISTER_USER])
 def export_report_csv(request):
     """
-    Export filtered report data to CSV
+    Export filtered report data as XLSX, or as CSV with ``format=csv``.
+    Rows are read from a server-side cursor in chunks, so memory use does not grow with the rows.
+    The finished file is kept for the data version, so exporting the same filters again
+    within REPORTES_EXPORTACIONES_HORAS serves that file without querying the database. In aggregate mode the pivot table is exported.
     """
-    # Get the same filters as the main view
-    start_year = request.GET.get('start_year', str(datetime.now().year))
-    end_year = request.GET.get('end_year', str(datetime.now().year))
-    start_month = request.GET.get('start_month', '1')
-    end_month = request.GET.get('end_month', '12')
-    
-    concesiones = request.GET.getlist('concesiones')
-    servicios = request.GET.getlist('servicios')
-    zonas = request.GET.getlist('zonas')
-    categorias = request.GET.getlist('categorias')
-    origenes = request.GET.getlist('origenes')
-    dispuestos_pidj = request.GET.getlist('dispuestos_pidj')
-    
-    # Build the same direct query as the main view
-    query = """
-    SELECT
-        EXTRACT(YEAR FROM df.fecha_entrada) AS "AÑO",
-        EXTRACT(MONTH FROM df.fecha_entrada) AS "MES",
-        EXTRACT(DAY FROM df.fecha_entrada) AS "DÍA",
-        ROUND(df.peso_residuos / 1000.0, 2) AS "PESO RESIDUOS TON",
-        df.fecha_entrada AS "FECHA ENTRADA",
-        df.fecha_salida AS "FECHA SALIDA",
-        df.consecutivo_entrada AS "CONSECUTIVO ENTRADA",
-        df.consecutivo_salida AS "CONSECUTIVO SALIDA",
-        df.placa AS "PLACA",
-        df.numero_vehiculo AS "NUMERO VEHICULO",
-        UPPER(TRIM(df.concesion)) AS "CONCESION",
-        df.macroruta AS "MACRORUTA",
-        df.microruta AS "MICRORUTA",
-        UPPER(TRIM(df.ase)) AS "ASE",
-        UPPER(TRIM(df.servicio)) AS "SERVICIO",
-        UPPER(TRIM(df.zona_descarga)) AS "ZONA DESCARGA",
-        df.peso_entrada AS "PESO ENTRADA",
-        df.peso_salida AS "PESO SALIDA",
-        df.peso_residuos AS "PESO RESIDUOS",
-        s.categoria AS "CATEGORIA DEL SERVICIO",
-        c.categoria AS "ORIGEN DEL RESIDUO",
-        CASE
-            WHEN zd.categoria = 'PIDJ' THEN 'PIDJ'
-            ELSE NULL
-        END AS "DISPUESTOS PIDJ"
-    FROM
-        ingesta_disposicionfinal df
-    LEFT JOIN
-        ingesta_concesion c ON UPPER(TRIM(df.concesion)) = UPPER(TRIM(c.nombre))
-    LEFT JOIN
-        ingesta_servicio s ON UPPER(TRIM(df.servicio)) = UPPER(TRIM(s.nombre))
-    LEFT JOIN
-        ingesta_zonadescarga zd ON UPPER(TRIM(df.zona_descarga)) = UPPER(TRIM(zd.nombre))
-    LEFT JOIN
-        ingesta_ase a ON UPPER(TRIM(df.ase)) = UPPER(TRIM(a.nombre))
-    WHERE
-        df.fecha_entrada IS NOT NULL
-    """
-    params = []
-    
-    # Date range filters - use direct date comparison instead of extracted year/month
-    query += " AND df.fecha_entrada >= %s AND df.fecha_entrada <= %s"
-    params.extend([f"{start_year}-{start_month.zfill(2)}-01", f"{end_year}-{end_month.zfill(2)}-31"])
-    
-    # Multi-select filters - only apply if selections are made
-    if concesiones and len(concesiones) > 0:
-        placeholders = ','.join(['%s'] * len(concesiones))
-        query += f" AND UPPER(TRIM(df.concesion)) IN ({placeholders})"
-        params.extend([concesion.upper().strip() for concesion in concesiones])
-    
-    if servicios and len(servicios) > 0:
-        placeholders = ','.join(['%s'] * len(servicios))
-        query += f" AND UPPER(TRIM(df.servicio)) IN ({placeholders})"
-        params.extend([servicio.upper().strip() for servicio in servicios])
-    
-    if zonas and len(zonas) > 0:
-        placeholders = ','.join(['%s'] * len(zonas))
-        query += f" AND UPPER(TRIM(df.zona_descarga)) IN ({placeholders})"
-        params.extend([zona.upper().strip() for zona in zonas])
-    
-    if categorias and len(categorias) > 0:
-        placeholders = ','.join(['%s'] * len(categorias))
-        query += f" AND s.categoria IN ({placeholders})"
-        params.extend(categorias)
-    
-    if origenes and len(origenes) > 0:
-        placeholders = ','.join(['%s'] * len(origenes))
-        query += f" AND c.categoria IN ({placeholders})"
-        params.extend(origenes)
-    
-    if dispuestos_pidj and len(dispuestos_pidj) > 0:
-        # Handle PIDJ filtering - it's either 'PIDJ' or NULL
-        pidj_conditions = []
-        for value in dispuestos_pidj:
-            if value == 'PIDJ':
-                pidj_conditions.append("zd.categoria = 'PIDJ'")
-            elif value == 'No Aplica':
-                pidj_conditions.append("(zd.categoria IS NULL OR zd.categoria <> 'PIDJ')")
-        
-        if pidj_conditions:
-            query += " AND (" + " OR ".join(pidj_conditions) + ")"
-    
-    query += " ORDER BY df.fecha_entrada DESC"
-    
-    # Execute query
-    with connection.cursor() as cursor:
-        cursor.execute(query, params)
-        columns = [col[0] for col in cursor.description]
-        results = cursor.fetchall()
-    
-    # Create DataFrame
-    df = pd.DataFrame(results, columns=columns)
-    
-    # Create Excel file in memory
-    excel_buffer = BytesIO()
-    
-    # Write to Excel with formatting
-    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Reporte Disposición Final', index=False)
-        
-        # Get the workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Reporte Disposición Final']
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Style the header row
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        
-        for cell in worksheet[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-    
-    # Prepare response
-    excel_buffer.seek(0)
-    response = HttpResponse(
-        excel_buffer.getvalue(),
+    filters = FiltrosReporte.desde_parametros(request.GET)
+    query = _pivot_query(filters, request.GET) or ConsultaReporte(filters)
+    filename = _export_filename(query, 'csv' if request.GET.get('format') == 'csv' else 'xlsx')
+
+    if request.GET.get('format') == 'csv':
+        path = ruta_en_cache(query, 'csv')
+        if exportacion_vigente(path):
+            response = FileResponse(open(path, 'rb'), content_type='text/csv; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(lineas_csv_en_cache(query, path), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    return FileResponse(
+        open(xlsx_en_cache(query), 'rb'),
+        as_attachment=True,
+        filename=filename,
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
-    response['Content-Disposition'] = 'attachment; filename="reporte_disposicion_final.xlsx"'
-    
+
+
+def _export_job_data(export):
+    """
+    Status of a background export, as returned to the page that polls it.
+    """
+    if export.estado == 'ERROR':
+        message = export.mensaje_error
+    elif export.estado == 'COMPLETADO':
+        message = get_string('messages.export_ready', 'reports')
+    elif export.filas_escritas:
+        message = get_string('messages.export_progress', 'reports').format(
+            rows=export.filas_escritas, total=export.filas_totales
+        )
+    else:
+        message = get_string('messages.export_queued', 'reports').format(total=export.filas_totales)
+    return {
+        'id': export.id,
+        'estado': export.estado,
+        'estado_display': export.get_estado_display(),
+        'terminado': export.terminada,
+        'filas_escritas': export.filas_escritas,
+        'filas_totales': export.filas_totales,
+        'mensaje': message,
+        'status_url': reverse('reports:df_export_job_status', args=[export.id]),
+        'download_url': (
+            reverse('reports:df_export_job_download', args=[export.id]) if export.estado == 'COMPLETADO' else None
+        ),
+    }
+
+
+@require_POST
+@role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR, UserProfile.ROLE_REGISTER_USER])
+def export_report_job(request):
+    """
+    Start an export with the report filters sent as form data.
+    Exports up to REPORTES_EXPORTACION_FILAS_SEGUNDO_PLANO rows, or already generated for
+    the current data, are downloaded directly from ``export_report_csv``. Larger ones are
+    queued for ``procesar_exportaciones`` and the page polls ``export_job_status``.
+    Pivots are always downloaded directly: they only hold the aggregated groups.
+    """
+    export_format = 'csv' if request.POST.get('format') == 'csv' else 'xlsx'
+    filters = FiltrosReporte.desde_parametros(request.POST)
+    query = ConsultaReporte(filters)
+
+    if (_pivot_query(filters, request.POST) is not None
+            or query.totales()[0] <= settings.REPORTES_EXPORTACION_FILAS_SEGUNDO_PLANO
+            or exportacion_vigente(ruta_en_cache(query, export_format))):
+        params = request.POST.copy()
+        params.pop('csrfmiddlewaretoken', None)
+        return JsonResponse({
+            'terminado': True,
+            'download_url': f"{reverse('reports:df_export_report_csv')}?{params.urlencode()}",
+        })
+
+    export = encolar_exportacion(filters, export_format, request.user)
+    return JsonResponse(_export_job_data(export))
+
+
+@role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR, UserProfile.ROLE_REGISTER_USER])
+def export_job_status(request, export_id):
+    """
+    Return the status of a background export of the current user as JSON.
+    """
+    export = get_object_or_404(ExportacionReporte, id=export_id, user=request.user)
+    return JsonResponse(_export_job_data(export))
+
+
+@role_required([UserProfile.ROLE_ADMIN, UserProfile.ROLE_DATA_INGESTOR, UserProfile.ROLE_REGISTER_USER])
+def export_job_download(request, export_id):
+    """
+    Stream the file of a finished background export from MinIO.
+    """
+    export = get_object_or_404(ExportacionReporte, id=export_id, user=request.user, estado='COMPLETADO')
+    try:
+        content = leer_exportacion(export)
+    except S3Error:
+        raise Http404(get_string('errors.export_not_available', 'reports'))
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export.formato])
+    response['Content-Disposition'] = f'attachment; filename="{export.nombre_archivo}"'
+    if export.tamano_bytes:
+        response['Content-Length'] = export.tamano_bytes
     return response
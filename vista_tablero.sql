@@ -1,5 +1,9 @@
-CREATE VIEW disposicion_final_detallada AS
+-- Vista materializada creada por la migración ingesta 0012 y actualizada después de cada
+-- carga (ver ingesta/loaders/vista_detallada.py). Se actualiza a mano con:
+--   python manage.py refrescar_vista_detallada
+CREATE MATERIALIZED VIEW disposicion_final_detallada AS
 SELECT
+    df.id AS "ID",
     EXTRACT(YEAR FROM df.fecha_entrada) AS "AÑO",
     EXTRACT(MONTH FROM df.fecha_entrada) AS "MES",
     EXTRACT(DAY FROM df.fecha_entrada) AS "DÍA",
@@ -28,14 +32,19 @@ SELECT
 FROM
     ingesta_disposicionfinal df
 LEFT JOIN
-    ingesta_concesion c ON UPPER(TRIM(df.concesion)) = UPPER(TRIM(c.nombre))
+    ingesta_concesion c ON c.id = df.concesion_ref_id
 LEFT JOIN
-    ingesta_servicio s ON UPPER(TRIM(df.servicio)) = UPPER(TRIM(s.nombre))
+    ingesta_servicio s ON s.id = df.servicio_ref_id
 LEFT JOIN
-    ingesta_zonadescarga zd ON UPPER(TRIM(df.zona_descarga)) = UPPER(TRIM(zd.nombre))
-LEFT JOIN
-    ingesta_ase a ON UPPER(TRIM(df.ase)) = UPPER(TRIM(a.nombre))
+    ingesta_zonadescarga zd ON zd.id = df.zona_descarga_ref_id
 WHERE
     df.fecha_entrada IS NOT NULL
 ORDER BY
-    df.fecha_entrada DESC;
\ No newline at end of file
+    df.fecha_entrada DESC;
+
+CREATE UNIQUE INDEX disposicion_final_detallada_id ON disposicion_final_detallada ("ID");
+CREATE INDEX disposicion_final_detallada_fecha ON disposicion_final_detallada ("FECHA ENTRADA");
+CREATE INDEX disposicion_final_detallada_periodo ON disposicion_final_detallada ("AÑO", "MES");
+CREATE INDEX disposicion_final_detallada_concesion ON disposicion_final_detallada ("CONCESION");
+CREATE INDEX disposicion_final_detallada_servicio ON disposicion_final_detallada ("SERVICIO");
+CREATE INDEX disposicion_final_detallada_zona ON disposicion_final_detallada ("ZONA DESCARGA");
\ No newline at end of file